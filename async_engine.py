@@ -0,0 +1,354 @@
+"""
+asyncio switching engine for the VLAN switcher.
+
+An alternative to the thread-pool FleetEngine for large fleets: every
+switch is driven by a coroutine over a non-blocking asyncssh session,
+so one process can keep hundreds of switches in flight. Selected with
+"engine": "async" in config.json.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import re
+import socket
+import threading
+import time
+
+import asyncssh
+
+from command_plan import plan_commands
+from fleet import SwitchResult, TickReport, build_device, record_breakers, rotate_switch
+from health_check import read_banner
+from log_pipeline import Truncated
+from rate_limit import RateLimited
+from reconcile import log_drift
+
+logger = logging.getLogger(__name__)
+
+# Any IOS prompt: "Switch>", "Switch#", "Switch(config-if)#"
+PROMPT_RE = re.compile(r'[\w.\-]+(\([\w\-]+\))?[>#]\s*$')
+# Privileged exec prompt only, i.e. back out of configuration mode
+EXEC_PROMPT_RE = re.compile(r'[\r\n][\w.\-]+#\s*$')
+PASSWORD_RE = re.compile(r'(ssword:\s*$|[>#]\s*$)')
+# Characters at the end of the output a prompt is looked for in
+PROMPT_TAIL = 256
+
+
+class CommandError(Exception):
+    """The switch rejected a command"""
+
+
+class AsyncIOSSession:
+    """Interactive IOS CLI session over asyncssh"""
+
+    def __init__(self, connection, process):
+        self.connection = connection
+        self.process = process
+
+    @classmethod
+    async def connect(cls, device, timeout=10):
+        """Log in to a switch and prepare the terminal"""
+        connection = await asyncio.wait_for(asyncssh.connect(
+            device['host'],
+            port=device.get('port', 22),
+            username=device['username'],
+            password=device['password'],
+            known_hosts=None,
+            client_keys=None,
+            agent_path=None,
+        ), timeout)
+        try:
+            process = await connection.create_process(term_type='vt100', term_size=(511, 24))
+            session = cls(connection, process)
+            await asyncio.wait_for(session.read_until(PROMPT_RE), timeout)
+            await asyncio.wait_for(session.send_command("terminal length 0"), timeout)
+        except BaseException:
+            connection.close()
+            raise
+        return session
+
+    def is_alive(self):
+        """Check that the shell can still be written to"""
+        return not self.process.stdout.at_eof() and self.process.exit_status is None
+
+    async def read_until(self, pattern):
+        """Read output until pattern matches the end of it"""
+        chunks = []
+        tail = ""
+        # Prompts are anchored at the end, so only the tail is searched;
+        # long show output is not rescanned for every chunk
+        while not pattern.search(tail):
+            chunk = await self.process.stdout.read(65536)
+            if not chunk:
+                raise EOFError("Switch closed the session")
+            chunks.append(chunk)
+            tail = (tail + chunk)[-PROMPT_TAIL:]
+        return "".join(chunks)
+
+    async def send_command(self, command, pattern=PROMPT_RE):
+        """Send one command and return its output"""
+        self.process.stdin.write(command + "\n")
+        return await self.read_until(pattern)
+
+    async def enable(self, secret):
+        """Enter privileged exec mode"""
+        output = await self.send_command("enable", PASSWORD_RE)
+        if output.rstrip().endswith(':'):
+            output = await self.send_command(secret)
+        if not output.rstrip().endswith('#'):
+            raise CommandError("enable failed: access denied")
+
+    async def send_config_set(self, commands):
+        """Apply a config set in one write and wait for the exec prompt"""
+        lines = ["configure terminal"] + list(commands) + ["end"]
+        self.process.stdin.write("\n".join(lines) + "\n")
+        output = await self.read_until(EXEC_PROMPT_RE)
+        if "% Invalid" in output or "% Incomplete" in output:
+            raise CommandError(f"Switch rejected configuration: {output.strip()}")
+        return output
+
+    def close(self):
+        self.connection.close()
+
+
+class AsyncFleetEngine:
+    """Pushes VLAN changes to every switch from coroutines"""
+
+    def __init__(self, max_concurrency=200, switch_timeout=30, connect_timeout=10, reconciler=None,
+                 breaker=None, limiter=None):
+        self.max_concurrency = max_concurrency
+        self.switch_timeout = switch_timeout
+        self.connect_timeout = connect_timeout
+        self.reconciler = reconciler
+        self.breaker = breaker
+        self.limiter = limiter
+        self.sessions = {}
+        self._semaphore = None
+
+    async def _session(self, device, phases, switch):
+        """Return a live session for device, logging in when needed"""
+        key = (device['host'], device.get('port', 22), device['username'])
+        session = self.sessions.pop(key, None)
+        if session is not None and session.is_alive():
+            return session, True
+        if session is not None:
+            session.close()
+        if self.limiter is not None:
+            await self.limiter.login_async(switch, phases)
+        start = time.perf_counter()
+        # Resolve separately so name lookups are timed on their own
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(
+                device['host'], device.get('port', 22), type=socket.SOCK_STREAM)
+            device = dict(device, host=infos[0][4][0])
+        except (socket.gaierror, UnicodeError):
+            pass
+        resolved = time.perf_counter()
+        session = await AsyncIOSSession.connect(device, self.connect_timeout)
+        connected = time.perf_counter()
+        try:
+            await session.enable(device.get('secret', ''))
+        except BaseException:
+            session.close()
+            raise
+        phases['dns'] = resolved - start
+        phases['connect'] = connected - resolved
+        phases['enable'] = time.perf_counter() - connected
+        return session, False
+
+    async def _run(self, switch, action, phases, counters):
+        """Await action(session), reconnecting once if a reused session has died"""
+        device = build_device(switch)
+        key = (device['host'], device.get('port', 22), device['username'])
+        session, reused = await self._session(device, phases, switch)
+        try:
+            output = await action(session)
+        except (OSError, EOFError, asyncssh.Error):
+            session.close()
+            if not reused:
+                raise
+            counters['retries'] = counters.get('retries', 0) + 1
+            session, _ = await self._session(device, phases, switch)
+            try:
+                output = await action(session)
+            except BaseException:
+                session.close()
+                raise
+        except BaseException:
+            # Includes timeouts and cancellation: the channel state is unknown
+            session.close()
+            raise
+        self.sessions[key] = session
+        return output
+
+    async def _limited(self, switch, action, phases, counters):
+        """_run while holding one of the device's session slots"""
+        if self.limiter is None:
+            return await self._run(switch, action, phases, counters)
+        async with self.limiter.slot_async(switch, phases):
+            return await self._run(switch, action, phases, counters)
+
+    async def switch_one(self, switch, report):
+        """Rotate one switch and push its config within switch_timeout"""
+        start = time.perf_counter()
+        name = switch["name"]
+        if self.breaker is not None:
+            if not self.breaker.allow(name):
+                report.results.append(SwitchResult(name, error=self.breaker.reason(name), skipped=True))
+                return
+            if self.breaker.probing(name):
+                try:
+                    await read_banner(switch["switch_ip"], switch.get("port", 22), self.breaker.probe_timeout)
+                except (OSError, asyncio.TimeoutError) as e:
+                    report.results.append(SwitchResult(name, error=f"Probe failed: {str(e) or 'timed out'}",
+                                                       duration=time.perf_counter() - start))
+                    return
+        # Put back if the switch does not get its turn
+        cursors = [group["cursor"] for group in switch["port_groups"]]
+        vlans, assignments = rotate_switch(switch)
+        reconciler = self.reconciler
+        phases = {}
+        counters = {}
+        outcome = {}
+
+        async def push(session):
+            changes = None
+            if reconciler is not None:
+                if reconciler.needs_refresh(name):
+                    show_start = time.perf_counter()
+                    output = await session.send_command(reconciler.show_command)
+                    phases['show'] = time.perf_counter() - show_start
+                    outcome['drift'] = reconciler.refresh(name, output)
+                changes = reconciler.changes(name, assignments)
+                outcome['pushed'] = len(changes)
+                if not changes:
+                    return ""
+            push_start = time.perf_counter()
+            plan = plan_commands(switch, vlans, changes)
+            logger.debug("[%s] Sending plan %s", name, plan.digest)
+            output = await session.send_config_set(plan.commands)
+            phases['config_push'] = time.perf_counter() - push_start
+            outcome['written'] = changes if changes is not None else assignments
+            if reconciler is not None:
+                reconciler.applied(name, changes)
+            return output
+
+        async with self._semaphore:
+            try:
+                output = await asyncio.wait_for(self._limited(switch, push, phases, counters),
+                                                self.switch_timeout)
+                logger.debug("[%s] Switch output: %s", name, Truncated(output))
+                result = SwitchResult(name, vlans, True)
+            except RateLimited as e:
+                # Not attempted, so the rotation step is not used up
+                for group, cursor in zip(switch["port_groups"], cursors):
+                    group["cursor"] = cursor
+                result = SwitchResult(name, error=str(e), skipped=True)
+            except asyncio.TimeoutError:
+                result = SwitchResult(name, vlans, error=f"no response within {self.switch_timeout}s")
+            except (OSError, asyncssh.Error) as e:
+                result = SwitchResult(name, vlans, error=f"Network error: {e}")
+            except Exception as e:
+                result = SwitchResult(name, vlans, error=str(e))
+        if not result.ok and reconciler is not None:
+            # The push may have been applied partly; read again next time
+            reconciler.forget(name)
+        result.duration = time.perf_counter() - start
+        result.phases = phases
+        result.retries = counters.get('retries', 0)
+        result.pushed = outcome.get('pushed')
+        result.written = outcome.get('written', {}) if result.ok else {}
+        result.drift = outcome.get('drift', {})
+        log_drift(name, result.drift)
+        report.results.append(result)
+
+    async def run_tick(self, switches, report=None):
+        """Switch every device once, filling in report as switches finish"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        report = report or TickReport()
+        start = time.perf_counter()
+        await asyncio.gather(*(self.switch_one(switch, report) for switch in switches))
+        report.duration = time.perf_counter() - start
+        record_breakers(self.breaker, report)
+        return report
+
+    async def close_devices(self, devices):
+        """Log out of the given devices only"""
+        for device in devices:
+            session = self.sessions.pop((device['host'], device.get('port', 22), device['username']), None)
+            if session is not None:
+                session.close()
+
+    async def close(self):
+        """Log out of every switch"""
+        sessions = list(self.sessions.values())
+        self.sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+class AsyncEngineRunner:
+    """Runs an AsyncFleetEngine on a background event loop
+
+    Exposes the same run_tick()/shutdown() interface as FleetEngine so
+    the service loop does not need to know which engine it drives.
+    shutdown() cancels an in-flight tick, so a service stop request is
+    not held up by slow switches.
+    """
+
+    def __init__(self, **engine_options):
+        self.engine = AsyncFleetEngine(**engine_options)
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="vlan-async-engine", daemon=True)
+        self._thread.start()
+        self._tick = None
+
+    def run_tick(self, switches):
+        """Run one tick and block until it finishes or is cancelled"""
+        report = TickReport()
+        start = time.perf_counter()
+        self._tick = asyncio.run_coroutine_threadsafe(self.engine.run_tick(switches, report), self.loop)
+        try:
+            return self._tick.result()
+        except concurrent.futures.CancelledError:
+            finished = {result.name for result in report.results}
+            for switch in switches:
+                if switch["name"] not in finished:
+                    report.results.append(SwitchResult(switch["name"], error="cancelled by service stop",
+                                                       skipped=True))
+            report.duration = time.perf_counter() - start
+            return report
+        finally:
+            self._tick = None
+
+    def close_switches(self, switches):
+        """Log out of the given switches, leaving every other session open"""
+        devices = [build_device(switch) for switch in switches]
+        for switch in switches:
+            if self.engine.reconciler is not None:
+                self.engine.reconciler.forget(switch["name"])
+            if self.engine.breaker is not None:
+                self.engine.breaker.forget(switch["name"])
+        try:
+            asyncio.run_coroutine_threadsafe(self.engine.close_devices(devices), self.loop).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Error closing switch sessions: {e}")
+
+    @property
+    def breaker(self):
+        return self.engine.breaker
+
+    def shutdown(self):
+        """Cancel any running tick, log out and stop the event loop"""
+        if not self.loop.is_running():
+            return
+        tick = self._tick
+        if tick is not None:
+            tick.cancel()
+        try:
+            asyncio.run_coroutine_threadsafe(self.engine.close(), self.loop).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Error closing switch sessions: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
@@ -0,0 +1,67 @@
+"""
+Tick latency of the asyncio engine against hundreds of in-process fake switches.
+
+    python benchmarks/bench_async_engine.py --sizes 10 100 300 --ticks 3
+"""
+
+import argparse
+import asyncio
+import resource
+import sys
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from async_engine import AsyncFleetEngine
+from fleet import load_switches
+from fake_ios_async import start_fleet
+
+
+def build_config(servers):
+    return {
+        "username": "admin",
+        "password": "admin",
+        "enable_password": "enable",
+        "vlans": ["100", "200", "300"],
+        "interfaces": ["Gi1/0/1-24"],
+        "switches": [{"name": s.hostname, "switch_ip": s.host, "port": s.port} for s in servers],
+    }
+
+
+async def run(size, ticks, concurrency, command_delay):
+    servers = await start_fleet(size, command_delay=command_delay)
+    switches = load_switches(build_config(servers))
+    engine = AsyncFleetEngine(max_concurrency=concurrency)
+    durations = []
+    for _ in range(ticks):
+        report = await engine.run_tick(switches)
+        durations.append(report.duration)
+    await engine.close()
+    await asyncio.gather(*(server.stop() for server in servers))
+    logins = sum(server.logins for server in servers)
+    # The first tick includes every login; later ticks reuse sessions
+    print(f"{size:>8} {durations[0]:>12.3f} {min(durations[1:] or durations):>12.3f} "
+          f"{len(report.succeeded):>5} {len(report.failed):>7} {logins:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='asyncio engine benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 300])
+    parser.add_argument('--ticks', type=int, default=3)
+    parser.add_argument('--concurrency', type=int, default=500)
+    parser.add_argument('--command-delay', type=float, default=0.05,
+                        help='Simulated switch CPU time per command batch')
+    args = parser.parse_args()
+
+    # Two sockets per simulated switch plus headroom
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, 4 * max(args.sizes) + 256)), hard))
+
+    print(f"{'switches':>8} {'first tick':>12} {'warm tick':>12} {'ok':>5} {'failed':>7} {'logins':>7}")
+    for size in args.sizes:
+        asyncio.run(run(size, args.ticks, args.concurrency, args.command_delay))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Tick latency with a dead switch, with and without the circuit breaker.
+
+One switch of the simulated fleet accepts connections but never
+answers, so every attempt on it costs the switch timeout. The same
+ticks, --interval apart, run without and with the breaker. Then the
+dead switch comes back on the same port, and with the breaker it must
+be probed and switched again once its backoff is over:
+
+    python benchmarks/bench_circuit_breaker.py --switches 20 --ticks 10
+    python benchmarks/bench_circuit_breaker.py --engine async
+"""
+
+import argparse
+import asyncio
+import socket
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_ios_async import AsyncFakeIOSServer, FakeFleet
+from fleet import create_engine, load_switches
+from session_pool import SSHSessionPool
+
+
+def build_config(servers, dead_port, args, breaker):
+    switches = [{"name": s.hostname, "switch_ip": s.host, "port": s.port} for s in servers]
+    switches.append({"name": "dead", "switch_ip": "127.0.0.1", "port": dead_port})
+    return {
+        "username": "admin",
+        "password": "admin",
+        "enable_password": "enable",
+        "vlans": ["100", "200"],
+        "interfaces": ["Gi1/0/1-4"],
+        "engine": args.engine,
+        "switch_timeout": args.timeout,
+        "circuit_breaker": breaker,
+        "breaker_failures": 2,
+        "breaker_base_seconds": args.backoff,
+        "breaker_max_seconds": args.backoff * 4,
+        "probe_timeout": 0.5,
+        "switches": switches,
+    }
+
+
+def run(fleet, args, breaker):
+    silent = socket.socket()
+    silent.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    silent.bind(('127.0.0.1', 0))
+    silent.listen(16)
+    dead_port = silent.getsockname()[1]
+    config = build_config(fleet.servers, dead_port, args, breaker)
+    switches = load_switches(config)
+    pool = SSHSessionPool()
+    engine = create_engine(config, pool)
+    durations = []
+    healthy_failures = 0
+    try:
+        for _ in range(args.ticks):
+            report = engine.run_tick(switches)
+            durations.append(report.duration)
+            healthy_failures += sum(1 for r in report.failed if r.name != "dead")
+            time.sleep(args.interval)
+
+        # The dead switch comes back on the same port
+        silent.close()
+        revived = AsyncFakeIOSServer(port=dead_port, hostname="dead")
+        asyncio.run_coroutine_threadsafe(revived.start(), fleet.loop).result()
+        recovered = None
+        start = time.monotonic()
+        while time.monotonic() - start < args.backoff * 4 + 5:
+            report = engine.run_tick(switches)
+            if next(r for r in report.results if r.name == "dead").ok:
+                recovered = time.monotonic() - start
+                break
+            time.sleep(0.2)
+        asyncio.run_coroutine_threadsafe(revived.stop(), fleet.loop).result()
+        state = engine.breaker.snapshot() if engine.breaker is not None else {}
+    finally:
+        engine.shutdown()
+        pool.close_all()
+    return {
+        'p50': statistics.median(durations),
+        'total': sum(durations),
+        'healthy_failures': healthy_failures,
+        'recovered': recovered,
+        'state': state,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Circuit breaker benchmark')
+    parser.add_argument('--switches', type=int, default=20)
+    parser.add_argument('--ticks', type=int, default=10)
+    parser.add_argument('--interval', type=float, default=2.0, help='Seconds between ticks')
+    parser.add_argument('--timeout', type=float, default=3.0, help='switch_timeout')
+    parser.add_argument('--backoff', type=float, default=2.0, help='breaker_base_seconds')
+    parser.add_argument('--engine', default='threads', choices=['threads', 'async'])
+    args = parser.parse_args()
+
+    fleet = FakeFleet(args.switches, ports=['Gi1/0/1-4']).start()
+    try:
+        without = run(fleet, args, False)
+        with_breaker = run(fleet, args, True)
+    finally:
+        fleet.stop()
+
+    print(f"{args.switches} switches + 1 dead, {args.ticks} ticks, {args.engine} engine, "
+          f"switch_timeout {args.timeout:g}s")
+    print(f"{'breaker':<10} {'p50 tick s':>11} {'total s':>8} {'healthy failed':>15} {'recovered after s':>18}")
+    for name, result in (("off", without), ("on", with_breaker)):
+        recovered = "-" if result['recovered'] is None else f"{result['recovered']:.1f}"
+        print(f"{name:<10} {result['p50']:>11.2f} {result['total']:>8.2f} {result['healthy_failures']:>15} "
+              f"{recovered:>18}")
+
+    failures = []
+    if without['healthy_failures'] or with_breaker['healthy_failures']:
+        failures.append("healthy switches failed")
+    if with_breaker['p50'] >= args.timeout / 2:
+        failures.append("the dead switch still delays ticks")
+    if with_breaker['recovered'] is None:
+        failures.append("revived switch not switched again")
+    if with_breaker['state']:
+        failures.append(f"breaker not closed: {with_breaker['state']}")
+    if failures:
+        print(f"FAIL: {', '.join(failures)}")
+        sys.exit(1)
+    print(f"OK: {without['total'] / with_breaker['total']:.1f}x less time spent in ticks")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Per-tick cost of building config sets versus looking up compiled plans.
+
+For a fleet of switches with several port groups, times building every
+switch's commands from its port assignments each tick (the old way)
+against looking up the precompiled plans, and how long compiling the
+plans takes when the config loads:
+
+    python benchmarks/bench_command_plan.py --switches 200 --ticks 20
+
+Exits non-zero if a plan would move a port to another VLAN than the
+built commands do.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from command_plan import plan_commands
+from fleet import load_switches, rotate_switch
+from interfaces import build_vlan_commands, expand_ports
+
+
+def build_config(switches):
+    return {
+        "username": "admin",
+        "password": "admin",
+        "switches": [{
+            "name": f"sw{i}",
+            "switch_ip": f"10.0.{i // 250}.{i % 250 + 1}",
+            "port_groups": [
+                {"name": "desks", "interfaces": ["Gi1/0/1-20", "Gi1/0/22-24"], "vlans": "100-199"},
+                {"name": "lab", "interfaces": ["Gi1/0/25-40"], "vlans": ["10", "20", "30"]},
+                {"name": "printers", "interfaces": ["Gi1/0/41", "Gi1/0/43", "Gi1/0/45-48"], "vlans": ["50"]},
+            ],
+        } for i in range(switches)],
+    }
+
+
+def applied(commands):
+    """Port -> VLAN a config set leaves behind"""
+    ports = {}
+    selected = []
+    for command in commands:
+        if command.startswith("interface range "):
+            selected = expand_ports([spec.replace(" - ", "-") for spec in command[16:].split(" , ")])
+        elif command.startswith("interface "):
+            selected = expand_ports(command[10:])
+        elif command.startswith("switchport access vlan "):
+            ports.update((port, command.split()[-1]) for port in selected)
+    return ports
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Command plan benchmark')
+    parser.add_argument('--switches', type=int, default=200)
+    parser.add_argument('--ticks', type=int, default=20)
+    args = parser.parse_args()
+
+    config = build_config(args.switches)
+    start = time.perf_counter()
+    switches = load_switches(config)
+    loaded = time.perf_counter() - start
+
+    ticks = [[rotate_switch(switch) for switch in switches] for _ in range(args.ticks)]
+
+    start = time.perf_counter()
+    built = [[build_vlan_commands(assignments) for _, assignments in tick] for tick in ticks]
+    build_time = (time.perf_counter() - start) / args.ticks
+
+    start = time.perf_counter()
+    planned = [[plan_commands(switch, vlans) for switch, (vlans, _) in zip(switches, tick)] for tick in ticks]
+    plan_time = (time.perf_counter() - start) / args.ticks
+
+    mismatches = sum(1 for tick_built, tick_planned in zip(built, planned)
+                     for commands, plan in zip(tick_built, tick_planned)
+                     if applied(commands) != applied(plan.commands))
+
+    print(f"{args.switches} switches x 3 port groups, {args.ticks} ticks")
+    print(f"load_switches incl. compiling plans: {loaded * 1000:8.2f} ms")
+    print(f"build commands per tick:             {build_time * 1000:8.2f} ms")
+    print(f"look up plans per tick:              {plan_time * 1000:8.2f} ms")
+    if mismatches:
+        print(f"FAIL: {mismatches} plan(s) differ from the built commands")
+        sys.exit(1)
+    print(f"OK: {build_time / plan_time:.1f}x faster per tick")
+
+
+if __name__ == '__main__':
+    main()
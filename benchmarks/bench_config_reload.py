@@ -0,0 +1,163 @@
+"""
+Cost of watching config.json and what a hot reload keeps.
+
+Times an idle ConfigWatcher check (one stat) against re-reading and
+normalizing the config on every check. Then, against simulated
+switches, runs a tick, saves an edited config (one switch removed, one
+added, one VLAN list changed, a new interval), applies it the way the
+service does and runs another tick. A wait shorter than the poll
+interval, as with a short schedule, must still see an edit:
+
+    python benchmarks/bench_config_reload.py --switches 20
+
+Exits non-zero if switches the edit did not touch had to log in again,
+a changed rotation did not resume where it was, the schedule lost its
+grid, or the short wait missed the edit.
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config_watcher import ConfigDiff, ConfigWatcher
+from deadline_scheduler import DeadlineScheduler, interval_from_config
+from fake_ios_async import FakeFleet
+from fleet import carry_rotation, create_engine, load_switches, record_rotation
+from session_pool import SSHSessionPool
+from state_journal import RotationJournal
+
+
+def build_config(servers):
+    return {
+        "username": "admin",
+        "password": "admin",
+        "enable_password": "enable",
+        "schedule_seconds": 60,
+        "vlans": ["100", "200", "300"],
+        "interfaces": ["Gi1/0/1-4"],
+        "switches": [{"name": s.hostname, "switch_ip": s.host, "port": s.port} for s in servers],
+    }
+
+
+def save(path, config):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(config, f, indent=4)
+    tmp_path.replace(path)
+
+
+def time_polls(config_file, checks):
+    watcher = ConfigWatcher(config_file)
+    start = time.perf_counter()
+    for _ in range(checks):
+        watcher.poll()
+    watched = (time.perf_counter() - start) / checks
+    start = time.perf_counter()
+    for _ in range(checks):
+        with open(config_file, 'r') as f:
+            load_switches(json.load(f))
+    reread = (time.perf_counter() - start) / checks
+    return watched, reread
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Config hot reload check')
+    parser.add_argument('--switches', type=int, default=20)
+    parser.add_argument('--checks', type=int, default=2000)
+    parser.add_argument('--engine', default='threads', choices=['threads', 'async'])
+    args = parser.parse_args()
+
+    failures = []
+    fleet = FakeFleet(args.switches + 1, ports=['Gi1/0/1-48']).start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            config_file = Path(tmp) / "config.json"
+            config = build_config(fleet.servers[:-1])
+            config["engine"] = args.engine
+            save(config_file, config)
+            watched, reread = time_polls(config_file, args.checks)
+
+            # Schedule shorter than the poll interval: the wait ends at the
+            # deadline and must still have looked at the file
+            watcher = ConfigWatcher(config_file, poll_interval=5)
+            touched = dict(config, vlans=["100", "200"])
+            save(config_file, touched)
+            _, short_config = watcher.wait(lambda timeout: time.sleep(timeout) or False, 0.2)
+            save(config_file, config)
+
+            pool = SSHSessionPool()
+            engine = create_engine(config, pool)
+            switches = load_switches(config)
+            scheduler = DeadlineScheduler()
+            job = scheduler.every(interval_from_config(config), lambda: None)
+            next_deadline = job.deadline
+            journal = RotationJournal(Path(tmp) / "rotation")
+            record_rotation(journal, switches, engine.run_tick(switches))
+            logins_before = fleet.logins
+
+            # The edit: drop the first switch, add the spare one, change
+            # the VLANs of the second and the interval
+            watcher = ConfigWatcher(config_file, poll_interval=0.01)
+            edited = json.loads(json.dumps(config))
+            edited["switches"].pop(0)
+            spare = fleet.servers[-1]
+            edited["switches"].append({"name": spare.hostname, "switch_ip": spare.host, "port": spare.port})
+            # After VLAN 100 the rotation continues with 200, not the new first entry
+            edited["switches"][0]["vlans"] = ["300", "100", "200"]
+            edited["schedule_seconds"] = 30
+            save(config_file, edited)
+
+            start = time.perf_counter()
+            stopped, new_config = watcher.wait(lambda timeout: time.sleep(timeout) or False, 5)
+            noticed = time.perf_counter() - start
+            start = time.perf_counter()
+            new_switches = load_switches(new_config)
+            diff = ConfigDiff(config, new_config, switches, new_switches)
+            carry_rotation(switches, new_switches)
+            engine.close_switches(diff.stale_switches)
+            job = scheduler.reschedule(job, interval_from_config(new_config))
+            applied = time.perf_counter() - start
+
+            changed = new_switches[0]["name"]
+            report = engine.run_tick(new_switches)
+            new_logins = fleet.logins - logins_before
+            engine.shutdown()
+            pool.close_all()
+            journal.close()
+
+        print(f"{args.switches} switches, {args.engine} engine")
+        print(f"idle check with ConfigWatcher: {watched * 1e6:10.2f} us")
+        print(f"re-read and load_switches:     {reread * 1e6:10.2f} us")
+        print(f"edit noticed after {noticed * 1000:.1f} ms, applied in {applied * 1000:.2f} ms: {diff.summary()}")
+        print(f"logins on the tick after the reload: {new_logins} (1 expected, for the added switch)")
+        print(f"tick after reload: {len(report.succeeded)} switched, {len(report.failed)} failed")
+
+        print(f"edit seen by a 0.2 s wait with 5 s polls: {'yes' if short_config else 'no'}")
+
+        if short_config != touched:
+            failures.append("a wait shorter than the poll interval missed the edit")
+        if new_logins != 1:
+            failures.append(f"{new_logins} logins after reload")
+        if report.failed:
+            failures.append(f"{len(report.failed)} switches failed after reload")
+        if next(r for r in report.results if r.name == changed).vlan != "200":
+            failures.append("changed rotation restarted")
+        if job.deadline != next_deadline - 60 + 30:
+            failures.append("schedule grid moved")
+    finally:
+        fleet.stop()
+
+    if failures:
+        print(f"FAIL: {', '.join(failures)}")
+        sys.exit(1)
+    print("OK: untouched sessions and the schedule grid were kept")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Fleet tick latency as the number of simulated switches grows.
+
+Each simulated switch answers after a fixed network latency; one switch
+in every fleet is unreachable and never answers within the tick, to
+show that it does not hold up the rest:
+
+    python benchmarks/bench_fleet.py --sizes 1 10 50 100 200
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fleet import FleetEngine, load_switches
+
+
+class SimulatedConnection:
+    def send_config_set(self, commands, error_pattern=None):
+        return "\n".join(commands)
+
+
+class SimulatedPool:
+    """Stands in for SSHSessionPool with fixed per-switch latency"""
+
+    def __init__(self, latency, dead_hosts=()):
+        self.latency = latency
+        self.dead_hosts = set(dead_hosts)
+
+    def run(self, device, func, phases=None, counters=None, login=None):
+        if device['host'] in self.dead_hosts:
+            time.sleep(self.latency * 10)
+            raise TimeoutError("switch unreachable")
+        time.sleep(self.latency)
+        return func(SimulatedConnection())
+
+
+def build_config(size):
+    return {
+        "username": "admin",
+        "password": "admin",
+        "vlans": ["100", "200", "300"],
+        "interfaces": ["GigabitEthernet0/1"],
+        "switches": [{"name": f"sw{i}", "switch_ip": f"10.0.{i // 250}.{i % 250 + 1}"}
+                     for i in range(size)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fleet fan-out benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 50, 100, 200])
+    parser.add_argument('--workers', type=int, default=200, help='Worker threads')
+    parser.add_argument('--latency', type=float, default=0.2, help='Seconds per simulated switch')
+    parser.add_argument('--ticks', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"workers={args.workers} latency={args.latency * 1000:.0f} ms, "
+          f"one unreachable switch per fleet (except size 1)")
+    print(f"{'switches':>8} {'tick (s)':>10} {'ok':>5} {'failed':>7}")
+    for size in args.sizes:
+        switches = load_switches(build_config(size))
+        dead = [switches[-1]["switch_ip"]] if size > 1 else []
+        engine = FleetEngine(SimulatedPool(args.latency, dead), max_workers=args.workers,
+                             switch_timeout=args.latency * 5)
+        durations = []
+        for _ in range(args.ticks):
+            report = engine.run_tick(switches)
+            durations.append(report.duration)
+        engine.shutdown()
+        print(f"{size:>8} {sum(durations) / len(durations):>10.3f} "
+              f"{len(report.succeeded):>5} {len(report.failed):>7}")
+
+
+if __name__ == '__main__':
+    main()
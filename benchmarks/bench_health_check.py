@@ -0,0 +1,128 @@
+"""
+Fleet connection test: tiered concurrent check versus one login at a time.
+
+Starts simulated switches with a login delay, plus switches whose port
+refuses connections and switches that accept but never send an SSH
+banner. Every tier of HealthCheck runs against the whole fleet; the old
+test (netmiko login, enable and "show version", one switch after the
+other) is timed on a few switches and extrapolated:
+
+    python benchmarks/bench_health_check.py --switches 100 --login-delay 0.5
+
+Exits non-zero if a check gets a switch wrong or the enable tier takes
+longer than --limit seconds.
+"""
+
+import argparse
+import socket
+import sys
+import time
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_ios_async import FakeFleet
+from fleet import load_switches
+from health_check import TIERS, HealthCheck
+
+
+def closed_port():
+    """A local port nothing listens on"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def silent_server():
+    """A listening socket that never says anything"""
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(16)
+    return sock
+
+
+def build_config(servers, dead, silent):
+    switches = [{"name": s.hostname, "switch_ip": s.host, "port": s.port} for s in servers]
+    switches += [{"name": f"dead{i}", "switch_ip": "127.0.0.1", "port": port} for i, port in enumerate(dead)]
+    switches += [{"name": f"silent{i}", "switch_ip": "127.0.0.1", "port": sock.getsockname()[1]}
+                 for i, sock in enumerate(silent)]
+    return {
+        "username": "admin",
+        "password": "admin",
+        "enable_password": "enable",
+        "vlans": ["100"],
+        "interfaces": ["Gi1/0/1"],
+        "switches": switches,
+    }
+
+
+def old_test(switch):
+    """What test_connection used to do, for one switch"""
+    from netmiko import ConnectHandler
+    connection = ConnectHandler(device_type="cisco_ios", host=switch["switch_ip"], port=switch["port"],
+                                username=switch["username"], password=switch["password"],
+                                secret=switch["enable_password"])
+    connection.enable()
+    connection.send_command("show version")
+    connection.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Health check benchmark')
+    parser.add_argument('--switches', type=int, default=100)
+    parser.add_argument('--dead', type=int, default=3)
+    parser.add_argument('--silent', type=int, default=2)
+    parser.add_argument('--login-delay', type=float, default=0.5)
+    parser.add_argument('--timeout', type=float, default=2.0)
+    parser.add_argument('--sample', type=int, default=3, help='Switches to time the old test on')
+    parser.add_argument('--limit', type=float, default=10.0)
+    args = parser.parse_args()
+
+    fleet = FakeFleet(args.switches, login_delay=args.login_delay).start()
+    silent = [silent_server() for _ in range(args.silent)]
+    failures = []
+    try:
+        switches = load_switches(build_config(fleet.servers, [closed_port() for _ in range(args.dead)], silent))
+        expected_bad = {s["name"] for s in switches if not s["name"].startswith("sw")}
+
+        print(f"{args.switches} switches (login delay {args.login_delay:g}s), {args.dead} refusing, "
+              f"{args.silent} silent; timeout {args.timeout:g}s")
+        print(f"{'check':<22} {'total s':>8} {'first s':>8} {'ok':>5} {'failed':>7}")
+        times = {}
+        for tier in TIERS:
+            arrivals = []
+            start = time.perf_counter()
+            check = HealthCheck(switches, tier, timeout=args.timeout,
+                                on_result=lambda result: arrivals.append(time.perf_counter() - start))
+            results = check.run()
+            times[tier] = check.duration
+            bad = {r.name for r in results if not r.ok}
+            print(f"{tier:<22} {check.duration:>8.2f} {min(arrivals):>8.2f} "
+                  f"{len(results) - len(bad):>5} {len(bad):>7}")
+            if bad != expected_bad or len(results) != len(switches):
+                failures.append(f"{tier} check got {sorted(bad ^ expected_bad)} wrong")
+
+        start = time.perf_counter()
+        for switch in switches[:args.sample]:
+            old_test(switch)
+        per_switch = (time.perf_counter() - start) / args.sample
+        # Unreachable switches waited for netmiko's default timeouts
+        old_total = per_switch * args.switches + 10 * (args.dead + args.silent)
+        print(f"{'old, one at a time':<22} {old_total:>8.2f}  (extrapolated from {args.sample} switches, "
+              f"{per_switch:.2f}s each; 10s per unreachable switch)")
+    finally:
+        for sock in silent:
+            sock.close()
+        fleet.stop()
+
+    if times.get('enable', 0) > args.limit:
+        failures.append(f"enable check took {times['enable']:.1f}s (limit {args.limit:g}s)")
+    if failures:
+        print(f"FAIL: {'; '.join(failures)}")
+        sys.exit(1)
+    print(f"OK: whole fleet checked up to enable in {times['enable']:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
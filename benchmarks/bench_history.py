@@ -0,0 +1,187 @@
+"""
+Switch history store: write cost and query latency as history grows.
+
+Fills a history database with --ticks simulated ticks of a fleet, first
+a tenth of them and then all of them, and times the questions the GUI
+and the report command ask against both sizes. For comparison it also
+times answering "when did this switch last switch" by scanning an
+equally long log file, which is how the dashboard used to find out:
+
+    python benchmarks/bench_history.py --switches 200 --ports 48 --ticks 200
+
+Exits non-zero if a query that takes over --floor milliseconds slows
+down by more than --growth times from the small to the large history,
+or if queuing a tick takes more than --tick-budget milliseconds.
+"""
+
+import argparse
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fleet import SwitchResult, TickReport, load_switches
+from history_store import HistoryStore, HistoryWriter
+
+
+def build_switches(count, ports):
+    return load_switches({
+        "username": "admin",
+        "password": "admin",
+        "vlans": ["100", "200", "300"],
+        "interfaces": [f"Gi1/0/1-{ports}"],
+        "switches": [{"name": f"sw{i}", "switch_ip": f"10.0.{i // 250}.{i % 250 + 1}"} for i in range(count)],
+    })
+
+
+def fake_tick(switches, started, rng):
+    report = TickReport()
+    report.started = started
+    for switch in switches:
+        group = switch["port_groups"][0]
+        vlan = group["vlans"][group["cursor"]]
+        if rng.random() < 0.05:
+            report.results.append(SwitchResult(switch["name"], {group["name"]: vlan}, error="Network error: timed out",
+                                               duration=30.0))
+            continue
+        phases = {'dns': 0.001, 'connect': rng.uniform(0.5, 2), 'enable': 0.1, 'config_push': rng.uniform(0.2, 1)}
+        report.results.append(SwitchResult(switch["name"], {group["name"]: vlan}, True,
+                                           duration=sum(phases.values()), phases=phases, pushed=len(group["ports"]),
+                                           written=dict.fromkeys(group["ports"], vlan)))
+    return report
+
+
+def advance(switches, report):
+    for switch, result in zip(switches, report.results):
+        group = switch["port_groups"][0]
+        group["cursor"] = (group["cursor"] + 1) % len(group["vlans"])
+        if result.ok:
+            group["vlan"] = result.vlans[group["name"]]
+
+
+def fill(writer, store, switches, ticks, start_tick, log, rng):
+    """Queue ticks like the service does and write them in batches"""
+    queue_times = []
+    write_time = 0.0
+    for i in range(start_tick, start_tick + ticks):
+        report = fake_tick(switches, 1_700_000_000 + i * 60, rng)
+        begin = time.perf_counter()
+        writer.record_tick(report, switches)
+        queue_times.append(time.perf_counter() - begin)
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(report.started))
+        for result in report.results:
+            if result.ok:
+                log.write(f"{stamp},000 - INFO - [{result.name}] VLAN switch completed successfully\n")
+            else:
+                log.write(f"{stamp},000 - ERROR - [{result.name}] Error switching VLAN: {result.error}\n")
+        advance(switches, report)
+        # The writer thread would flush about every tick at a one-minute interval
+        begin = time.perf_counter()
+        writer.flush(store)
+        write_time += time.perf_counter() - begin
+    return queue_times, write_time
+
+
+def time_query(query, repeat=20):
+    best = float('inf')
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        query()
+        best = min(best, time.perf_counter() - begin)
+    return best
+
+
+def scan_log(path, device):
+    """Last success of device, found by reading the log from the start"""
+    pattern = re.compile(rf"^(\S+ \S+),\d+ - INFO - \[{re.escape(device)}\] VLAN switch completed")
+    last = None
+    with open(path, 'r') as f:
+        for line in f:
+            match = pattern.match(line)
+            if match:
+                last = match.group(1)
+    return last
+
+
+def queries(store, log_file, device, port, now, window):
+    return {
+        'switch attempts': time_query(lambda: store.attempts(device, limit=50)),
+        'port history': time_query(lambda: store.port_history(device, port, 50)),
+        'last success per switch': time_query(lambda: store.devices(), repeat=5),
+        'summary, recent ticks': time_query(lambda: store.summary(now - window), repeat=5),
+        'log scan, last success': time_query(lambda: scan_log(log_file, device), repeat=3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Switch history benchmark')
+    parser.add_argument('--switches', type=int, default=200)
+    parser.add_argument('--ports', type=int, default=48)
+    parser.add_argument('--ticks', type=int, default=200)
+    parser.add_argument('--growth', type=float, default=3.0)
+    parser.add_argument('--floor', type=float, default=1.0, help='Milliseconds below which growth is noise')
+    parser.add_argument('--tick-budget', type=float, default=5.0, help='Milliseconds to queue one tick')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    switches = build_switches(args.switches, args.ports)
+    small_ticks = max(1, args.ticks // 10)
+    device = switches[len(switches) // 2]["name"]
+    port = switches[0]["port_groups"][0]["ports"][-1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "history.sqlite3"
+        log_file = Path(tmp) / "vlan_switcher.log"
+        # Synthetic ticks are old; keep them all
+        writer = HistoryWriter(path, retention_days=0)
+        store = HistoryStore(path)
+        reader = HistoryStore(path, readonly=True)
+        results = {}
+        queue_times = []
+        write_time = 0.0
+        with open(log_file, 'w') as log:
+            for label, ticks, start_tick in (('small', small_ticks, 0), ('large', args.ticks - small_ticks, small_ticks)):
+                times, seconds = fill(writer, store, switches, ticks, start_tick, log, rng)
+                queue_times += times
+                write_time += seconds
+                log.flush()
+                now = 1_700_000_000 + (start_tick + ticks) * 60
+                # The summary covers as many ticks at both sizes
+                results[label] = queries(reader, log_file, device, port, now, small_ticks * 60)
+                results[label]['_size'] = (start_tick + ticks) * args.switches
+        rows = sum(store.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                   for table in ('attempts', 'port_changes'))
+        size_mb = path.stat().st_size / 1e6
+        reader.close()
+        store.close()
+
+    queue_ms = max(queue_times) * 1000
+    print(f"{args.switches} switches x {args.ports} ports, {args.ticks} ticks: {rows:,} rows, {size_mb:.0f} MB")
+    print(f"queue a tick (tick thread): max {queue_ms:.2f} ms; "
+          f"batched write: {rows / write_time:,.0f} rows/s, {write_time / args.ticks * 1000:.1f} ms per tick")
+    small, large = results['small'], results['large']
+    print(f"{'query':<26} {small['_size']:>10,} {'attempts':<9} {large['_size']:>10,} {'attempts':<9} {'growth':>7}")
+    failures = []
+    for name in small:
+        if name.startswith('_'):
+            continue
+        growth = large[name] / small[name]
+        print(f"{name:<26} {small[name] * 1000:>16.2f} ms {large[name] * 1000:>16.2f} ms {growth:>6.1f}x")
+        if not name.startswith('log') and growth > args.growth and large[name] * 1000 > args.floor:
+            failures.append(f"{name} grew {growth:.1f}x")
+    if queue_ms > args.tick_budget:
+        failures.append(f"queuing a tick took {queue_ms:.2f} ms (budget {args.tick_budget:g} ms)")
+    if failures:
+        print(f"FAIL: {'; '.join(failures)}")
+        sys.exit(1)
+    speedup = large['log scan, last success'] / large['switch attempts']
+    print(f"OK: indexed queries stay flat; a switch's history is {speedup:,.0f}x faster than scanning the log")
+
+
+if __name__ == '__main__':
+    main()
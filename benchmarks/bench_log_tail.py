@@ -0,0 +1,111 @@
+"""
+Per-refresh cost of the GUI's log reading as vlan_switcher.log grows.
+
+Builds synthetic logs of increasing size (sparse files: only the last
+--real-mb megabytes hold log lines) and times one dashboard refresh:
+the old way (three full readlines() passes) and LogTailer (one poll
+after the service appended a line). The old way is only timed up to
+--legacy-max-mb, since it loads the whole file into memory.
+
+    python benchmarks/bench_log_tail.py --sizes-mb 1 16 128 1024
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from log_tail import LogTailer
+
+
+def log_line(i):
+    stamp = datetime.datetime(2025, 6, 19) + datetime.timedelta(seconds=i)
+    if i % 10 == 0:
+        message = f"[lab-a] Switching to VLAN {10 + i % 7} on interface GigabitEthernet1/0/10"
+    else:
+        message = f"[lab-a] VLAN switch completed successfully ({i})"
+    return f"{stamp:%Y-%m-%d %H:%M:%S},123 - INFO - {message}\n"
+
+
+def build_log(path, size, real_bytes):
+    """A size-byte log whose last real_bytes are log lines"""
+    real = min(size, real_bytes)
+    lines = []
+    written = 0
+    i = 0
+    while written < real:
+        line = log_line(i)
+        lines.append(line)
+        written += len(line)
+        i += 1
+    with open(path, 'wb') as f:
+        f.truncate(size - written if size > written else 0)
+        f.seek(0, os.SEEK_END)
+        f.write("".join(lines).encode())
+    return i
+
+
+def legacy_refresh(path):
+    """What the three GUI methods used to do every 2 seconds"""
+    for _ in range(3):
+        with open(path, 'r', errors='replace') as f:
+            lines = f.readlines()
+        for line in reversed(lines[-100:]):
+            if "Switching to VLAN" in line:
+                break
+
+
+def time_tailer(path, refreshes, next_line):
+    tailer = LogTailer(path)
+    start = time.perf_counter()
+    tailer.poll()
+    seed = time.perf_counter() - start
+    total = 0.0
+    with open(path, 'a') as f:
+        for i in range(refreshes):
+            f.write(log_line(next_line + i))
+            f.flush()
+            start = time.perf_counter()
+            tailer.poll()
+            list(tailer.recent_lines)
+            total += time.perf_counter() - start
+    return seed, total / refreshes, tailer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Log tailing benchmark')
+    parser.add_argument('--sizes-mb', type=int, nargs='+', default=[1, 16, 128, 1024])
+    parser.add_argument('--real-mb', type=int, default=64)
+    parser.add_argument('--legacy-max-mb', type=int, default=128)
+    parser.add_argument('--refreshes', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'log size':>9} {'old refresh (ms)':>17} {'tailer seed (ms)':>17} {'tailer refresh (ms)':>20}")
+    for size_mb in args.sizes_mb:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "vlan_switcher.log"
+            lines = build_log(path, size_mb * 1024 * 1024, args.real_mb * 1024 * 1024)
+
+            legacy = "skipped"
+            if size_mb <= args.legacy_max_mb:
+                start = time.perf_counter()
+                legacy_refresh(path)
+                legacy = f"{(time.perf_counter() - start) * 1000:.3f}"
+
+            seed, refresh, tailer = time_tailer(path, args.refreshes, lines)
+            last = log_line(lines + args.refreshes - 1).rstrip('\n')
+            if tailer.recent_lines[-1] != last or len(tailer.recent_lines) != tailer.max_lines:
+                print(f"FAIL: tailer lost track of the log at {size_mb} MB")
+                sys.exit(1)
+
+        print(f"{size_mb:>6} MB {legacy:>17} {seed * 1000:>17.3f} {refresh * 1000:>20.4f}")
+
+
+if __name__ == '__main__':
+    main()
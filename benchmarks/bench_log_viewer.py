@@ -0,0 +1,214 @@
+"""
+Log viewer: indexing, scrolling, jumping and filtering a large log.
+
+Writes a --size-mb log in the service's format, with one line every
+quarter second spread over --devices switches, then times what the
+GUI's log viewer does with it: building the sparse index, fetching a
+screenful of rows at random places, jumping to a time, and filtering by
+switch, by level and by text. It compares this with reading the whole
+file the way the dashboard used to (only up to --legacy-max-mb):
+
+    python benchmarks/bench_log_viewer.py --size-mb 256
+    python benchmarks/bench_log_viewer.py --size-mb 2048 --keep /tmp/big.log
+
+Every fetched row is checked against the line that was written there.
+Exits non-zero on a wrong row, if a screenful takes longer than
+--page-ms at the 99th percentile, or if one indexing or filtering step
+blocks the GUI for longer than --step-ms.
+"""
+
+import argparse
+import datetime
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from log_index import LogFilter, LogIndex
+from log_viewer import advance
+
+START = datetime.datetime(2025, 6, 19)
+# Eleven, so every switch logs at every level with the default --devices
+LEVELS = ("INFO",) * 8 + ("DEBUG", "WARNING", "ERROR")
+ROWS = 40
+
+
+def log_line(i, devices):
+    stamp = START + datetime.timedelta(seconds=i / 4)
+    level = LEVELS[i % len(LEVELS)]
+    device = f"sw{i % devices}"
+    if level == "ERROR":
+        message = f"[{device}] Failed to switch: connection timed out ({i})"
+    else:
+        message = f"[{device}] Switching to VLAN {100 + i % 7} on interface GigabitEthernet1/0/{i % 48 + 1} ({i})"
+    return f"{stamp:%Y-%m-%d %H:%M:%S},{stamp.microsecond // 1000:03d} - {level} - {message}"
+
+
+def build_log(path, size, devices):
+    """Write about size bytes of log lines; returns the line count"""
+    written = 0
+    i = 0
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        while written < size:
+            chunk = "".join(log_line(j, devices) + "\n" for j in range(i, i + 10000))
+            f.write(chunk)
+            written += len(chunk)
+            i += 10000
+    return i
+
+
+def timed(calls):
+    """Milliseconds of each call"""
+    times = []
+    for call in calls:
+        begin = time.perf_counter()
+        call()
+        times.append((time.perf_counter() - begin) * 1000)
+    return sorted(times)
+
+
+def p99(times):
+    return times[min(len(times) - 1, int(len(times) * 0.99))]
+
+
+def steps(step, done):
+    """Call step() until done(), as the viewer does between redraws; ms of each call"""
+    times = []
+    while not done():
+        begin = time.perf_counter()
+        step()
+        times.append((time.perf_counter() - begin) * 1000)
+    return times or [0.0]
+
+
+def build_index(path):
+    """Index the file in viewer-sized steps; returns the index and the slowest step in ms"""
+    index = LogIndex(path)
+    times = steps(lambda: advance(index, index), lambda: index.done)
+    return index, max(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Log viewer benchmark')
+    parser.add_argument('--size-mb', type=int, default=256)
+    parser.add_argument('--devices', type=int, default=50)
+    parser.add_argument('--pages', type=int, default=300)
+    parser.add_argument('--legacy-max-mb', type=int, default=256)
+    parser.add_argument('--page-ms', type=float, default=50.0)
+    parser.add_argument('--step-ms', type=float, default=50.0)
+    parser.add_argument('--keep', help='Write the log here and keep it (reused if it exists)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    path = args.keep or os.path.join(tempfile.mkdtemp(), "vlan_switcher.log")
+    failures = []
+    try:
+        if not (args.keep and os.path.exists(path)):
+            begin = time.perf_counter()
+            build_log(path, args.size_mb * 1024 * 1024, args.devices)
+            print(f"wrote {os.path.getsize(path) / 1e6:,.0f} MB in {time.perf_counter() - begin:.1f}s")
+        size = os.path.getsize(path)
+
+        begin = time.perf_counter()
+        index, slowest = build_index(path)
+        elapsed = time.perf_counter() - begin
+        tracemalloc.start()
+        build_index(path)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        checkpoints = len(index.offsets)
+        print(f"index: {index.count:,} lines in {elapsed:.2f}s ({size / elapsed / 1e6:,.0f} MB/s), "
+              f"{checkpoints:,} checkpoints ({checkpoints * 24 / 1024:,.0f} KB), "
+              f"peak memory {peak / 1e6:.1f} MB, slowest step {slowest:.0f} ms")
+        if slowest > args.step_ms:
+            failures.append(f"an indexing step took {slowest:.0f} ms")
+
+        def check(rows, numbers, what):
+            expected = [log_line(i, args.devices) for i in numbers]
+            if rows != expected[:len(rows)] or len(rows) != len(expected):
+                failures.append(f"{what}: wrong rows at line {numbers[0]}")
+
+        print(f"{'operation':<34} {'p50 ms':>8} {'p99 ms':>8}")
+        tops = [rng.randrange(max(1, index.count - ROWS)) for _ in range(args.pages)]
+        times = timed(lambda top=top: check(index.rows(top, ROWS), range(top, top + ROWS), "scroll")
+                      for top in tops)
+        print(f"{'screenful at a random line':<34} {statistics.median(times):>8.2f} {p99(times):>8.2f}")
+        if p99(times) > args.page_ms:
+            failures.append(f"a screenful took {p99(times):.1f} ms at p99")
+
+        def jump(line):
+            # Four lines share each second; the first of them is wanted
+            when = (START + datetime.timedelta(seconds=line // 4)).timestamp()
+            first = line - line % 4
+            found = index.line_at(when)
+            if found != first:
+                failures.append(f"jump to line {line}'s time found line {found}, not {first}")
+            index.rows(found, ROWS)
+
+        times = timed(lambda line=line: jump(line) for line in tops)
+        print(f"{'jump to a time':<34} {statistics.median(times):>8.2f} {p99(times):>8.2f}")
+
+        device = args.devices // 2
+        filters = [
+            (f"switch sw{device}", {"device": f"sw{device}"},
+             lambda i: i % args.devices == device),
+            ("level ERROR", {"levels": ["ERROR", "CRITICAL"]}, lambda i: LEVELS[i % len(LEVELS)] == "ERROR"),
+            ("text 'TIMED OUT'", {"text": "TIMED OUT"}, lambda i: LEVELS[i % len(LEVELS)] == "ERROR"),
+            (f"ERROR on sw{device}", {"device": f"sw{device}", "levels": ["ERROR", "CRITICAL"]},
+             lambda i: i % args.devices == device and LEVELS[i % len(LEVELS)] == "ERROR"),
+        ]
+        print(f"{'filter':<34} {'scan s':>8} {'MB/s':>8} {'step ms':>8} {'matches':>10} {'page p99':>9}")
+        for label, options, wanted in filters:
+            flt = LogFilter(index, **options)
+            times = steps(lambda: advance(index, flt), lambda: flt.done)
+            slowest, total = max(times), sum(times)
+            # Which lines match repeats every period lines
+            period = math.lcm(args.devices, len(LEVELS))
+            offsets = [k for k in range(period) if wanted(k)]
+            if not offsets:
+                print(f"{label:<34} no such lines with --devices {args.devices}")
+                continue
+            numbers = lambda m: (m // len(offsets)) * period + offsets[m % len(offsets)]
+            starts = [rng.randrange(max(1, flt.count - ROWS)) for _ in range(args.pages // 3)]
+            times = timed(lambda m=m: check(flt.rows(m, ROWS), [numbers(k) for k in range(m, m + ROWS)], label)
+                          for m in starts)
+            print(f"{label:<34} {total / 1000:>8.2f} {size / total / 1000:>8,.0f} {slowest:>8.0f} "
+                  f"{flt.count:>10,} {p99(times):>8.2f}")
+            if slowest > args.step_ms:
+                failures.append(f"a {label} filter step took {slowest:.0f} ms")
+            if p99(times) > args.page_ms:
+                failures.append(f"a filtered screenful took {p99(times):.1f} ms at p99")
+
+        if size <= args.legacy_max_mb * 1024 * 1024:
+            begin = time.perf_counter()
+            with open(path, 'r', errors='replace') as f:
+                lines = f.readlines()
+            legacy = time.perf_counter() - begin
+            held = sys.getsizeof(lines) + sum(map(sys.getsizeof, lines))
+            del lines
+            print(f"whole file read into memory: {legacy:.2f}s, holding {held / 1e6:,.0f} MB")
+        else:
+            print(f"whole file read into memory: skipped above {args.legacy_max_mb} MB")
+    finally:
+        if not args.keep:
+            os.remove(path)
+            os.rmdir(os.path.dirname(path))
+
+    if failures:
+        print(f"FAIL: {'; '.join(failures[:5])}")
+        sys.exit(1)
+    print(f"OK: rows, jumps and filters are right; p99 screenful under {args.page_ms:g} ms "
+          f"and no step over {args.step_ms:g} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Tick latency with logging off, with the old synchronous handlers and
+with the queue-based LogPipeline.
+
+Runs FleetEngine ticks against simulated switches that answer
+instantly with --output-kb of device output each, so the time measured
+is the engine plus logging. Also times the old eager
+logger.debug(f"... {output}") against the lazy form with DEBUG off:
+
+    python benchmarks/bench_logging.py --switches 200 --ticks 50
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_fleet import SimulatedPool, build_config
+from fleet import FleetEngine, load_switches
+from log_pipeline import LOG_FORMAT, LogPipeline, Truncated
+
+
+class ChattyConnection:
+    def __init__(self, output):
+        self.output = output
+
+    def send_config_set(self, commands, error_pattern=None):
+        return self.output
+
+
+class ChattyPool(SimulatedPool):
+    def __init__(self, output):
+        super().__init__(0)
+        self.output = output
+
+    def run(self, device, func, phases=None, counters=None, login=None):
+        return func(ChattyConnection(self.output))
+
+
+def reset_root():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    logging.disable(logging.NOTSET)
+
+
+def run_ticks(args, output):
+    switches = load_switches(build_config(args.switches))
+    engine = FleetEngine(ChattyPool(output), max_workers=args.workers, switch_timeout=30)
+    durations = []
+    for _ in range(args.ticks):
+        start = time.perf_counter()
+        engine.run_tick(switches)
+        durations.append(time.perf_counter() - start)
+    engine.shutdown()
+    durations.sort()
+    return statistics.median(durations), durations[int(len(durations) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Logging overhead benchmark')
+    parser.add_argument('--switches', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--ticks', type=int, default=50)
+    parser.add_argument('--output-kb', type=int, default=64)
+    parser.add_argument('--level', default='INFO', help='Log level while measuring')
+    args = parser.parse_args()
+
+    output = "Switch(config-if)#switchport access vlan 100\n" * (args.output_kb * 1024 // 46)
+    level = args.level.upper()
+    devnull = open(os.devnull, 'w')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = []
+
+        reset_root()
+        logging.disable(logging.CRITICAL)
+        results.append(("off", run_ticks(args, output)))
+
+        reset_root()
+        logging.basicConfig(level=level, format=LOG_FORMAT, handlers=[
+            logging.FileHandler(Path(tmp) / "sync.log"), logging.StreamHandler(devnull)])
+        results.append(("synchronous handlers", run_ticks(args, output)))
+
+        reset_root()
+        pipeline = LogPipeline(Path(tmp) / "pipeline.log", level=level, console=False).start()
+        pipeline.listener.handlers += (logging.StreamHandler(devnull),)
+        results.append(("queue pipeline", run_ticks(args, output)))
+        pipeline.stop()
+        reset_root()
+
+    print(f"{args.switches} switches, {args.workers} workers, level {level}, {args.output_kb} KB output per switch")
+    print(f"{'logging':<22} {'p50 tick (ms)':>14} {'p95 tick (ms)':>14}")
+    for name, (p50, p95) in results:
+        print(f"{name:<22} {p50 * 1000:>14.2f} {p95 * 1000:>14.2f}")
+
+    logger = logging.getLogger("bench")
+    logger.setLevel(logging.INFO)
+    count = 2000
+    start = time.perf_counter()
+    for _ in range(count):
+        logger.debug(f"[sw0] Switch output: {output}")
+    eager = (time.perf_counter() - start) / count
+    start = time.perf_counter()
+    for _ in range(count):
+        logger.debug("[%s] Switch output: %s", "sw0", Truncated(output))
+    lazy = (time.perf_counter() - start) / count
+    print(f"debug call with DEBUG off: eager f-string {eager * 1e6:.2f} us, lazy {lazy * 1e6:.2f} us")
+
+
+if __name__ == '__main__':
+    main()
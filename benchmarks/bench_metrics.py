@@ -0,0 +1,135 @@
+"""
+Overhead of the latency metrics against the budget stated in metrics.py.
+
+Times folding a tick into the histograms per switch (done by the
+TextfileWriter thread), then runs FleetEngine ticks against simulated
+switches with --latency-ms of network time each, once bare and once
+with the service's per-tick metrics work (record_tick, asking the
+TextfileWriter for a rewrite, taking its summary for the status file). Ticks are --gap seconds apart, as the service's are
+minutes apart, so the background rewrite of one tick does not overlap
+the next:
+
+    python benchmarks/bench_metrics.py --switches 200 --ticks 20
+
+Exits non-zero when folding costs more than 20 us per switch or the
+metrics work on the tick's thread takes more than 1% of a bare tick.
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_fleet import SimulatedConnection, SimulatedPool, build_config
+from fleet import FleetEngine, SwitchResult, TickReport, load_switches
+from metrics import SWITCH_PHASES, MetricsRegistry, TextfileWriter
+
+PER_SWITCH_BUDGET = 20e-6
+TICK_BUDGET = 0.01
+
+
+class TimedPool(SimulatedPool):
+    """SimulatedPool that reports phase timings like SSHSessionPool"""
+
+    def run(self, device, func, phases=None, counters=None, login=None):
+        time.sleep(self.latency)
+        if phases is not None:
+            share = self.latency / len(SWITCH_PHASES)
+            for phase in SWITCH_PHASES:
+                phases[phase] = share
+        return func(SimulatedConnection())
+
+
+def synthetic_report(size):
+    report = TickReport()
+    for i in range(size):
+        report.results.append(SwitchResult(f"sw{i}", ok=i % 10 != 0, duration=0.05,
+                                           phases={phase: 0.01 for phase in SWITCH_PHASES},
+                                           retries=int(i % 25 == 0)))
+    report.duration = 0.5
+    return report
+
+
+def run_ticks(engine, switches, args, metrics=None, writer=None):
+    """Median tick time and median time of the metrics work in it"""
+    durations = []
+    metric_times = [0.0]
+    for _ in range(args.ticks):
+        time.sleep(args.gap)
+        start = time.perf_counter()
+        report = engine.run_tick(switches)
+        if metrics is not None:
+            metrics_start = time.perf_counter()
+            metrics.record_tick(report, {"switch": report.duration})
+            writer.request()
+            writer.summary
+            metric_times.append(time.perf_counter() - metrics_start)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations), statistics.median(metric_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Metrics overhead benchmark')
+    parser.add_argument('--switches', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=200)
+    parser.add_argument('--ticks', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=200)
+    parser.add_argument('--gap', type=float, default=0.5, help='Idle seconds between ticks')
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    registry = MetricsRegistry()
+    report = synthetic_report(args.switches)
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        registry.record_tick(report, {"credentials": 0.001, "switch": 0.5, "persist": 0.002})
+        registry.summary()
+    per_switch = (time.perf_counter() - start) / (args.repeat * args.switches)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        registry.write_textfile(Path(tmp) / "metrics.prom")
+        write = time.perf_counter() - start
+        size = (Path(tmp) / "metrics.prom").stat().st_size
+    start = time.perf_counter()
+    registry.summary()
+    summary = time.perf_counter() - start
+
+    switches = load_switches(build_config(args.switches))
+    engine = FleetEngine(TimedPool(args.latency_ms / 1000), max_workers=args.workers, switch_timeout=30)
+    with tempfile.TemporaryDirectory() as tmp:
+        bare, _ = run_ticks(engine, switches, args)
+        metrics = MetricsRegistry()
+        writer = TextfileWriter(metrics, Path(tmp) / "metrics.prom").start()
+        instrumented, metrics_time = run_ticks(engine, switches, args, metrics, writer)
+        writer.stop()
+    engine.shutdown()
+    overhead = metrics_time / bare
+
+    print(f"{args.switches} switches, {args.latency_ms:g} ms simulated latency, {args.workers} workers")
+    print(f"fold per switch:            {per_switch * 1e6:10.2f} us (budget {PER_SWITCH_BUDGET * 1e6:g} us)")
+    print(f"textfile write ({size // 1024} KB):   {write * 1000:10.2f} ms (background thread)")
+    print(f"summary:                    {summary * 1000:10.2f} ms")
+    print(f"p50 tick without metrics:   {bare * 1000:10.2f} ms")
+    print(f"p50 tick with metrics:      {instrumented * 1000:10.2f} ms")
+    print(f"p50 metrics work per tick:  {metrics_time * 1000:10.2f} ms ({overhead:.2%} of a tick, "
+          f"budget {TICK_BUDGET:.0%})")
+
+    failures = []
+    if per_switch > PER_SWITCH_BUDGET:
+        failures.append("fold per switch")
+    if overhead > TICK_BUDGET:
+        failures.append("tick overhead")
+    if failures:
+        print(f"FAIL: over budget: {', '.join(failures)}")
+        sys.exit(1)
+    print("OK: metrics within budget")
+
+
+if __name__ == '__main__':
+    main()
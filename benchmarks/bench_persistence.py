@@ -0,0 +1,90 @@
+"""
+Per-tick cost of persisting rotation state as the fleet grows.
+
+Compares the old approach (re-read config.json, update every switch's
+VLAN order, rewrite the whole file with indent=4; keyring lookups not
+included) with appending to the rotation state journal:
+
+    python benchmarks/bench_persistence.py --sizes 1 10 100 1000
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fleet import TickReport, SwitchResult, load_switches, record_rotation, rotate_switch
+from state_journal import RotationJournal
+
+
+def build_config(size):
+    return {
+        "username": "admin",
+        "password": "admin",
+        "schedule_minutes": 1,
+        "vlans": [str(vlan) for vlan in range(100, 126)],
+        "interfaces": ["Gi1/0/1-24"],
+        "switches": [{"name": f"sw{i}", "switch_ip": f"10.0.{i // 250}.{i % 250 + 1}",
+                      "vlans": [str(vlan) for vlan in range(100, 126)]} for i in range(size)],
+    }
+
+
+def rewrite_config(config_file, switches):
+    """What save_vlan_order used to do every tick"""
+    with open(config_file, 'r') as f:
+        config = json.load(f)
+    for switch in switches:
+        group = switch["port_groups"][0]
+        vlans = list(group["vlans"])
+        config["switches"][switch["index"]]["vlans"] = vlans[group["cursor"]:] + vlans[:group["cursor"]]
+    with open(config_file, 'w') as f:
+        json.dump(config, f, indent=4)
+
+
+def tick_report(switches):
+    report = TickReport()
+    for switch in switches:
+        vlans, _ = rotate_switch(switch)
+        report.results.append(SwitchResult(switch["name"], vlans, True))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rotation persistence benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--ticks', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'switches':>8} {'rewrite config (ms)':>20} {'journal (ms)':>14}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            config = build_config(size)
+            config_file = Path(tmp) / "config.json"
+            with open(config_file, 'w') as f:
+                json.dump(config, f, indent=4)
+            switches = load_switches(config)
+            journal = RotationJournal(Path(tmp) / "state" / "rotation")
+
+            reports = [tick_report(switches) for _ in range(args.ticks)]
+
+            start = time.perf_counter()
+            for _ in reports:
+                rewrite_config(config_file, switches)
+            rewrite = (time.perf_counter() - start) / args.ticks
+
+            start = time.perf_counter()
+            for report in reports:
+                record_rotation(journal, switches, report)
+            journaled = (time.perf_counter() - start) / args.ticks
+            journal.close()
+
+        print(f"{size:>8} {rewrite * 1000:>20.3f} {journaled * 1000:>14.3f}")
+
+
+if __name__ == '__main__':
+    main()
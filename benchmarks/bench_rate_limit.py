@@ -0,0 +1,168 @@
+"""
+Cold-start logins against a throttled AAA server, with and without the rate limiter.
+
+Every simulated switch authenticates against one shared AAA server that
+rejects logins beyond --aaa-capacity per second, like a TACACS+ server
+under a login storm. A cold tick (no pooled sessions) runs first with
+the limiter off and then with a login rate below that capacity:
+
+    python benchmarks/bench_rate_limit.py --switches 60 --aaa-capacity 20
+    python benchmarks/bench_rate_limit.py --engine threads
+
+Then --small switches in their own AAA group, listed last, must not wait
+behind the large group, and with every switch listed twice the threads
+engine must never open more than one session on a device at once.
+
+Exits non-zero if the limited tick has authentication failures, the
+small group waits longer than the large group's median, or a device
+sees concurrent sessions.
+"""
+
+import argparse
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_ios_async import AAAThrottle, FakeFleet
+from fleet import create_engine, load_switches
+from session_pool import SSHSessionPool
+
+
+def build_config(servers, engine, limits, small=0, twice=False):
+    switches = []
+    for i, server in enumerate(servers):
+        switch = {"name": server.hostname, "switch_ip": server.host, "port": server.port,
+                  "aaa_group": "small" if i >= len(servers) - small else "large"}
+        switches.append(switch)
+        if twice:
+            switches.append(dict(switch, name=f"{server.hostname}-again"))
+    config = {
+        "username": "admin",
+        "password": "admin",
+        "enable_password": "enable",
+        "vlans": ["100", "200"],
+        "interfaces": ["Gi1/0/1-4"],
+        "engine": engine,
+        "max_workers": 200 if engine == "async" else 32,
+        "switch_timeout": 60,
+        "circuit_breaker": False,
+        "switches": switches,
+    }
+    config.update(limits)
+    return config
+
+
+def cold_tick(servers, aaa, engine, limits, **options):
+    """Run one tick with no pooled sessions; returns the report, AAA rejections and the switches"""
+    config = build_config(servers, engine, limits, **options)
+    switches = load_switches(config)
+    pool = SSHSessionPool()
+    engine = create_engine(config, pool)
+    rejected = aaa.rejected
+    try:
+        report = engine.run_tick(switches)
+    finally:
+        engine.shutdown()
+        pool.close_all()
+    # Let the sessions end and the AAA server's one-second window pass
+    time.sleep(1.5)
+    return report, aaa.rejected - rejected, switches
+
+
+def queue_waits(results):
+    return sorted(result.phases.get('queue', 0.0) for result in results)
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rate limiter benchmark')
+    parser.add_argument('--switches', type=int, default=60)
+    parser.add_argument('--small', type=int, default=4, help='Switches in the small AAA group')
+    parser.add_argument('--aaa-capacity', type=float, default=20.0, help='Logins per second the AAA server accepts')
+    parser.add_argument('--engine', choices=['threads', 'async'], default='async')
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, 8 * args.switches + 256)), hard))
+
+    aaa = AAAThrottle(args.aaa_capacity)
+    fleet = FakeFleet(args.switches, ports="Gi1/0/1-4", aaa=aaa).start()
+    # A bucket lets burst + rate logins through in any one second
+    rate = args.aaa_capacity * 0.45
+    failures = []
+    try:
+        print(f"{args.switches} switches, AAA accepts {args.aaa_capacity:g} logins/s, {args.engine} engine")
+        print(f"{'cold tick':<28} {'duration':>9} {'ok':>5} {'failed':>7} {'rejected':>9} "
+              f"{'queue p50':>10} {'queue p95':>10}")
+        runs = [
+            ("no limiter", {"rate_limit": False}, {}),
+            (f"login_rate {rate:g}/s", {"login_rate": rate, "login_burst": rate, "rate_limit_wait": 60}, {}),
+            ("per AAA group", {"login_rate": rate, "login_burst": rate, "rate_limit_wait": 60,
+                               "aaa_groups": {"large": {"login_rate": rate}, "small": {"login_rate": rate}}},
+             {"small": args.small}),
+        ]
+        reports = {}
+        for label, limits, options in runs:
+            report, rejected, _ = cold_tick(fleet.servers, aaa, args.engine, limits, **options)
+            reports[label] = report
+            waits = queue_waits(report.results)
+            print(f"{label:<28} {report.duration:>8.2f}s {len(report.succeeded):>5} {len(report.failed):>7} "
+                  f"{rejected:>9} {percentile(waits, 0.5) * 1000:>8.0f}ms {percentile(waits, 0.95) * 1000:>8.0f}ms")
+            if limits.get("rate_limit", True) and (report.failed or rejected):
+                failures.append(f"{label}: {len(report.failed)} switch(es) failed, {rejected} login(s) rejected")
+
+        grouped = reports["per AAA group"].results
+        small = queue_waits(r for r in grouped if r.name in {s.hostname for s in fleet.servers[-args.small:]})
+        large = queue_waits(r for r in grouped if r.name not in {s.hostname for s in fleet.servers[-args.small:]})
+        print(f"small group waited at most {max(small, default=0) * 1000:.0f} ms, "
+              f"large group median {statistics.median(large or [0]) * 1000:.0f} ms")
+        if small and large and max(small) > statistics.median(large):
+            failures.append("the small AAA group waited behind the large one")
+
+        # Every switch listed twice: both entries want the same device at once
+        aaa.rate = float('inf')
+        for server in fleet.servers:
+            server.peak = 0
+        print(f"{'every switch twice':<28} {'duration':>9} {'ok':>5} {'failed':>7} {'peak sessions':>14}")
+        for label, limits in (("no limiter", {"rate_limit": False}),
+                              ("max_sessions_per_device 1", {"rate_limit_wait": 60})):
+            report, _, _ = cold_tick(fleet.servers, aaa, "threads", limits, twice=True)
+            peak = max(server.peak for server in fleet.servers)
+            print(f"{label:<28} {report.duration:>8.2f}s {len(report.succeeded):>5} {len(report.failed):>7} "
+                  f"{peak:>14}")
+            if limits.get("rate_limit", True) and peak > 1:
+                failures.append(f"{peak} concurrent sessions on one device")
+            for server in fleet.servers:
+                server.peak = 0
+
+        # Too few login tokens for everyone: the rest are skipped and keep their turn
+        limits = {"login_rate": 2, "login_burst": 1, "rate_limit_wait": 0.2}
+        for engine in ("threads", "async"):
+            report, _, switches = cold_tick(fleet.servers, aaa, engine, limits)
+            skipped = [r for r in report.results if r.skipped]
+            cursors = {switch["name"]: switch["port_groups"][0]["cursor"] for switch in switches}
+            moved = [r.name for r in skipped if cursors[r.name] != 0]
+            print(f"rate limited, {engine:<7} {len(report.succeeded):>3} switched, {len(skipped):>3} skipped, "
+                  f"{len(moved)} of them rotated anyway")
+            if not skipped or moved:
+                failures.append(f"{engine}: {len(moved)} rate-limited switch(es) used up a rotation step")
+    finally:
+        fleet.stop()
+
+    if failures:
+        print(f"FAIL: {'; '.join(failures)}")
+        sys.exit(1)
+    print("OK: no AAA rejections with the limiter, small groups are not starved, one session per device, "
+          "skipped switches keep their turn")
+
+
+if __name__ == '__main__':
+    main()
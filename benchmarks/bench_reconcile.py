@@ -0,0 +1,145 @@
+"""
+Config writes and tick latency with and without reconciliation.
+
+Each simulated switch has a "users" group rotating through three VLANs
+and a "printers" group that stays on one VLAN, the case where blind
+pushes rewrite ports that are already right. The same ticks are run
+with blind pushes and with reconciliation, counting the port VLAN
+writes the fake switches receive. Then a port is moved by hand on one
+switch and the next tick must report it as drift and put it back:
+
+    python benchmarks/bench_reconcile.py --switches 20 --ticks 6
+    python benchmarks/bench_reconcile.py --engine async --command switchport
+"""
+
+import argparse
+import statistics
+import sys
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_ios_async import FakeFleet
+from fleet import create_engine, load_switches
+from session_pool import SSHSessionPool
+
+
+class CountingState(dict):
+    """Port -> VLAN map of a fake switch that counts VLAN writes"""
+
+    writes = 0
+
+    def __setitem__(self, port, vlan):
+        CountingState.writes += 1
+        super().__setitem__(port, vlan)
+
+
+def build_config(servers, args, reconcile):
+    return {
+        "username": "admin",
+        "password": "admin",
+        "enable_password": "enable",
+        "engine": args.engine,
+        "max_workers": 64,
+        "reconcile": reconcile,
+        "reconcile_command": args.command,
+        "switches": [{
+            "name": server.hostname,
+            "switch_ip": server.host,
+            "port": server.port,
+            "port_groups": [
+                {"name": "users", "interfaces": ["Gi1/0/1-24"], "vlans": ["100", "200", "300"]},
+                {"name": "printers", "interfaces": ["Gi1/0/25-48"], "vlans": ["50"]},
+            ],
+        } for server in servers],
+    }
+
+
+def wrong_ports(fleet, switches, report):
+    servers = {server.hostname: server for server in fleet.servers}
+    wrong = 0
+    for result in report.succeeded:
+        switch = next(s for s in switches if s["name"] == result.name)
+        state = servers[result.name].device_state
+        for group in switch["port_groups"]:
+            wrong += sum(1 for port in group["ports"] if state.get(port) != result.vlans[group["name"]])
+    return wrong
+
+
+def run(args, reconcile):
+    fleet = FakeFleet(args.switches, ports=['Gi1/0/1-48']).start()
+    try:
+        for server in fleet.servers:
+            server.device_state = CountingState(server.device_state)
+        CountingState.writes = 0
+        config = build_config(fleet.servers, args, reconcile)
+        switches = load_switches(config)
+        pool = SSHSessionPool()
+        engine = create_engine(config, pool)
+        durations = []
+        wrong = 0
+        failed = 0
+        for _ in range(args.ticks):
+            report = engine.run_tick(switches)
+            durations.append(report.duration)
+            wrong += wrong_ports(fleet, switches, report)
+            failed += len(report.failed)
+        writes = CountingState.writes
+
+        # Somebody moves a printer port by hand
+        state = fleet.servers[0].device_state
+        dict.__setitem__(state, "GigabitEthernet1/0/30", "999")
+        report = engine.run_tick(switches)
+        drift = next(r for r in report.results if r.name == fleet.servers[0].hostname).drift
+        repaired = state["GigabitEthernet1/0/30"] == "50"
+        engine.shutdown()
+        pool.close_all()
+    finally:
+        fleet.stop()
+    return {
+        'writes': writes,
+        'p50': statistics.median(durations[1:] or durations),
+        'wrong': wrong,
+        'failed': failed,
+        'drift': drift,
+        'repaired': repaired,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconciliation benchmark')
+    parser.add_argument('--switches', type=int, default=20)
+    parser.add_argument('--ticks', type=int, default=6)
+    parser.add_argument('--engine', default='threads', choices=['threads', 'async'])
+    parser.add_argument('--command', default='status', choices=['status', 'switchport'])
+    args = parser.parse_args()
+
+    blind = run(args, False)
+    reconciled = run(args, True)
+
+    print(f"{args.switches} switches x 48 ports, {args.ticks} ticks, {args.engine} engine, "
+          f"show interfaces {args.command}")
+    print(f"{'mode':<12} {'port writes':>12} {'p50 tick ms':>12} {'wrong ports':>12} {'failed':>7}")
+    for name, result in (("blind", blind), ("reconcile", reconciled)):
+        print(f"{name:<12} {result['writes']:>12} {result['p50'] * 1000:>12.1f} {result['wrong']:>12} "
+              f"{result['failed']:>7}")
+    print(f"hand-made change: drift reported {reconciled['drift']}, repaired: {reconciled['repaired']}")
+
+    failures = []
+    if reconciled['wrong'] or blind['wrong']:
+        failures.append("ports left on the wrong VLAN")
+    if reconciled['failed'] or blind['failed']:
+        failures.append("switches failed")
+    if reconciled['writes'] >= blind['writes']:
+        failures.append("reconciliation did not save writes")
+    if "GigabitEthernet1/0/30" not in reconciled['drift'] or not reconciled['repaired']:
+        failures.append("drift not detected and repaired")
+    if failures:
+        print(f"FAIL: {', '.join(failures)}")
+        sys.exit(1)
+    print(f"OK: {1 - reconciled['writes'] / blind['writes']:.0%} fewer port writes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Drift check for DeadlineScheduler on a simulated clock.
+
+Runs 10,000 virtual ticks where every wake-up oversleeps a little and
+every job takes a random amount of time, and compares the fire times
+against the ideal grid. The same workload is run through a
+"wait interval after the job finishes" model (what schedule.every()
+does) for contrast. Exits non-zero if the scheduler's error grows.
+
+    python benchmarks/bench_scheduler_drift.py --ticks 10000
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from deadline_scheduler import DeadlineScheduler
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run_deadline(ticks, interval, max_oversleep, max_job, seed):
+    rng = random.Random(seed)
+    clock = VirtualClock()
+    scheduler = DeadlineScheduler(clock=clock)
+    fired = []
+
+    def job():
+        fired.append(clock.now)
+        clock.now += rng.uniform(0, max_job)
+
+    scheduler.every(interval, job, start=0.0)
+
+    def wait_for_stop(timeout):
+        if len(fired) >= ticks:
+            return True
+        clock.now += timeout + rng.uniform(0, max_oversleep)
+        return False
+
+    scheduler.run(wait_for_stop)
+    return [t - (i + 1) * interval for i, t in enumerate(fired)]
+
+
+def run_after_finish(ticks, interval, max_oversleep, max_job, seed):
+    rng = random.Random(seed)
+    now = 0.0
+    errors = []
+    for i in range(ticks):
+        now += interval + rng.uniform(0, max_oversleep)
+        errors.append(now - (i + 1) * interval)
+        now += rng.uniform(0, max_job)
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scheduler drift check')
+    parser.add_argument('--ticks', type=int, default=10000)
+    parser.add_argument('--interval', type=float, default=0.25)
+    parser.add_argument('--max-oversleep', type=float, default=0.002)
+    parser.add_argument('--max-job', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    options = (args.ticks, args.interval, args.max_oversleep, args.max_job, args.seed)
+    deadline = run_deadline(*options)
+    after_finish = run_after_finish(*options)
+
+    window = args.ticks // 10
+    for name, errors in (("deadline", deadline), ("after-finish", after_finish)):
+        first = max(abs(e) for e in errors[:window])
+        last = max(abs(e) for e in errors[-window:])
+        print(f"{name:<13} ticks {len(errors):>6}   max error first 10%: {first * 1000:10.3f} ms   "
+              f"last 10%: {last * 1000:10.3f} ms")
+
+    # A job may start late by at most one oversleep plus the previous job's run time
+    bound = args.max_oversleep + args.max_job
+    worst = max(abs(e) for e in deadline)
+    if len(deadline) != args.ticks or worst > bound:
+        print(f"FAIL: worst deadline error {worst * 1000:.3f} ms exceeds bound {bound * 1000:.3f} ms")
+        sys.exit(1)
+    print(f"OK: worst deadline error {worst * 1000:.3f} ms within bound {bound * 1000:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
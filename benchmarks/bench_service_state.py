@@ -0,0 +1,68 @@
+"""
+UI-thread cost of checking the service state.
+
+Compares spawning a status subprocess on every refresh (what
+check_service_status used to do with `sc query`; `true` stands in for
+it off Windows) with reading the ServiceStateWatcher's cached state,
+and checks that an idle watcher on the fake backend starts no
+subprocesses at all:
+
+    python benchmarks/bench_service_state.py --refreshes 200
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from service_state import RUNNING, FakeBackend, ServiceStateWatcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Service state check benchmark')
+    parser.add_argument('--refreshes', type=int, default=200)
+    parser.add_argument('--idle-seconds', type=float, default=3.0)
+    args = parser.parse_args()
+
+    command = ['sc', 'query', 'SecureVLANSwitcherService'] if sys.platform == 'win32' else ['true']
+    start = time.perf_counter()
+    for _ in range(args.refreshes):
+        subprocess.run(command, capture_output=True, text=True)
+    spawned = (time.perf_counter() - start) / args.refreshes
+
+    spawns = []
+    original_popen = subprocess.Popen
+
+    class CountingPopen(original_popen):
+        def __init__(self, *popenargs, **kwargs):
+            spawns.append(popenargs)
+            super().__init__(*popenargs, **kwargs)
+
+    subprocess.Popen = CountingPopen
+    try:
+        watcher = ServiceStateWatcher(FakeBackend(RUNNING), poll_interval=0.05, max_interval=1.0)
+        watcher.start()
+        start = time.perf_counter()
+        for _ in range(args.refreshes):
+            watcher.state == RUNNING
+        cached = (time.perf_counter() - start) / args.refreshes
+        time.sleep(args.idle_seconds)
+        watcher.stop()
+    finally:
+        subprocess.Popen = original_popen
+
+    print(f"subprocess per refresh: {spawned * 1000:10.3f} ms")
+    print(f"cached state per refresh: {cached * 1000:8.5f} ms")
+    print(f"backend queries in {args.idle_seconds:g}s idle: {watcher.backend.queries}")
+    if spawns:
+        print(f"FAIL: {len(spawns)} subprocess(es) started while idle")
+        sys.exit(1)
+    print("OK: no subprocesses started while idle")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Per-tick latency of a VLAN switch with pooled vs. fresh SSH sessions.
+
+Runs against a local fake IOS SSH server, so no hardware is needed:
+
+    python benchmarks/bench_session_pool.py --ticks 20
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from netmiko import ConnectHandler
+
+from session_pool import SSHSessionPool
+from fake_ios_server import FakeIOSServer
+
+
+def tick_commands(vlan):
+    return [
+        "interface GigabitEthernet0/1",
+        f"switchport access vlan {vlan}",
+        "exit"
+    ]
+
+
+def fresh_tick(device, vlan):
+    """What switch_vlan used to do: connect, enable, push, disconnect"""
+    with ConnectHandler(**device) as connection:
+        connection.enable()
+        connection.send_config_set(tick_commands(vlan))
+
+
+def summarize(name, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{name:<8} mean {statistics.mean(samples) * 1000:8.1f} ms   "
+          f"p50 {statistics.median(samples) * 1000:8.1f} ms   "
+          f"p95 {p95 * 1000:8.1f} ms")
+    return statistics.mean(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pooled vs. fresh session benchmark')
+    parser.add_argument('--ticks', type=int, default=20, help='Ticks per mode')
+    parser.add_argument('--login-delay', type=float, default=0.0,
+                        help='Extra seconds the fake switch spends on each login')
+    args = parser.parse_args()
+
+    server = FakeIOSServer(login_delay=args.login_delay).start()
+    device = server.device()
+    vlans = ["100", "200", "300", "400"]
+
+    fresh = []
+    for i in range(args.ticks):
+        start = time.perf_counter()
+        fresh_tick(device, vlans[i % len(vlans)])
+        fresh.append(time.perf_counter() - start)
+
+    pool = SSHSessionPool()
+    pooled = []
+    for i in range(args.ticks):
+        commands = tick_commands(vlans[i % len(vlans)])
+        start = time.perf_counter()
+        pool.run(device, lambda connection: connection.send_config_set(commands))
+        pooled.append(time.perf_counter() - start)
+    pool.close_all()
+    server.stop()
+
+    print(f"{args.ticks} ticks per mode against fake IOS on port {server.port}")
+    fresh_mean = summarize("fresh", fresh)
+    pooled_mean = summarize("pooled", pooled)
+    print(f"logins: {server.logins}  pool stats: {pool.stats}")
+    print(f"speedup: {fresh_mean / pooled_mean:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
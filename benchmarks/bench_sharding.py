@@ -0,0 +1,160 @@
+"""
+Fleet throughput of the sharded engine by number of worker processes.
+
+The simulated switches run in their own processes (--server-processes),
+so the switching side is what is measured. Every configuration starts
+its workers and logs in on a first tick and is then timed over --ticks
+warm ticks; throughput is switches per second of a warm tick. Each
+process gets enough threads for the whole fleet, so a single process is
+held back by its one core and not by its thread count:
+
+    python benchmarks/bench_sharding.py --switches 200 --processes 1 2 4 8
+
+Exits non-zero if a switch fails, a rotation cursor comes back wrong,
+or the most processes reach less than --efficiency times the
+single-process throughput multiplied by the cores they can use.
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fleet import create_engine, load_switches
+from session_pool import SSHSessionPool
+
+
+def serve(count, options, conn):
+    """Run count fake switches until the pipe says stop"""
+    from fake_ios_async import FakeFleet
+    fleet = FakeFleet(count, **options).start()
+    conn.send([(server.host, server.port) for server in fleet.servers])
+    conn.recv()
+    fleet.stop()
+
+
+def start_servers(count, processes, options):
+    context = multiprocessing.get_context("spawn")
+    servers = []
+    for index in range(processes):
+        conn, child_conn = context.Pipe()
+        share = count // processes + (1 if index < count % processes else 0)
+        process = context.Process(target=serve, args=(share, options, child_conn), daemon=True)
+        process.start()
+        servers.append((process, conn))
+    addresses = [address for _, conn in servers for address in conn.recv()]
+    return servers, addresses
+
+
+def stop_servers(servers):
+    for process, conn in servers:
+        conn.send("stop")
+    for process, _ in servers:
+        process.join(timeout=10)
+
+
+def build_config(addresses, engine, processes, workers):
+    return {
+        "username": "admin",
+        "password": "admin",
+        "enable_password": "enable",
+        "vlans": ["100", "200", "300"],
+        "interfaces": ["Gi1/0/1-8"],
+        "engine": engine,
+        "shard_processes": processes,
+        "max_workers": workers,
+        "switch_timeout": 60,
+        "switches": [{"name": f"sw{i}", "switch_ip": host, "port": port} for i, (host, port) in enumerate(addresses)],
+    }
+
+
+def run(addresses, engine, processes, args):
+    config = build_config(addresses, engine, processes, args.workers)
+    switches = load_switches(config)
+    pool = SSHSessionPool()
+    engine = create_engine(config, pool)
+    failed = 0
+    try:
+        first = engine.run_tick(switches)
+        failed += len(first.failed)
+        durations = []
+        for _ in range(args.ticks):
+            report = engine.run_tick(switches)
+            durations.append(report.duration)
+            failed += len(report.failed)
+    finally:
+        engine.shutdown()
+        pool.close_all()
+    # Every group has moved once per tick, first tick included
+    wrong = [s["name"] for s in switches
+             if any(g["cursor"] != (args.ticks + 1) % len(g["vlans"]) for g in s["port_groups"])]
+    return {
+        'first': first.duration,
+        'warm': statistics.median(durations),
+        'failed': failed,
+        'wrong': wrong,
+    }
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description='Sharded engine benchmark')
+    parser.add_argument('--switches', type=int, default=200)
+    parser.add_argument('--processes', type=int, nargs='+',
+                        default=sorted({1, 2, max(1, cores // 2), max(1, cores - 1)}))
+    parser.add_argument('--server-processes', type=int, default=max(1, cores // 4))
+    parser.add_argument('--workers', type=int, help='max_workers per process (default: --switches)')
+    parser.add_argument('--ticks', type=int, default=3)
+    parser.add_argument('--efficiency', type=float, default=0.5)
+    args = parser.parse_args()
+    args.workers = args.workers or args.switches
+
+    # A socket per switch on both ends, plus headroom
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, 4 * args.switches + 256)), hard))
+
+    servers, addresses = start_servers(args.switches, args.server_processes, {"ports": ["Gi1/0/1-8"]})
+    results = []
+    try:
+        results.append(("threads", 1, run(addresses, "threads", 1, args)))
+        for processes in args.processes:
+            results.append(("sharded", processes, run(addresses, "sharded", processes, args)))
+    finally:
+        stop_servers(servers)
+
+    print(f"{args.switches} switches in {args.server_processes} server process(es), {cores} core(s), "
+          f"{args.workers} threads per process")
+    print(f"{'engine':<9} {'procs':>5} {'first tick s':>13} {'warm tick s':>12} "
+          f"{'switches/s':>11} {'failed':>7}")
+    base = results[0][2]['warm']
+    for engine, processes, result in results:
+        print(f"{engine:<9} {processes:>5} {result['first']:>13.2f} "
+              f"{result['warm']:>12.2f} {args.switches / result['warm']:>11.0f} {result['failed']:>7}")
+
+    failures = []
+    for engine, processes, result in results:
+        if result['failed']:
+            failures.append(f"{engine} x{processes}: {result['failed']} switch failure(s)")
+        if result['wrong']:
+            failures.append(f"{engine} x{processes}: rotation cursor wrong on {', '.join(result['wrong'][:5])}")
+    _, most, last = results[-1]
+    # The fake switches take cores of their own
+    usable = max(1, min(most, cores - args.server_processes))
+    speedup = base / last['warm']
+    if speedup < args.efficiency * usable:
+        failures.append(f"{most} processes only {speedup:.2f}x the single process "
+                        f"(expected {args.efficiency * usable:.2f}x on {usable} usable core(s))")
+    if failures:
+        print(f"FAIL: {'; '.join(failures)}")
+        sys.exit(1)
+    print(f"OK: {most} processes switch {speedup:.2f}x as fast as one ({usable} usable core(s))")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Startup time of the entry points, with an import breakdown.
+
+Runs each entry point in a fresh interpreter with `python -X importtime`,
+reports the wall time (best of --runs) and the slowest top-level
+imports, and checks it against the thresholds below:
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --top 8
+
+An entry point fails if it takes longer than its threshold or loads a
+module it should only load on first use (netmiko, paramiko, asyncssh,
+keyring, http.server). Entry points that need pywin32 are skipped where
+it is not installed.
+"""
+
+import argparse
+import importlib.util
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Heavy modules no entry point may import before they are used
+DEFERRED = ('netmiko', 'paramiko', 'asyncssh', 'keyring', 'http.server')
+
+# name -> (arguments to python, wall-time threshold in ms, needs pywin32)
+ENTRY_POINTS = {
+    'switcher --help': (['secure_vlan_switcher.py', '--help'], 300, False),
+    'switcher plan': (['secure_vlan_switcher.py', 'plan', '--config', '{config}', '--steps', '1'], 300, False),
+    'switcher stop': (['secure_vlan_switcher.py', 'stop'], 400, True),
+    'windows_service stop': (['windows_service.py', 'stop'], 400, True),
+    'gui import': (['-c', 'import secure_vlan_gui'], 400, False),
+    'engine import': (['-c', 'import fleet, async_engine'], 600, False),
+}
+
+# Modules an entry point may load anyway because it uses them
+ALLOWED = {
+    'engine import': ('asyncssh',),
+}
+
+
+def parse_importtime(stderr):
+    """[(module, cumulative us, depth)] from -X importtime output"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), int(cumulative), depth))
+    return imports
+
+
+def run_entry(arguments, runs):
+    best = None
+    imports = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, '-X', 'importtime'] + arguments, cwd=ROOT,
+                                 capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+            imports = parse_importtime(process.stderr)
+    return best, imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Entry point startup benchmark')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=5, help='Slowest top-level imports to show')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply thresholds, for slow machines')
+    args = parser.parse_args()
+
+    # Time loading from bytecode, not compiling
+    subprocess.run([sys.executable, '-m', 'compileall', '-q', str(ROOT)], capture_output=True)
+    have_pywin32 = importlib.util.find_spec('win32serviceutil') is not None
+    baseline, _ = run_entry(['-c', 'pass'], args.runs)
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        config_file = Path(tmp) / "config.json"
+        with open(config_file, 'w') as f:
+            json.dump({"switch_ip": "10.0.0.1", "interfaces": ["Gi1/0/1-24"], "vlans": "100-199"}, f)
+
+        print(f"python -c pass: {baseline * 1000:.1f} ms")
+        print(f"{'entry point':<22} {'ms':>8} {'limit':>7}  slowest imports (ms)")
+        for name, (arguments, threshold, needs_pywin32) in ENTRY_POINTS.items():
+            if needs_pywin32 and not have_pywin32:
+                print(f"{name:<22} {'skipped, needs pywin32':>17}")
+                continue
+            arguments = [argument.format(config=config_file) for argument in arguments]
+            elapsed, imports = run_entry(arguments, args.runs)
+            limit = threshold * args.scale
+            top = sorted((i for i in imports if i[2] == 0), key=lambda i: -i[1])[:args.top]
+            print(f"{name:<22} {elapsed * 1000:>8.1f} {limit:>7.0f}  "
+                  f"{', '.join(f'{module} {us / 1000:.1f}' for module, us, _ in top)}")
+
+            loaded = {module for module, _, _ in imports}
+            early = [module for module in DEFERRED if module in loaded and module not in ALLOWED.get(name, ())]
+            if early:
+                failures.append(f"{name} imports {', '.join(early)}")
+            if elapsed * 1000 > limit:
+                failures.append(f"{name} took {elapsed * 1000:.0f} ms (limit {limit:.0f})")
+
+    if failures:
+        print(f"FAIL: {'; '.join(failures)}")
+        sys.exit(1)
+    print("OK: every entry point within its threshold")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+"""
+End-to-end benchmark suite against simulated Cisco IOS switches.
+
+Starts --switches fake switches in this process, runs --ticks real
+ticks through each selected engine (with the real session pool and
+rotation journal) and reports DNS, connect, enable, show, config push and persist
+latency percentiles plus fleet throughput. After every tick the VLAN of
+every port on every fake switch is checked against what the engine
+reported.
+
+    python benchmarks/bench_suite.py --switches 50 --ticks 5 --output run.json
+    python benchmarks/bench_suite.py --switches 50 --ticks 5 --compare run.json
+
+--compare prints the change against an earlier run and exits non-zero
+when a p50 got worse by more than --tolerance.
+"""
+
+import argparse
+import json
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_ios_async import FakeFleet
+from fake_ios_server import Faults
+from fleet import create_engine, load_switches, record_rotation
+from session_pool import SSHSessionPool
+from state_journal import RotationJournal
+
+PHASES = ('queue', 'dns', 'connect', 'enable', 'show', 'config_push', 'persist', 'switch', 'tick')
+
+
+def percentiles(samples):
+    """Summary of a list of seconds, in milliseconds"""
+    if not samples:
+        return None
+    samples = sorted(samples)
+
+    def pick(fraction):
+        return samples[min(len(samples) - 1, int(len(samples) * fraction))] * 1000
+
+    return {
+        'count': len(samples),
+        'mean': statistics.mean(samples) * 1000,
+        'p50': pick(0.50),
+        'p90': pick(0.90),
+        'p99': pick(0.99),
+        'max': samples[-1] * 1000,
+    }
+
+
+def build_config(servers, args, engine):
+    return {
+        "username": "admin",
+        "password": "admin",
+        "enable_password": "enable",
+        "engine": engine,
+        "max_workers": args.workers,
+        "switch_timeout": args.switch_timeout,
+        "vlans": [str(vlan) for vlan in range(100, 110)],
+        "interfaces": args.interfaces,
+        "switches": [{"name": s.hostname, "switch_ip": s.host, "port": s.port} for s in servers],
+    }
+
+
+def check_devices(fleet, switches, report):
+    """Count ports whose VLAN on the fake switch differs from the report"""
+    servers = {server.hostname: server for server in fleet.servers}
+    succeeded = {result.name: result for result in report.succeeded}
+    wrong = 0
+    for switch in switches:
+        result = succeeded.get(switch["name"])
+        if result is None:
+            continue
+        state = servers[switch["name"]].device_state
+        for group in switch["port_groups"]:
+            wrong += sum(1 for port in group["ports"] if state.get(port) != result.vlans[group["name"]])
+    return wrong
+
+
+def run_engine(engine_name, args, tmp):
+    faults = Faults(args.auth_fail_rate, args.drop_rate, args.reject_rate, seed=args.seed)
+    fleet = FakeFleet(args.switches, login_delay=args.login_delay, command_delay=args.command_delay,
+                      ports=args.ports, faults=faults).start()
+    samples = {phase: [] for phase in PHASES}
+    errors = {}
+    switched = 0
+    wrong_ports = 0
+    try:
+        config = build_config(fleet.servers, args, engine_name)
+        switches = load_switches(config)
+        pool = SSHSessionPool()
+        engine = create_engine(config, pool)
+        journal = RotationJournal(Path(tmp) / engine_name / "rotation")
+        started = time.perf_counter()
+        for _ in range(args.ticks):
+            tick_start = time.perf_counter()
+            report = engine.run_tick(switches)
+            persist_start = time.perf_counter()
+            record_rotation(journal, switches, report)
+            samples['persist'].append(time.perf_counter() - persist_start)
+            samples['tick'].append(time.perf_counter() - tick_start)
+            for result in report.results:
+                for phase, seconds in result.phases.items():
+                    samples[phase].append(seconds)
+                if result.ok:
+                    samples['switch'].append(result.duration)
+                else:
+                    error = (result.error or "").strip().splitlines()[0][:80] if result.error else "unknown"
+                    errors[error] = errors.get(error, 0) + 1
+            switched += len(report.succeeded)
+            wrong_ports += check_devices(fleet, switches, report)
+        elapsed = time.perf_counter() - started
+        engine.shutdown()
+        pool.close_all()
+        journal.close()
+    finally:
+        fleet.stop()
+
+    return {
+        'phases': {phase: percentiles(values) for phase, values in samples.items() if values},
+        'throughput': {
+            'switches_per_second': switched / elapsed if elapsed else 0.0,
+            'switched': switched,
+            'failed': args.ticks * args.switches - switched,
+        },
+        'logins': fleet.logins,
+        'faults_injected': dict(faults.injected),
+        'errors': errors,
+        'wrong_ports': wrong_ports,
+    }
+
+
+def print_results(results):
+    for engine_name, result in results['engines'].items():
+        throughput = result['throughput']
+        print(f"\n[{engine_name}] {throughput['switched']} switched, {throughput['failed']} failed, "
+              f"{throughput['switches_per_second']:.1f} switches/s, {result['logins']} logins, "
+              f"{result['wrong_ports']} ports in the wrong VLAN")
+        print(f"  {'phase':<12} {'count':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for phase in PHASES:
+            stats = result['phases'].get(phase)
+            if stats:
+                print(f"  {phase:<12} {stats['count']:>6} {stats['p50']:>9.2f} {stats['p90']:>9.2f} "
+                      f"{stats['p99']:>9.2f} {stats['max']:>9.2f}")
+        for error, count in sorted(result['errors'].items(), key=lambda item: -item[1]):
+            print(f"  {count:>5} x {error}")
+
+
+def compare(results, baseline, tolerance):
+    """Print the change from baseline; return the regressions"""
+    regressions = []
+    print(f"\nCompared with {baseline['meta']['time']} (tolerance {tolerance:.0%}):")
+    for engine_name, result in results['engines'].items():
+        old = baseline['engines'].get(engine_name)
+        if not old:
+            continue
+        for phase in PHASES:
+            new_stats, old_stats = result['phases'].get(phase), old['phases'].get(phase)
+            if not new_stats or not old_stats:
+                continue
+            change = new_stats['p50'] / old_stats['p50'] - 1 if old_stats['p50'] else 0.0
+            flag = ""
+            if change > tolerance:
+                flag = "  REGRESSION"
+                regressions.append(f"{engine_name}/{phase}")
+            print(f"  {engine_name:<8} {phase:<12} p50 {old_stats['p50']:>9.2f} -> {new_stats['p50']:>9.2f} ms "
+                  f"({change:+.0%}){flag}")
+        old_rate = old['throughput']['switches_per_second']
+        new_rate = result['throughput']['switches_per_second']
+        if old_rate:
+            print(f"  {engine_name:<8} {'throughput':<12} {old_rate:>13.1f} -> {new_rate:>9.1f} switches/s "
+                  f"({new_rate / old_rate - 1:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end benchmark suite on simulated switches')
+    parser.add_argument('--switches', type=int, default=20)
+    parser.add_argument('--ticks', type=int, default=5)
+    parser.add_argument('--engines', nargs='+', default=['threads', 'async'], choices=['threads', 'async'])
+    parser.add_argument('--workers', type=int, default=64)
+    parser.add_argument('--switch-timeout', type=float, default=30)
+    parser.add_argument('--interfaces', nargs='+', default=['Gi1/0/1-24'])
+    parser.add_argument('--ports', nargs='+', default=['Gi1/0/1-48'], help='Ports each fake switch has')
+    parser.add_argument('--login-delay', type=float, default=0.0)
+    parser.add_argument('--command-delay', type=float, default=0.0)
+    parser.add_argument('--auth-fail-rate', type=float, default=0.0)
+    parser.add_argument('--drop-rate', type=float, default=0.0)
+    parser.add_argument('--reject-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Save results to this JSON file')
+    parser.add_argument('--compare', help='Earlier results JSON to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    # Several sockets per simulated switch plus headroom
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, 8 * args.switches + 256)), hard))
+
+    results = {
+        'meta': {
+            'time': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': vars(args),
+        },
+        'engines': {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for engine_name in args.engines:
+            results['engines'][engine_name] = run_engine(engine_name, args, tmp)
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"FAIL: p50 regressed for {', '.join(regressions)}")
+            sys.exit(1)
+
+    if any(result['wrong_ports'] for result in results['engines'].values()):
+        print("FAIL: some ports ended up in the wrong VLAN")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
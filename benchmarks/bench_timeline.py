@@ -0,0 +1,244 @@
+"""
+Schedule timeline: lookup cost, correctness and a simulated week.
+
+Builds --groups port groups whose schedules mix dwell times and
+business-hours windows, and answers "which VLAN is active at T" and
+"when is the next change after T" for random times over --days days,
+once from the compiled timeline (a bisect) and once by replaying the
+schedule from its start, which is what recomputing from the interval
+setting amounts to once dwell times and windows differ. It also picks
+the fleet's next change from the heap against scanning every group:
+
+    python benchmarks/bench_timeline.py --groups 500 --days 7
+
+Then it runs the service's scheduler on a simulated clock for a week
+with --failure-rate of the switches failing, and checks that every
+group ends up on the VLAN its schedule says and that ticks only touch
+the switches that are due.
+
+Exits non-zero if a lookup disagrees with the replay, a VLAN is used
+outside its windows or beyond its dwell, the simulated week ends with a
+group off schedule, or the timeline is not --speedup times faster.
+"""
+
+import argparse
+import datetime
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from deadline_scheduler import DeadlineScheduler
+from fleet import load_switches, rotate_switch
+from timeline import FleetTimeline, GroupTimeline
+
+INTERVAL = 300.0
+
+# Monday midnight, local time
+START = datetime.datetime(2026, 1, 5).timestamp()
+
+
+def build_switches(count, rng):
+    entries = []
+    for i in range(count):
+        base = 100 + (i % 50) * 10
+        vlans = [str(base + k) for k in range(4)]
+        schedule = {"dwell_minutes": rng.choice([5, 10, 15]), "vlans": {
+            vlans[1]: {"dwell_minutes": 60, "windows": ["mon-fri 09:00-17:00"]},
+            vlans[3]: {"dwell_seconds": rng.choice([90, 120]), "windows": ["22:00-06:00", "sat,sun"]},
+        }}
+        entries.append({"name": f"sw{i}", "switch_ip": f"10.0.{i // 250}.{i % 250 + 1}",
+                        "vlans": vlans, "schedule": schedule})
+    return load_switches({"username": "admin", "password": "admin", "interfaces": ["Gi1/0/1-4"],
+                          "switches": entries})
+
+
+def replay(schedule, dwell, start, t):
+    """(active index, next change) at t by stepping through the schedule from start"""
+    index, current, at = 0, None, start
+    count = len(schedule.vlans)
+    while True:
+        j, until = schedule.pick(index, at, dwell)
+        if at > t and j != current:
+            return current, at
+        if j != current:
+            current = j
+        at = until
+        if j >= 0:
+            index = (j + 1) % count
+
+
+def time_calls(calls):
+    begin = time.perf_counter()
+    for call in calls:
+        call()
+    return (time.perf_counter() - begin) / len(calls)
+
+
+def check_segments(switch, group, timeline, limit):
+    """Problems with a group's compiled segments up to limit"""
+    problems = []
+    schedule = group["schedule"]
+    times, indexes = timeline.times, timeline.indexes
+    for k in range(len(times) - 1):
+        start, end, index = times[k], times[k + 1], indexes[k]
+        if end > limit:
+            break
+        if index < 0:
+            continue
+        seconds, windows = schedule.rules.get(index, (None, None))
+        dwell = seconds or timeline.dwell
+        middle = (start + end) / 2
+        if windows is not None and not (windows.open_at(start) and windows.open_at(middle)):
+            problems.append(f"{switch['name']}: VLAN {group['vlans'][index]} used outside its windows")
+        # Back-to-back stays of the same VLAN merge when it is the only usable one
+        usable = [j for j in range(len(group["vlans"]))
+                  if schedule.rules.get(j, (None, None))[1] is None or schedule.rules[j][1].open_at(middle)]
+        if len(usable) > 1 and end - start > dwell + 1e-6:
+            problems.append(f"{switch['name']}: VLAN {group['vlans'][index]} stayed {end - start:g}s "
+                            f"(dwell {dwell:g}s)")
+    return problems
+
+
+def lookups(switches, days, queries, rng):
+    """Seconds per lookup, indexed and replayed, and any disagreements"""
+    limit = START + days * 86400
+    timelines = [(switch, group, GroupTimeline(group["schedule"], INTERVAL, START, 0, horizon=days * 86400))
+                 for switch in switches for group in switch["port_groups"]]
+    # Timelines compile forward as the clock moves, like the service asks them
+    samples = sorted(((rng.choice(timelines), rng.uniform(START, limit)) for _ in range(queries)),
+                     key=lambda sample: sample[1])
+    replayed = samples[::20]
+    indexed = time_calls([lambda s=s, t=t: (s[2].active(t), s[2].next_change(t)) for s, t in samples])
+    slow = time_calls([lambda s=s, t=t: replay(s[1]["schedule"], s[2].dwell, START, t) for s, t in replayed])
+    wrong = []
+    # Fresh timelines, since the timed ones have compiled past these times
+    fresh = {}
+    for (switch, group, timed), t in replayed:
+        timeline = fresh.get(id(timed))
+        if timeline is None:
+            timeline = fresh[id(timed)] = GroupTimeline(group["schedule"], INTERVAL, START, 0, horizon=days * 86400)
+        expected = replay(group["schedule"], timeline.dwell, START, t)
+        got = (timeline.active(t), timeline.next_change(t)[0])
+        if got != expected:
+            wrong.append(f"{switch['name']} at {t:.0f}: timeline {got}, replay {expected}")
+    problems = []
+    for switch, group, timeline in timelines[:50]:
+        problems += check_segments(switch, group, timeline, limit)
+    return indexed, slow, wrong + problems
+
+
+def fleet_next(switches, rng):
+    """Seconds to find the fleet's next change from the heap and by scanning every group"""
+    timeline = FleetTimeline(switches, INTERVAL, now=START)
+    times = [START + rng.uniform(0, 86400) for _ in range(200)]
+    heap = time_calls([lambda: timeline.next_change(START)] * 1000)
+    scan = time_calls([lambda t=t: min(change[0] for change in (timeline.timelines[key].next_change(t)
+                                                                 for key in timeline.timelines) if change)
+                       for t in times])
+    return heap, scan
+
+
+class VirtualClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def simulate_week(switches, failure_rate, rng):
+    """Run the scheduler over a simulated week; returns the tick counts and groups off schedule"""
+    clock = VirtualClock(START)
+    scheduler = DeadlineScheduler(clock=clock)
+    timeline = FleetTimeline(switches, INTERVAL, retry=60.0, now=START)
+    end = START + 7 * 86400
+    stats = {"ticks": 0, "attempts": 0, "needless": 0}
+
+    def tick():
+        stats["last"] = clock.now
+        due = timeline.prepare(clock.now)
+        stats["ticks"] += 1
+        stats["attempts"] += len(due)
+        for switch in due:
+            if all(group["hold"] or group["vlans"][group["cursor"]] == group["vlan"]
+                   for group in switch["port_groups"]):
+                stats["needless"] += 1
+            vlans, _ = rotate_switch(switch)
+            # Failures stop a day before the end, so retries can catch up
+            if clock.now < end - 86400 and rng.random() < failure_rate:
+                continue
+            for group in switch["port_groups"]:
+                if group["name"] in vlans:
+                    group["vlan"] = vlans[group["name"]]
+                    group["switched_at"] = clock.now
+        clock.now += rng.uniform(0, 2)
+
+    scheduler.follow(timeline, tick, wall_clock=clock)
+
+    def wait_for_stop(timeout):
+        if clock.now >= end:
+            return True
+        clock.now += timeout if timeout is not None else end - clock.now
+        return False
+
+    scheduler.run(wait_for_stop)
+    # As of the last tick; later changes are not due yet
+    off = [f"{switch['name']}/{group['name']}" for switch in switches for group in switch["port_groups"]
+           if timeline.active_vlan(switch, group, stats["last"]) not in (None, group["vlan"])]
+    return stats, off
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Schedule timeline benchmark')
+    parser.add_argument('--groups', type=int, default=500)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--failure-rate', type=float, default=0.05)
+    parser.add_argument('--speedup', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    switches = build_switches(args.groups, rng)
+
+    begin = time.perf_counter()
+    FleetTimeline(switches, INTERVAL, now=START)
+    compile_time = time.perf_counter() - begin
+
+    failures = []
+    print(f"{args.groups} scheduled port groups, compiled in {compile_time * 1000:.0f} ms")
+    print(f"{'lookup':<30} {'timeline':>12} {'recompute':>12} {'speedup':>8}")
+    speedups = []
+    for days in sorted({1, args.days}):
+        indexed, slow, wrong = lookups(switches, days, args.queries, rng)
+        failures += wrong[:5]
+        speedups.append(slow / indexed)
+        print(f"{f'active + next, {days} day(s)':<30} {indexed * 1e6:>9.1f} us {slow * 1e6:>9.1f} us "
+              f"{slow / indexed:>7.0f}x")
+    heap, scan = fleet_next(switches, rng)
+    speedups.append(scan / heap)
+    print(f"{'fleet next change':<30} {heap * 1e6:>9.1f} us {scan * 1e6:>9.1f} us {scan / heap:>7.0f}x")
+
+    stats, off = simulate_week(switches, args.failure_rate, rng)
+    legacy = 7 * 86400 / INTERVAL * len(switches)
+    print(f"simulated week: {stats['ticks']:,} ticks, {stats['attempts']:,} switch attempts "
+          f"(every {INTERVAL:g}s for every switch: {legacy:,.0f})")
+    if stats["needless"]:
+        failures.append(f"{stats['needless']} switch attempt(s) with nothing due")
+    if off:
+        failures.append(f"{len(off)} group(s) off schedule after the week: {', '.join(off[:5])}")
+    if min(speedups) < args.speedup:
+        failures.append(f"timeline only {min(speedups):.1f}x faster than recomputing (expected {args.speedup:g}x)")
+    if failures:
+        print(f"FAIL: {'; '.join(failures)}")
+        sys.exit(1)
+    print(f"OK: lookups agree with the schedule and are {min(speedups):.0f}x+ faster; "
+          f"every group is on schedule after a simulated week")
+
+
+if __name__ == '__main__':
+    main()
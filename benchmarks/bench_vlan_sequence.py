@@ -0,0 +1,105 @@
+"""
+Memory and per-tick cost of large VLAN rotations.
+
+Compares the old model (a list of VLAN strings, rotated by rebuilding
+it as vlans[1:] + [current] every tick) with a VlanSequence and a
+cursor, for a group rotating through every VLAN from 1 to 4094:
+
+    python benchmarks/bench_vlan_sequence.py --ticks 10000
+
+Exits non-zero if the sequence does not visit the same VLANs in the
+same order as the list, or accepts an invalid VLAN spec.
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fleet import load_switches, rotate_switch
+from vlan_sequence import VlanSequence
+
+INVALID_SPECS = ["0", "4095", "200-100", "10,abc", "1-"]
+
+
+def measure(build):
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+
+def rotate_list(vlans, ticks):
+    visited = []
+    for _ in range(ticks):
+        current = vlans[0]
+        vlans = vlans[1:] + [current]
+        visited.append(current)
+    return visited
+
+
+def rotate_cursor(switch, ticks):
+    group = switch["port_groups"][0]
+    return [rotate_switch(switch)[0][group["name"]] for _ in range(ticks)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='VLAN sequence benchmark')
+    parser.add_argument('--ticks', type=int, default=10000)
+    parser.add_argument('--spec', default='1-4094')
+    args = parser.parse_args()
+
+    config = {"switch_ip": "10.0.0.1", "interfaces": ["Gi1/0/1"], "vlans": args.spec}
+    vlans, list_size = measure(lambda: [str(vlan) for vlan in VlanSequence(args.spec)])
+    sequence, sequence_size = measure(lambda: VlanSequence(args.spec))
+    switch = load_switches(config)[0]
+
+    start = time.perf_counter()
+    old = rotate_list(vlans, args.ticks)
+    old_tick = (time.perf_counter() - start) / args.ticks
+    start = time.perf_counter()
+    new = rotate_cursor(switch, args.ticks)
+    new_tick = (time.perf_counter() - start) / args.ticks
+
+    # Resuming a journaled rotation looks the last VLAN up
+    last = vlans[-1]
+    start = time.perf_counter()
+    for _ in range(1000):
+        vlans.index(last)
+    old_index = (time.perf_counter() - start) / 1000
+    start = time.perf_counter()
+    for _ in range(1000):
+        sequence.index(last)
+    new_index = (time.perf_counter() - start) / 1000
+
+    print(f"VLANs {sequence} ({len(sequence)} VLANs), {args.ticks} ticks")
+    print(f"{'model':<22} {'memory':>10} {'per tick us':>12} {'index us':>10}")
+    print(f"{'list, rebuilt':<22} {list_size:>10} {old_tick * 1e6:>12.2f} {old_index * 1e6:>10.2f}")
+    print(f"{'sequence + cursor':<22} {sequence_size:>10} {new_tick * 1e6:>12.2f} {new_index * 1e6:>10.2f}")
+
+    failures = []
+    if old != new:
+        failures.append("rotation order differs")
+    if list(sequence) != vlans or len(sequence) != len(vlans):
+        failures.append("expansion differs")
+    if any(sequence.index(vlans[i]) != vlans.index(vlans[i]) for i in range(0, len(vlans), 97)):
+        failures.append("index differs")
+    for spec in INVALID_SPECS:
+        try:
+            VlanSequence(spec)
+            failures.append(f"accepted {spec!r}")
+        except ValueError:
+            pass
+    if failures:
+        print(f"FAIL: {', '.join(failures)}")
+        sys.exit(1)
+    print(f"OK: {list_size / sequence_size:.0f}x less memory, {old_tick / new_tick:.1f}x faster ticks")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""
+In-process asyncio fake Cisco IOS SSH server.
+
+Runs any number of simulated switches on one event loop, each on its
+own port with its own state, so hundreds of concurrent sessions can be
+benchmarked on a single machine. Reuses the CLI interpreter of the
+threaded fake server. FakeFleet runs such a loop in a background
+thread, so blocking clients such as netmiko can be pointed at it too.
+"""
+
+import asyncio
+import collections
+import threading
+import time
+
+import asyncssh
+
+from fake_ios_server import FakeIOSCLI, expand_ports
+
+_host_key = None
+
+
+def get_host_key():
+    """Generate (once) the host key shared by all async fake servers"""
+    global _host_key
+    if _host_key is None:
+        _host_key = asyncssh.generate_private_key('ssh-ed25519')
+    return _host_key
+
+
+class AAAThrottle:
+    """A TACACS+/RADIUS server that rejects logins beyond rate per second
+
+    Shared by the fake switches of one AAA group; logins over the rate
+    in any one-second window fail authentication, like a throttled
+    server timing out.
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.accepted = 0
+        self.rejected = 0
+        self._recent = collections.deque()
+
+    def admit(self):
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] >= 1.0:
+            self._recent.popleft()
+        if len(self._recent) >= self.rate:
+            self.rejected += 1
+            return False
+        self._recent.append(now)
+        self.accepted += 1
+        return True
+
+
+class _SSHServer(asyncssh.SSHServer):
+    def __init__(self, fake):
+        self.fake = fake
+
+    def begin_auth(self, username):
+        return True
+
+    def password_auth_supported(self):
+        return True
+
+    def validate_password(self, username, password):
+        if self.fake.faults and self.fake.faults.roll('auth_fail'):
+            return False
+        if self.fake.aaa is not None and not self.fake.aaa.admit():
+            return False
+        return username == self.fake.username and password == self.fake.password
+
+
+class AsyncFakeIOSServer:
+    """One simulated switch served from the running event loop"""
+
+    def __init__(self, host='127.0.0.1', port=0, username='admin', password='admin',
+                 secret='enable', hostname='Switch', login_delay=0.0, command_delay=0.0,
+                 ports=None, faults=None, aaa=None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.secret = secret
+        self.hostname = hostname
+        self.login_delay = login_delay
+        self.command_delay = command_delay
+        self.ports = expand_ports(ports) if ports else None
+        self.faults = faults
+        self.aaa = aaa
+        # Access VLAN of every port, starting in VLAN 1
+        self.device_state = {port: "1" for port in self.ports or ()}
+        self.logins = 0
+        # Sessions open now, and the most ever open at once
+        self.active = 0
+        self.peak = 0
+        self._server = None
+
+    async def start(self):
+        """Start listening; port 0 picks a free port"""
+        self._server = await asyncssh.create_server(
+            lambda: _SSHServer(self), self.host, self.port,
+            server_host_keys=[get_host_key()],
+            process_factory=self._handle,
+            line_editor=False,
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    def device(self):
+        """Return a device dict pointing at this server"""
+        return {
+            'device_type': 'cisco_ios',
+            'host': self.host,
+            'port': self.port,
+            'username': self.username,
+            'password': self.password,
+            'secret': self.secret,
+        }
+
+    async def _handle(self, process):
+        self.logins += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await self._serve(process)
+        finally:
+            self.active -= 1
+
+    async def _serve(self, process):
+        cli = FakeIOSCLI(self.hostname, self.secret, self.device_state, self.ports, self.faults)
+        if self.login_delay:
+            await asyncio.sleep(self.login_delay)
+        process.stdout.write(cli.banner())
+        try:
+            while not cli.closed:
+                data = await process.stdin.read(4096)
+                if not data:
+                    break
+                if self.command_delay:
+                    await asyncio.sleep(self.command_delay)
+                reply = cli.feed(data)
+                if cli.dropped:
+                    process.channel.abort()
+                    return
+                if reply:
+                    process.stdout.write(reply)
+        except (asyncssh.Error, OSError, BrokenPipeError):
+            pass
+        process.exit(0)
+
+
+async def start_fleet(count, **options):
+    """Start count fake switches on the current event loop"""
+    servers = [AsyncFakeIOSServer(hostname=f"sw{i}", **options) for i in range(count)]
+    await asyncio.gather(*(server.start() for server in servers))
+    return servers
+
+
+class FakeFleet:
+    """Runs count async fake switches on a background event loop"""
+
+    def __init__(self, count, **options):
+        self.count = count
+        self.options = options
+        self.servers = []
+        self.loop = None
+        self._thread = None
+
+    def start(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="fake-ios", daemon=True)
+        self._thread.start()
+        self.servers = asyncio.run_coroutine_threadsafe(start_fleet(self.count, **self.options), self.loop).result()
+        return self
+
+    def stop(self):
+        async def stop_servers():
+            await asyncio.gather(*(server.stop() for server in self.servers))
+            # End sessions clients left open
+            sessions = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in sessions:
+                task.cancel()
+            await asyncio.gather(*sessions, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(stop_servers(), self.loop).result(timeout=10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(5)
+
+    @property
+    def logins(self):
+        return sum(server.logins for server in self.servers)
@@ -0,0 +1,427 @@
+"""
+Fake Cisco IOS SSH server for benchmarking without hardware.
+
+Speaks enough of the IOS CLI for netmiko's cisco_ios driver and the
+asyncio engine: login prompt, enable, configure terminal, interface and
+interface range (expanded to single ports), switchport access vlan, and
+the show commands that report port VLANs (show interfaces switchport,
+show interfaces status, show vlan brief, show running-config
+interface). Latency and failures can be injected per server.
+"""
+
+import random
+import re
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import paramiko
+
+# Add the repository root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from interfaces import ABBREVIATIONS, MAX_RANGES_PER_COMMAND, expand_ports, normalize_interface
+
+_host_key = None
+_host_key_lock = threading.Lock()
+
+# Short names used in show output, e.g. GigabitEthernet -> Gi
+SHORT_TYPES = {}
+for _abbreviation, _full in ABBREVIATIONS.items():
+    SHORT_TYPES.setdefault(_full, _abbreviation.capitalize())
+
+
+def get_host_key():
+    """Generate (once) the RSA host key shared by all fake servers"""
+    global _host_key
+    with _host_key_lock:
+        if _host_key is None:
+            _host_key = paramiko.RSAKey.generate(2048)
+        return _host_key
+
+
+def short_name(port):
+    """GigabitEthernet1/0/1 -> Gi1/0/1"""
+    kind, rest = re.match(r'^([A-Za-z-]*)(.*)$', port).groups()
+    return SHORT_TYPES.get(kind, kind) + rest
+
+
+def port_sort_key(port):
+    kind, rest = re.match(r'^([A-Za-z-]*)(.*)$', port).groups()
+    return kind, [int(n) for n in re.findall(r'\d+', rest)]
+
+
+class Faults:
+    """Failure injection shared by one or more fake switches
+
+    Each rate is the probability that the event happens: a login is
+    refused, the session is dropped when a VLAN change arrives, or the
+    VLAN change is rejected as invalid input.
+    """
+
+    def __init__(self, auth_fail_rate=0.0, drop_rate=0.0, reject_rate=0.0, seed=None):
+        self.auth_fail_rate = auth_fail_rate
+        self.drop_rate = drop_rate
+        self.reject_rate = reject_rate
+        self.random = random.Random(seed)
+        self.injected = {'auth_fail': 0, 'drop': 0, 'reject': 0}
+        self._lock = threading.Lock()
+
+    def roll(self, fault):
+        """Decide whether to inject fault this time"""
+        rate = getattr(self, f"{fault}_rate")
+        if rate <= 0:
+            return False
+        with self._lock:
+            hit = self.random.random() < rate
+            if hit:
+                self.injected[fault] += 1
+        return hit
+
+
+class FakeIOSCLI:
+    """Line-oriented IOS command interpreter for a single vty session
+
+    device_state maps canonical port names to their access VLAN and is
+    shared by every session of the same switch. When ports is given,
+    only those ports exist; otherwise any valid interface name does.
+    """
+
+    def __init__(self, hostname="Switch", secret="", device_state=None, ports=None, faults=None):
+        self.hostname = hostname
+        self.secret = secret
+        self.mode = 'user'
+        self.closed = False
+        # Closed without a reply, like a connection reset
+        self.dropped = False
+        self.vlans = device_state if device_state is not None else {}
+        self.ports = set(ports) if ports is not None else None
+        self.faults = faults
+        self.current_interfaces = []
+        self._buffer = ""
+        self._last_char = ""
+
+    def banner(self):
+        """Text sent once the shell opens"""
+        return f"\r\n{self.prompt()}"
+
+    def feed(self, data):
+        """Consume raw terminal input and return what the switch echoes back"""
+        reply = []
+        for char in data:
+            if char == '\x00':
+                # netmiko's is_alive() probe
+                continue
+            if char in '\r\n':
+                skip = char == '\n' and self._last_char == '\r'
+                self._last_char = char
+                if skip:
+                    continue
+                echo = self._buffer if self.mode != 'password' else ""
+                output = self.handle(self._buffer)
+                self._buffer = ""
+                if self.dropped:
+                    return ""
+                reply.append(f"{echo}\r\n{output}{self.prompt()}")
+                if self.closed:
+                    break
+            else:
+                self._last_char = char
+                self._buffer += char
+        return "".join(reply)
+
+    def prompt(self):
+        """Return the prompt for the current mode"""
+        if self.mode == 'user':
+            return f"{self.hostname}>"
+        if self.mode == 'password':
+            return "Password: "
+        if self.mode == 'config':
+            return f"{self.hostname}(config)#"
+        if self.mode == 'config-if':
+            return f"{self.hostname}(config-if)#"
+        return f"{self.hostname}#"
+
+    def handle(self, line):
+        """Process one input line and return the text to send back"""
+        command = line.strip()
+
+        if self.mode == 'password':
+            if command == self.secret:
+                self.mode = 'exec'
+                return ""
+            self.mode = 'user'
+            return "% Access denied\r\n"
+
+        if not command:
+            return ""
+
+        if command.startswith('terminal '):
+            return ""
+
+        if self.mode == 'user':
+            if command == 'enable':
+                self.mode = 'password'
+                return ""
+            if command in ('exit', 'logout', 'quit'):
+                self.closed = True
+                return ""
+            if command.startswith('show '):
+                return self.show(command)
+            return self.invalid()
+
+        if self.mode == 'exec':
+            if command in ('configure terminal', 'conf t'):
+                self.mode = 'config'
+                return "Enter configuration commands, one per line.  End with CNTL/Z.\r\n"
+            if command == 'disable':
+                self.mode = 'user'
+                return ""
+            if command in ('exit', 'logout', 'quit'):
+                self.closed = True
+                return ""
+            if command.startswith('show '):
+                return self.show(command)
+            return self.invalid()
+
+        # Configuration modes
+        if command == 'end':
+            self.mode = 'exec'
+            return ""
+        if command.startswith('do show '):
+            return self.show(command[3:])
+        if command.startswith('interface '):
+            ports = self.parse_interfaces(command.split(None, 1)[1])
+            if ports is None:
+                return self.invalid()
+            self.current_interfaces = ports
+            self.mode = 'config-if'
+            return ""
+        if command == 'exit':
+            self.mode = 'config' if self.mode == 'config-if' else 'exec'
+            return ""
+        if self.mode == 'config-if' and command.startswith('switchport access vlan '):
+            if self.faults and self.faults.roll('drop'):
+                self.dropped = self.closed = True
+                return ""
+            if self.faults and self.faults.roll('reject'):
+                return self.invalid()
+            vlan = command.rsplit(None, 1)[1]
+            if not vlan.isdigit() or not 1 <= int(vlan) <= 4094:
+                return self.invalid()
+            for interface in self.current_interfaces:
+                self.vlans[interface] = vlan
+            return ""
+        return ""
+
+    def parse_interfaces(self, spec):
+        """Ports named by "X" or "range X - Y , Z", or None if invalid"""
+        is_range = spec.startswith('range ')
+        if is_range:
+            parts = [part.strip() for part in spec[6:].split(',')]
+            if len(parts) > MAX_RANGES_PER_COMMAND:
+                return None
+        else:
+            parts = [spec]
+        try:
+            ports = expand_ports(parts) if is_range else [normalize_interface(spec)]
+        except ValueError:
+            return None
+        if self.ports is not None and not all(port in self.ports for port in ports):
+            return None
+        for port in ports:
+            self.vlans.setdefault(port, "1")
+        return ports
+
+    def known_ports(self):
+        ports = self.ports if self.ports is not None else self.vlans.keys()
+        return sorted(ports, key=port_sort_key)
+
+    def show(self, command):
+        """Output of the supported show commands"""
+        words = command.split()
+        if words[:2] == ['show', 'version']:
+            return f"Cisco IOS Software, fake simulator\r\n{self.hostname} uptime is 1 day\r\n"
+        if words[:3] == ['show', 'interfaces', 'status']:
+            return self.show_status()
+        if words[:2] == ['show', 'interfaces'] and words[-1] == 'switchport':
+            if len(words) == 3:
+                return self.show_switchport(self.known_ports())
+            ports = self.parse_interfaces(" ".join(words[2:-1]))
+            return self.invalid() if ports is None else self.show_switchport(ports)
+        if words[:3] == ['show', 'vlan', 'brief']:
+            return self.show_vlan_brief()
+        if words[:3] == ['show', 'running-config', 'interface'] and len(words) > 3:
+            ports = self.parse_interfaces(" ".join(words[3:]))
+            if ports is None:
+                return self.invalid()
+            config = (f"interface {ports[0]}\r\n switchport access vlan {self.vlans.get(ports[0], '1')}\r\n"
+                      f" switchport mode access\r\nend\r\n")
+            return f"Building configuration...\r\n\r\nCurrent configuration : {len(config)} bytes\r\n!\r\n{config}"
+        return self.invalid()
+
+    def show_switchport(self, ports):
+        blocks = []
+        for port in ports:
+            vlan = self.vlans.get(port, "1")
+            blocks.append(
+                f"Name: {short_name(port)}\r\n"
+                "Switchport: Enabled\r\n"
+                "Administrative Mode: static access\r\n"
+                "Operational Mode: static access\r\n"
+                "Administrative Trunking Encapsulation: dot1q\r\n"
+                "Negotiation of Trunking: Off\r\n"
+                f"Access Mode VLAN: {vlan} ({'default' if vlan == '1' else f'VLAN{int(vlan):04d}'})\r\n"
+                "Trunking Native Mode VLAN: 1 (default)\r\n"
+                "Voice VLAN: none\r\n"
+            )
+        return "\r\n".join(blocks)
+
+    def show_status(self):
+        lines = [f"{'Port':<10}{'Name':<19}{'Status':<13}{'Vlan':<11}{'Duplex':<7}{'Speed':<7}Type"]
+        for port in self.known_ports():
+            lines.append(f"{short_name(port):<10}{'':<19}{'connected':<13}{self.vlans.get(port, '1'):<11}"
+                         f"{'a-full':<7}{'a-1000':<7}10/100/1000BaseTX")
+        return "\r\n".join(lines) + "\r\n"
+
+    def show_vlan_brief(self):
+        members = {}
+        for port in self.known_ports():
+            members.setdefault(self.vlans.get(port, "1"), []).append(short_name(port))
+        lines = ["VLAN Name                             Status    Ports",
+                 "---- -------------------------------- --------- -------------------------------"]
+        for vlan in sorted(members, key=int):
+            name = 'default' if vlan == '1' else f'VLAN{int(vlan):04d}'
+            lines.append(f"{vlan:<5}{name:<33}{'active':<10}{', '.join(members[vlan])}")
+        return "\r\n".join(lines) + "\r\n"
+
+    @staticmethod
+    def invalid():
+        return "% Invalid input detected at '^' marker.\r\n"
+
+
+class _ServerInterface(paramiko.ServerInterface):
+    def __init__(self, server):
+        self.server = server
+        self.shell_ready = threading.Event()
+
+    def check_auth_password(self, username, password):
+        if username == self.server.username and password == self.server.password:
+            if not (self.server.faults and self.server.faults.roll('auth_fail')):
+                return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        self.shell_ready.set()
+        return True
+
+
+class FakeIOSServer:
+    """Threaded SSH server that hosts one fake IOS switch"""
+
+    def __init__(self, host='127.0.0.1', port=0, username='admin', password='admin',
+                 secret='enable', hostname='Switch', login_delay=0.0, command_delay=0.0,
+                 ports=None, faults=None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.secret = secret
+        self.hostname = hostname
+        self.login_delay = login_delay
+        self.command_delay = command_delay
+        self.ports = expand_ports(ports) if ports else None
+        self.faults = faults
+        # Access VLAN of every port, starting in VLAN 1
+        self.device_state = {port: "1" for port in self.ports or ()}
+        self.logins = 0
+        self._sock = None
+        self._running = False
+
+    def start(self):
+        """Bind the listening socket and start accepting sessions"""
+        get_host_key()
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((self.host, self.port))
+        self._sock.listen(100)
+        self.port = self._sock.getsockname()[1]
+        self._running = True
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        """Stop accepting new sessions"""
+        self._running = False
+        if self._sock:
+            self._sock.close()
+
+    def device(self):
+        """Return a netmiko device dict pointing at this server"""
+        return {
+            'device_type': 'cisco_ios',
+            'host': self.host,
+            'port': self.port,
+            'username': self.username,
+            'password': self.password,
+            'secret': self.secret,
+            'timeout': 10,
+        }
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve, args=(client,), daemon=True).start()
+
+    def _serve(self, client):
+        transport = paramiko.Transport(client)
+        transport.add_server_key(get_host_key())
+        interface = _ServerInterface(self)
+        try:
+            transport.start_server(server=interface)
+            channel = transport.accept(20)
+            if channel is None or not interface.shell_ready.wait(10):
+                return
+            self.logins += 1
+            if self.login_delay:
+                time.sleep(self.login_delay)
+            self._shell(channel)
+        except Exception:
+            pass
+        finally:
+            transport.close()
+
+    def _shell(self, channel):
+        cli = FakeIOSCLI(self.hostname, self.secret, self.device_state, self.ports, self.faults)
+        channel.sendall(cli.banner().encode())
+        while not cli.closed:
+            data = channel.recv(4096)
+            if not data:
+                break
+            if self.command_delay:
+                time.sleep(self.command_delay)
+            reply = cli.feed(data.decode(errors='ignore'))
+            if reply:
+                channel.sendall(reply.encode())
+        channel.close()
+
+
+def start_fleet(count, **options):
+    """Start count threaded fake switches, each on its own port"""
+    return [FakeIOSServer(hostname=f"sw{i}", **options).start() for i in range(count)]
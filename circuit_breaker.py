@@ -0,0 +1,144 @@
+"""
+Per-switch circuit breaker with exponential backoff.
+
+A switch that fails failure_threshold ticks in a row is opened: the
+engines skip it, without rotating it or spending a worker or a timeout
+on it, until its backoff has passed. The backoff doubles every time
+the breaker opens again, up to max_delay, with random jitter so a
+group of switches that died together is not retried in lockstep.
+When the backoff is over the breaker is half-open: a cheap probe (TCP
+connect and SSH banner, probe_timeout) runs before the switch gets its
+tick again. A failed probe reopens the breaker, a successful tick
+closes it.
+"""
+
+import logging
+import random
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def probe_ssh(host, port=22, timeout=2.0):
+    """Connect and read the SSH banner; raises OSError if that fails"""
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.settimeout(timeout)
+        banner = sock.recv(256).split(b"\n", 1)[0].decode('ascii', 'replace').strip()
+    if not banner.startswith("SSH-"):
+        raise ConnectionError("no SSH banner")
+    return banner
+
+
+class DeviceBreaker:
+    """Failure history of one switch"""
+
+    def __init__(self):
+        self.state = CLOSED
+        # Failed ticks in a row
+        self.failures = 0
+        # Times the breaker opened since the switch last succeeded
+        self.opens = 0
+        self.retry_at = None
+        self.error = None
+
+
+class CircuitBreaker:
+    """Decides which switches a tick skips, probes or switches normally"""
+
+    def __init__(self, failure_threshold=3, base_delay=30.0, max_delay=900.0, jitter=0.2, probe_timeout=2.0,
+                 clock=time.monotonic, rand=random.random):
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.probe_timeout = probe_timeout
+        self.clock = clock
+        self.rand = rand
+        self.devices = {}
+        self._lock = threading.Lock()
+
+    def allow(self, name):
+        """Whether name takes part in this tick; an open breaker that is due turns half-open"""
+        with self._lock:
+            device = self.devices.get(name)
+            if device is None or device.state != OPEN:
+                return True
+            if self.clock() < device.retry_at:
+                return False
+            device.state = HALF_OPEN
+            return True
+
+    def probing(self, name):
+        """Whether name has to pass the probe before its tick"""
+        device = self.devices.get(name)
+        return device is not None and device.state == HALF_OPEN
+
+    def backoff(self, opens):
+        delay = min(self.max_delay, self.base_delay * 2 ** (opens - 1))
+        return delay * (1 - self.jitter * self.rand())
+
+    def record(self, name, ok, error=None):
+        """Record the outcome of a tick (or probe) for name"""
+        with self._lock:
+            device = self.devices.get(name)
+            if ok:
+                if device is not None and device.state != CLOSED:
+                    logger.info("[%s] Circuit closed, switch is back", name)
+                self.devices.pop(name, None)
+                return
+            if device is None:
+                device = self.devices[name] = DeviceBreaker()
+            device.failures += 1
+            device.error = error
+            if device.state == HALF_OPEN or device.failures >= self.failure_threshold:
+                device.opens += 1
+                delay = self.backoff(device.opens)
+                device.state = OPEN
+                device.retry_at = self.clock() + delay
+                logger.warning("[%s] Circuit open after %d failure(s), next try in %.0fs: %s",
+                               name, device.failures, delay, error)
+
+    def reason(self, name):
+        """Why name is skipped, for its SwitchResult"""
+        device = self.devices.get(name)
+        if device is None:
+            return None
+        retry_in = max(0.0, device.retry_at - self.clock())
+        return f"circuit open after {device.failures} failure(s), next try in {retry_in:.0f}s"
+
+    def forget(self, name):
+        """Drop a switch's history, e.g. after its login changed"""
+        with self._lock:
+            self.devices.pop(name, None)
+
+    def snapshot(self):
+        """Breaker state of every switch that is failing, for status.json"""
+        now = self.clock()
+        with self._lock:
+            return {
+                name: {
+                    "state": device.state,
+                    "failures": device.failures,
+                    "retry_in": round(max(0.0, device.retry_at - now), 1) if device.state == OPEN else None,
+                    "error": device.error,
+                }
+                for name, device in self.devices.items()
+            }
+
+
+def breaker_from_config(config):
+    """CircuitBreaker for config.json, or None when "circuit_breaker" is false"""
+    if not config.get("circuit_breaker", True):
+        return None
+    return CircuitBreaker(
+        failure_threshold=config.get("breaker_failures", 3),
+        base_delay=config.get("breaker_base_seconds", 30),
+        max_delay=config.get("breaker_max_seconds", 900),
+        probe_timeout=config.get("probe_timeout", 2),
+    )
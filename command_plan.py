@@ -0,0 +1,141 @@
+"""
+Precompiled, validated command plans for the VLAN rotation.
+
+When the config is loaded, every port group is compiled once: its ports
+are collapsed into "interface range" headers and each header is checked
+to parse back into valid, canonical interfaces. A rotation step only
+differs in the VLAN, which VlanSequence has already validated, so every
+step of the cycle is known to be well-formed before anything is sent.
+
+A plan is an immutable tuple of commands with a short digest. A tick
+looks up its port groups' plans and sends them; only ports that
+reconciliation leaves behind when part of a group is already right
+are built on the spot. render_plans() lists the whole cycle offline,
+in a stable form that can be diffed between two configs.
+"""
+
+import hashlib
+
+from interfaces import MAX_RANGES_PER_COMMAND, build_headers, build_vlan_commands, parse_port_spec
+
+# Length of the hex digest shown for a plan
+DIGEST_LENGTH = 12
+
+
+def digest(*parts):
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()[:DIGEST_LENGTH]
+
+
+def validate_header(line):
+    """Raise ValueError unless line selects valid interfaces the way IOS accepts"""
+    if line.startswith("interface range "):
+        ranges = line[len("interface range "):].split(" , ")
+    elif line.startswith("interface "):
+        ranges = [line[len("interface "):]]
+        if ' - ' in ranges[0]:
+            raise ValueError(f"Invalid command in plan: {line}")
+    else:
+        raise ValueError(f"Invalid command in plan: {line}")
+    if len(ranges) > MAX_RANGES_PER_COMMAND:
+        raise ValueError(f"Too many ranges in one command: {line}")
+    for spec in ranges:
+        # Bare "1/0/10" names are valid, as interface_type() passes them through
+        parse_port_spec(spec)
+
+
+class CommandPlan:
+    """Immutable commands for one switch or port group step"""
+
+    __slots__ = ('commands', 'digest')
+
+    def __init__(self, commands, plan_digest):
+        self.commands = tuple(commands)
+        self.digest = plan_digest
+
+    def __len__(self):
+        return len(self.commands)
+
+    def __repr__(self):
+        return f"<CommandPlan {self.digest} ({len(self.commands)} commands)>"
+
+
+class GroupPlan:
+    """A port group's compiled headers; step(vlan) is its plan for a VLAN"""
+
+    __slots__ = ('headers', 'digest', 'ports')
+
+    def __init__(self, ports):
+        headers = build_headers(ports)
+        for line in headers:
+            validate_header(line)
+        self.headers = tuple(headers)
+        self.digest = digest(*headers)
+        self.ports = len(ports)
+
+    def step(self, vlan):
+        commands = []
+        for header in self.headers:
+            commands += [header, f"switchport access vlan {vlan}", "exit"]
+        return CommandPlan(commands, digest(self.digest, vlan))
+
+
+def compile_plans(switch):
+    """Compile the plan of every port group of a normalized switch"""
+    for group in switch["port_groups"]:
+        try:
+            group["plan"] = GroupPlan(group["ports"])
+        except ValueError as e:
+            raise ValueError(f"Switch {switch['name']} port group {group['name']}: {e}")
+
+
+def plan_commands(switch, vlans, changes=None):
+    """The plan applying one tick to a switch
+
+    vlans is the target VLAN per port group, as rotate_switch returns
+    it. With changes (port -> VLAN, from reconciliation) groups that
+    are entirely in it use their compiled plan, groups partly in it
+    have just those ports built, and groups not in it are left out.
+    Groups missing from vlans (held by their schedule) are left out too.
+    """
+    commands = []
+    digests = []
+    rest = {}
+    for group in switch["port_groups"]:
+        if group["name"] not in vlans:
+            continue
+        if changes is not None:
+            moved = [port for port in group["ports"] if port in changes]
+            if len(moved) < len(group["ports"]):
+                rest.update((port, changes[port]) for port in moved)
+                continue
+        plan = group["plan"].step(vlans[group["name"]])
+        commands += plan.commands
+        digests.append(plan.digest)
+    if rest:
+        partial = build_vlan_commands(rest)
+        commands += partial
+        digests.append(digest(*partial))
+    return CommandPlan(commands, digest(*digests))
+
+
+def render_plans(switches, steps=None):
+    """Text listing of every switch's rotation cycle, for inspection and diffs
+
+    Each port group is listed from the first VLAN of its list, one
+    block per step. steps limits the number of steps per group.
+    """
+    lines = []
+    for switch in switches:
+        lines.append(f"switch {switch['name']} ({switch['switch_ip']})")
+        for group in switch["port_groups"]:
+            plan = group["plan"]
+            lines.append(f"  group {group['name']}: {', '.join(group['interfaces'])} "
+                         f"({plan.ports} ports), VLANs {group['vlans']}, template {plan.digest}")
+            for index, vlan in enumerate(group["vlans"]):
+                if steps is not None and index >= steps:
+                    lines.append(f"    ... {len(group['vlans']) - steps} more step(s)")
+                    break
+                step = plan.step(vlan)
+                lines.append(f"    step {index + 1} vlan {vlan} plan {step.digest}")
+                lines += [f"      {command}" for command in step.commands]
+    return lines
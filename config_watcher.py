@@ -0,0 +1,146 @@
+"""
+Hot reload of config.json for the VLAN switcher service.
+
+ConfigWatcher checks the file with a single stat() while the service
+waits for its next deadline and only parses it when the modification
+time, size or inode changed. ConfigDiff then says what an edit
+touched, so the service can apply just that: a new interval keeps the
+schedule's grid, and only switches that were removed or now log in
+differently lose their sessions. A file that does not parse is logged
+and ignored until it changes again.
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from deadline_scheduler import interval_from_config
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of config.json while the service is idle
+POLL_INTERVAL = 5
+
+# Settings whose change means the switching engine has to be rebuilt
+ENGINE_KEYS = ('engine', 'max_workers', 'switch_timeout',
+               'reconcile', 'reconcile_command', 'reconcile_max_age',
+               'circuit_breaker', 'breaker_failures', 'breaker_base_seconds', 'breaker_max_seconds',
+               'probe_timeout', 'shard_processes', 'shard_engine',
+               'rate_limit', 'max_sessions_per_device', 'login_rate', 'login_burst', 'aaa_groups', 'rate_limit_wait')
+
+# Fields that identify a switch login; a change needs a new session
+LOGIN_KEYS = ('switch_ip', 'port', 'device_type', 'username')
+
+# Settings that are handled elsewhere or per switch
+IGNORED_KEYS = ('switches',)
+
+
+def switch_signature(switch):
+    """Everything about a switch a reload may change, minus rotation state"""
+    return (
+        tuple(switch.get(key) for key in LOGIN_KEYS + ('password', 'enable_password', 'credential_profile')),
+        tuple((group["name"], tuple(group["ports"]), group["vlans"], group["schedule"])
+              for group in switch["port_groups"]),
+    )
+
+
+class ConfigDiff:
+    """What changed between two versions of the config"""
+
+    def __init__(self, old_config, new_config, old_switches, new_switches):
+        old = {switch["name"]: switch for switch in old_switches}
+        new = {switch["name"]: switch for switch in new_switches}
+        self.added = [name for name in new if name not in old]
+        self.removed = [old[name] for name in old if name not in new]
+        # Old definitions of switches whose login changed
+        self.relogin = [old[name] for name in old if name in new and
+                        tuple(old[name].get(key) for key in LOGIN_KEYS) !=
+                        tuple(new[name].get(key) for key in LOGIN_KEYS)]
+        self.changed = [name for name in new if name in old and
+                        switch_signature(old[name]) != switch_signature(new[name])]
+        old_interval = interval_from_config(old_config)
+        new_interval = interval_from_config(new_config)
+        self.interval = new_interval if new_interval != old_interval else None
+        keys = (set(old_config) | set(new_config)) - set(IGNORED_KEYS)
+        self.settings = sorted(key for key in keys if old_config.get(key) != new_config.get(key))
+
+    @property
+    def stale_switches(self):
+        """Switches whose sessions have to be closed"""
+        return self.removed + self.relogin
+
+    @property
+    def engine_changed(self):
+        return any(key in self.settings for key in ENGINE_KEYS)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed or self.settings)
+
+    def summary(self):
+        parts = []
+        if self.interval is not None:
+            parts.append(f"interval {self.interval:g}s")
+        if self.added:
+            parts.append(f"added {', '.join(self.added)}")
+        if self.removed:
+            parts.append(f"removed {', '.join(switch['name'] for switch in self.removed)}")
+        if self.changed:
+            parts.append(f"changed {', '.join(self.changed)}")
+        if self.settings:
+            parts.append(f"settings {', '.join(self.settings)}")
+        return "; ".join(parts) or "no changes"
+
+
+class ConfigWatcher:
+    """Notices edits of config.json with one stat() per check"""
+
+    def __init__(self, path, poll_interval=POLL_INTERVAL):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self._signature = self._stat()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def poll(self):
+        """Return the new config if the file changed since the last call, else None"""
+        signature = self._stat()
+        if signature == self._signature:
+            return None
+        self._signature = signature
+        if signature is None:
+            logger.warning(f"Configuration file disappeared: {self.path}")
+            return None
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            # A later save changes the signature again and is retried
+            logger.warning(f"Ignoring unreadable configuration change: {e}")
+            return None
+
+    def wait(self, wait_for_stop, timeout):
+        """Wait like wait_for_stop(timeout), checking the file meanwhile
+
+        Returns (stopped, config): config is the new config as soon as
+        the file changes, in which case the wait ends early.
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if end is None else max(0.0, end - time.monotonic())
+            step = self.poll_interval if remaining is None else min(self.poll_interval, remaining)
+            if wait_for_stop(step):
+                return True, None
+            # Poll after the last step too, or a timeout under
+            # poll_interval would never see a change
+            config = self.poll()
+            if config is not None:
+                return False, config
+            if remaining is not None and remaining <= step:
+                return False, None
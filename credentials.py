@@ -0,0 +1,124 @@
+"""
+Cached credential provider for the VLAN switcher.
+
+Resolves switch secrets from the OS keyring once and keeps them in
+memory for a TTL, so keyring backends stay out of the per-tick path.
+Switches may name a "credential_profile" to use their own set of
+secrets. The GUI invalidates every running provider after changing
+credentials by touching an epoch file that the service checks with a
+single stat() per tick.
+"""
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Keyring entry names for each secret field of a switch
+SECRET_KEYS = (
+    ('password', 'switch_password'),
+    ('enable_password', 'switch_enable_password'),
+)
+
+
+def keyring_key(key, profile=None):
+    """Keyring entry name of a secret, optionally scoped to a profile"""
+    return f"{profile}:{key}" if profile else key
+
+
+def epoch_file_for(base_dir):
+    """Path of the credentials epoch file under base_dir"""
+    return Path(base_dir) / "state" / "credentials.epoch"
+
+
+def invalidate_credentials(base_dir):
+    """Tell every credential provider using base_dir to drop its cache"""
+    epoch_file = epoch_file_for(base_dir)
+    epoch_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(epoch_file, 'w') as f:
+        f.write(str(time.time()))
+
+
+class CredentialProvider:
+    """Resolves keyring secrets once and caches them for ttl seconds"""
+
+    def __init__(self, keyring_service="VLANSwitcher", ttl=3600, epoch_file=None, clock=time.monotonic):
+        self.keyring_service = keyring_service
+        self.ttl = ttl
+        self.epoch_file = Path(epoch_file) if epoch_file else None
+        self.clock = clock
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._epoch = self._read_epoch()
+        self.keyring_calls = 0
+
+    def _read_epoch(self):
+        if self.epoch_file is None:
+            return None
+        try:
+            return os.stat(self.epoch_file).st_mtime_ns
+        except OSError:
+            return None
+
+    def check_epoch(self):
+        """Drop the cache if credentials were changed by another process"""
+        epoch = self._read_epoch()
+        if epoch != self._epoch:
+            self._epoch = epoch
+            self.invalidate()
+            logger.info("Credentials changed, cached secrets cleared")
+
+    def get(self, key, profile=None):
+        """Return a secret from the cache or the keyring, or None"""
+        name = keyring_key(key, profile)
+        now = self.clock()
+        with self._lock:
+            cached = self._cache.get(name)
+            if cached and cached[1] > now:
+                return cached[0]
+
+        try:
+            # Import here so tools that never touch secrets don't load keyring
+            import keyring
+            self.keyring_calls += 1
+            value = keyring.get_password(self.keyring_service, name)
+        except Exception as e:
+            logger.warning(f"Could not retrieve stored credential {name}: {e}")
+            return None
+
+        with self._lock:
+            self._cache[name] = (value, now + self.ttl)
+        return value
+
+    def invalidate(self, key=None, profile=None):
+        """Forget one cached secret, or all of them"""
+        with self._lock:
+            if key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(keyring_key(key, profile), None)
+
+    def apply(self, switches):
+        """Fill in secrets that config.json leaves out of each switch
+
+        Fields given in config.json are left alone. Returns the names of
+        switches that still have no password.
+        """
+        missing = []
+        for switch in switches:
+            from_keyring = switch.setdefault("keyring_fields", set())
+            for field, key in SECRET_KEYS:
+                if field in switch and field not in from_keyring:
+                    continue
+                value = self.get(key, switch.get("credential_profile"))
+                if value:
+                    if field not in from_keyring:
+                        logger.info(f"[{switch['name']}] Using securely stored {field.replace('_', ' ')}")
+                    switch[field] = value
+                    from_keyring.add(field)
+            if not switch.get("password"):
+                missing.append(switch["name"])
+        return missing
@@ -0,0 +1,175 @@
+"""
+Drift-free deadline scheduler for the VLAN switcher.
+
+Replaces the `schedule` package plus one-second polling. Every job fires
+on a fixed grid (start + n * interval) of the monotonic clock, so a slow
+switch never pushes later ticks back, and the service loop sleeps
+exactly until the next deadline or a stop request. A TimelineJob
+fires instead whenever a timeline (timeline.py) has its next change.
+"""
+
+import heapq
+import itertools
+import math
+import time
+
+# What to do when the loop wakes up after one or more deadlines passed
+MISSED_TICK_POLICIES = ('skip', 'catch_up', 'delay')
+
+
+def interval_from_config(config):
+    """Return the switch interval in seconds
+
+    "schedule_seconds" (may be fractional) takes precedence over the
+    older "schedule_minutes".
+    """
+    if config.get("schedule_seconds") is not None:
+        interval = float(config["schedule_seconds"])
+    else:
+        interval = float(config.get("schedule_minutes", 1)) * 60
+    if interval <= 0:
+        raise ValueError("Schedule interval must be positive")
+    return interval
+
+
+class Job:
+    """A callable that fires every interval seconds"""
+
+    def __init__(self, func, interval, origin, missed='skip', name=None):
+        if missed not in MISSED_TICK_POLICIES:
+            raise ValueError(f"Unknown missed tick policy: {missed}")
+        self.func = func
+        self.interval = interval
+        self.origin = origin
+        self.missed = missed
+        self.name = name or getattr(func, '__name__', 'job')
+        self.ticks = 1
+        self.runs = 0
+        self.skipped = 0
+        self.cancelled = False
+
+    @property
+    def deadline(self):
+        # Multiply rather than accumulate, so float error cannot build up
+        return self.origin + self.ticks * self.interval
+
+    def advance(self, now):
+        """Move to the next deadline after the one that just fired"""
+        self.ticks += 1
+        if self.deadline > now or self.missed == 'catch_up':
+            return
+        if self.missed == 'skip':
+            behind = math.floor((now - self.origin) / self.interval) + 1
+            self.skipped += behind - self.ticks
+            self.ticks = behind
+        else:
+            # 'delay': restart the grid from now
+            self.origin = now
+            self.ticks = 1
+
+
+class TimelineJob:
+    """A callable that fires whenever a timeline's next change is due
+
+    The timeline speaks wall-clock time; deadlines are converted to the
+    scheduler's clock each time the job is pushed.
+    """
+
+    def __init__(self, func, timeline, now, wall_clock=time.time, name=None):
+        self.func = func
+        self.timeline = timeline
+        self.wall_clock = wall_clock
+        self.missed = 'skip'
+        self.name = name or getattr(func, '__name__', 'job')
+        self.runs = 0
+        self.skipped = 0
+        self.cancelled = False
+        self.deadline = None
+        self.advance(now)
+
+    def advance(self, now):
+        """Move to the timeline's next change; changes passed meanwhile are not replayed"""
+        wall = self.wall_clock()
+        change = self.timeline.next_change(wall)
+        self.deadline = None if change is None else now + max(0.0, change - wall)
+
+
+class DeadlineScheduler:
+    """Heap of jobs ordered by their next deadline"""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._heap = []
+        self._counter = itertools.count()
+
+    def every(self, interval, func, missed='skip', name=None, start=None):
+        """Run func every interval seconds, first at start + interval"""
+        if interval <= 0:
+            raise ValueError("Interval must be positive")
+        origin = self.clock() if start is None else start
+        job = Job(func, interval, origin, missed, name)
+        self._push(job)
+        return job
+
+    def follow(self, timeline, func, name=None, wall_clock=time.time):
+        """Run func whenever timeline.next_change() comes due"""
+        job = TimelineJob(func, timeline, self.clock(), wall_clock, name)
+        self._push(job)
+        return job
+
+    def _push(self, job):
+        if job.deadline is None:
+            # Nothing left to wait for
+            return
+        heapq.heappush(self._heap, (job.deadline, next(self._counter), job))
+
+    def cancel(self, job):
+        """Stop a job from firing again"""
+        job.cancelled = True
+
+    def reschedule(self, job, interval, missed=None):
+        """Change a job's interval, keeping its last deadline as the new origin"""
+        self.cancel(job)
+        new_job = Job(job.func, interval, job.deadline - job.interval, missed or job.missed, job.name)
+        self._push(new_job)
+        return new_job
+
+    @property
+    def jobs(self):
+        return [job for _, _, job in self._heap if not job.cancelled]
+
+    def next_deadline(self):
+        """Monotonic time of the earliest pending deadline, or None"""
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def run_pending(self):
+        """Run every job whose deadline has passed; return how many ran"""
+        ran = 0
+        now = self.clock()
+        while True:
+            deadline = self.next_deadline()
+            if deadline is None or deadline > now:
+                return ran
+            _, _, job = heapq.heappop(self._heap)
+            job.func()
+            job.runs += 1
+            ran += 1
+            now = self.clock()
+            job.advance(now)
+            if not job.cancelled:
+                self._push(job)
+
+    def run(self, wait_for_stop):
+        """Sleep until each deadline and run due jobs until asked to stop
+
+        wait_for_stop(timeout) must block for up to timeout seconds and
+        return True as soon as a stop has been requested.
+        """
+        while True:
+            deadline = self.next_deadline()
+            timeout = None if deadline is None else max(0.0, deadline - self.clock())
+            if wait_for_stop(timeout):
+                return
+            self.run_pending()
@@ -0,0 +1,485 @@
+"""
+Multi-switch fleet support for the VLAN switcher.
+
+A config.json may hold a "switches" list instead of a single switch_ip.
+Each entry carries its own interfaces and VLAN rotation and inherits
+credentials and other settings from the top level when not given.
+A switch may also split its ports into "port_groups", each rotating
+through its own VLAN list; VLAN lists may use ranges such as
+"100-199,300" and are kept as a compact VlanSequence. The FleetEngine pushes one tick to every
+switch concurrently with a bounded number of worker threads, sending
+all of a switch's port changes in a single config transaction; with
+reconciliation (reconcile.py) only ports not already on their target
+VLAN are part of it. Logins and sessions go through the rate limiter
+(rate_limit.py). Port groups with a "schedule" (timeline.py) are
+switched when their timeline says so; groups held for a tick keep
+their VLAN.
+"""
+
+import contextlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from circuit_breaker import breaker_from_config, probe_ssh
+from command_plan import compile_plans, plan_commands
+from interfaces import expand_ports
+from log_pipeline import Truncated
+from rate_limit import RateLimited, rate_limiter_from_config
+from reconcile import log_drift, reconciler_from_config
+from session_pool import get_shared_pool, network_errors
+from timeline import parse_schedule
+from vlan_sequence import VlanSequence
+
+logger = logging.getLogger(__name__)
+
+# Output that means the switch refused part of a config set
+CONFIG_ERROR_PATTERN = r"% Invalid|% Incomplete"
+
+# Top-level settings a switch entry inherits when it does not set them
+INHERITED_KEYS = ('username', 'password', 'enable_password', 'interface', 'interfaces', 'vlans',
+                  'schedule', 'aaa_group')
+
+
+def load_switches(config):
+    """Normalize a config dict into a list of switch dicts
+
+    A legacy single-switch config becomes a fleet of one.
+    """
+    entries = config.get("switches")
+    if entries is None:
+        entries = [{k: config[k] for k in ("switch_ip", "port", "device_type", "port_groups", "credential_profile")
+                    if k in config}]
+
+    switches = []
+    names = set()
+    for index, entry in enumerate(entries):
+        switch = {k: config[k] for k in INHERITED_KEYS if k in config}
+        switch.update(entry)
+
+        if not switch.get("switch_ip"):
+            raise ValueError(f"Switch #{index + 1} has no switch_ip")
+
+        # A credential profile replaces inherited login details; secrets
+        # it does not spell out come from the keyring under its name
+        profile = switch.get("credential_profile")
+        if profile:
+            profile_settings = config.get("credential_profiles", {}).get(profile, {})
+            for key in ('username', 'password', 'enable_password'):
+                if key in entry:
+                    continue
+                if key in profile_settings:
+                    switch[key] = profile_settings[key]
+                elif key != 'username':
+                    switch.pop(key, None)
+
+        # The entry's own interface(s) win over inherited ones
+        source = entry if ("interface" in entry or "interfaces" in entry) else switch
+        interfaces = source.get("interfaces") or ([source["interface"]] if source.get("interface") else [])
+        switch.pop("interface", None)
+        switch["interfaces"] = list(interfaces)
+        switch.setdefault("name", switch["switch_ip"])
+        switch["vlans"] = parse_vlans(switch, switch.get("vlans", ()))
+        switch["index"] = index
+
+        switch["port_groups"] = load_port_groups(switch)
+        compile_plans(switch)
+        if switch["name"] in names:
+            raise ValueError(f"Duplicate switch name: {switch['name']}")
+        names.add(switch["name"])
+
+        switches.append(switch)
+    return switches
+
+
+def parse_vlans(switch, spec, group=None):
+    """VlanSequence for a switch or port group's VLAN list"""
+    try:
+        return VlanSequence(spec)
+    except ValueError as e:
+        where = f"Switch {switch['name']}" + (f" port group {group}" if group else "")
+        raise ValueError(f"{where}: {e}")
+
+
+def load_port_groups(switch):
+    """Build the port groups of a normalized switch
+
+    Without explicit "port_groups" the switch's interfaces and VLANs
+    form a single default group.
+    """
+    entries = switch.get("port_groups")
+    if not entries:
+        entries = [{"name": "default", "interfaces": switch["interfaces"], "vlans": switch["vlans"]}]
+        indexes = [None]
+    else:
+        indexes = range(len(entries))
+
+    groups = []
+    seen = {}
+    for index, entry in zip(indexes, entries):
+        name = entry.get("name", f"group{len(groups) + 1}")
+        specs = entry.get("interfaces") or ([entry["interface"]] if entry.get("interface") else [])
+        vlans = parse_vlans(switch, entry.get("vlans", switch["vlans"]), name)
+        group = {
+            "name": name,
+            "interfaces": list(specs),
+            "ports": expand_ports(specs),
+            "vlans": vlans,
+            "index": index,
+            "cursor": 0,
+            # Last VLAN applied to the group's ports and when, once known
+            "vlan": None,
+            "switched_at": None,
+            "schedule": parse_schedule(entry.get("schedule", switch.get("schedule")), vlans,
+                                       f"Switch {switch['name']} port group {name}"),
+        }
+        if not group["ports"]:
+            raise ValueError(f"Switch {switch['name']} port group {name} has no interfaces configured")
+        if not group["vlans"]:
+            raise ValueError(f"Switch {switch['name']} port group {name} has no VLANs configured")
+        for port in group["ports"]:
+            if port in seen:
+                raise ValueError(f"Switch {switch['name']}: {port} is in port groups {seen[port]} and {name}")
+            seen[port] = name
+        groups.append(group)
+    return groups
+
+
+def rotation_key(switch, group):
+    """Key a port group's rotation state is journaled under"""
+    return f"{switch['name']}/{group['name']}"
+
+
+def restore_rotation(switches, journal):
+    """Resume each port group's rotation from the state journal
+
+    Resumes after the last VLAN applied when it is still in the list,
+    so editing the VLAN list does not restart the rotation.
+    """
+    for switch in switches:
+        for group in switch["port_groups"]:
+            state = journal.get(rotation_key(switch, group))
+            if not state:
+                continue
+            group["vlan"] = state.get("vlan")
+            group["switched_at"] = state.get("time")
+            if state.get("vlan") in group["vlans"]:
+                group["cursor"] = (group["vlans"].index(state["vlan"]) + 1) % len(group["vlans"])
+            else:
+                group["cursor"] = state.get("cursor", 0) % len(group["vlans"])
+
+
+def carry_rotation(old_switches, new_switches):
+    """Keep the rotation position of switches that survive a config reload
+
+    Port groups are matched by switch and group name; like
+    restore_rotation, a group resumes after its last VLAN when that is
+    still in the (possibly edited) list.
+    """
+    old_groups = {(switch["name"], group["name"]): group
+                  for switch in old_switches for group in switch["port_groups"]}
+    for switch in new_switches:
+        for group in switch["port_groups"]:
+            old = old_groups.get((switch["name"], group["name"]))
+            if old is None:
+                continue
+            group["vlan"] = old["vlan"]
+            group["switched_at"] = old["switched_at"]
+            if old["vlans"] == group["vlans"]:
+                group["cursor"] = old["cursor"]
+            elif old["vlan"] in group["vlans"]:
+                group["cursor"] = (group["vlans"].index(old["vlan"]) + 1) % len(group["vlans"])
+            else:
+                group["cursor"] = old["cursor"] % len(group["vlans"])
+
+
+def record_rotation(journal, switches, report):
+    """Journal the new rotation state of every switch that switched"""
+    switched = {result.name: result for result in report.succeeded}
+    for switch in switches:
+        result = switched.get(switch["name"])
+        if result is None:
+            continue
+        for group in switch["port_groups"]:
+            if group["name"] not in result.vlans:
+                # Held by its schedule this tick
+                continue
+            group["vlan"] = result.vlans[group["name"]]
+            group["switched_at"] = report.started
+            journal.record(
+                rotation_key(switch, group),
+                cursor=group["cursor"],
+                vlan=group["vlan"],
+                ports=len(group["ports"]),
+            )
+    journal.commit()
+
+
+def build_device(switch):
+    """Build the netmiko device dict for a switch"""
+    return {
+        'device_type': switch.get("device_type", 'cisco_ios'),
+        'host': switch["switch_ip"],
+        'port': switch.get("port", 22),
+        'username': switch["username"],
+        'password': switch["password"],
+        'secret': switch.get("enable_password", ""),
+        'timeout': 10,
+    }
+
+
+def rotate_switch(switch):
+    """Rotate every port group of a switch to its next VLAN
+
+    Groups held by their schedule are left out. Returns the new VLAN
+    per port group and the target VLAN per port.
+    """
+    assignments = {}
+    vlans = {}
+    for group in switch["port_groups"]:
+        if group.get("hold"):
+            continue
+        vlan = group["vlans"][group["cursor"]]
+        group["cursor"] = (group["cursor"] + 1) % len(group["vlans"])
+        vlans[group["name"]] = vlan
+        for port in group["ports"]:
+            assignments[port] = vlan
+        logger.info("[%s] Switching to VLAN %s on interface %s", switch['name'], vlan, ', '.join(group['interfaces']))
+    return vlans, assignments
+
+
+def create_engine(config, session_pool=None):
+    """Create the switching engine selected by config["engine"]"""
+    if config.get("engine", "threads") == "sharded":
+        # Import here so single-process engines do not start worker processes
+        from sharding import ShardedEngine
+        return ShardedEngine(config, processes=config.get("shard_processes"),
+                             switch_timeout=config.get("switch_timeout", 30))
+    options = {
+        'switch_timeout': config.get("switch_timeout", 30),
+        'reconciler': reconciler_from_config(config),
+        'breaker': breaker_from_config(config),
+        'limiter': rate_limiter_from_config(config),
+    }
+    if config.get("engine", "threads") == "async":
+        # Import here so asyncssh is only needed when it is used
+        from async_engine import AsyncEngineRunner
+        return AsyncEngineRunner(max_concurrency=config.get("max_workers", 200), **options)
+    return FleetEngine(session_pool, max_workers=config.get("max_workers", 16), **options)
+
+
+class SwitchResult:
+    """Outcome of one switch's part of a tick"""
+
+    def __init__(self, name, vlans=None, ok=False, error=None, duration=0.0, phases=None, retries=0,
+                 pushed=None, drift=None, skipped=False, written=None):
+        self.name = name
+        self.vlans = vlans or {}
+        self.ok = ok
+        self.error = error
+        self.duration = duration
+        # Seconds spent in "dns", "connect", "enable", "show" and "config_push"
+        self.phases = phases if phases is not None else {}
+        # Reconnects after a pooled session turned out to be dead
+        self.retries = retries
+        # With reconciliation: ports written, and ports found on another
+        # VLAN than expected as port -> (expected, actual)
+        self.pushed = pushed
+        self.drift = drift if drift is not None else {}
+        # Ports the push wrote, as port -> VLAN
+        self.written = written if written is not None else {}
+        # Not attempted this tick (circuit open, service stopping);
+        # neither a success nor a failure
+        self.skipped = skipped
+
+    @property
+    def vlan(self):
+        """Target VLAN(s) of the switch, for display"""
+        return ", ".join(sorted(set(self.vlans.values()))) or None
+
+    def __repr__(self):
+        status = "ok" if self.ok else f"failed: {self.error}"
+        return f"<SwitchResult {self.name} vlan={self.vlan} {status}>"
+
+
+class TickReport:
+    """Per-switch results of a single fleet tick"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.duration = 0.0
+        self.results = []
+
+    @property
+    def succeeded(self):
+        return [r for r in self.results if r.ok]
+
+    @property
+    def failed(self):
+        return [r for r in self.results if not r.ok and not r.skipped]
+
+    @property
+    def skipped(self):
+        return [r for r in self.results if r.skipped]
+
+    def summary(self):
+        text = (f"Tick finished in {self.duration:.2f}s: "
+                f"{len(self.succeeded)} switched, {len(self.failed)} failed")
+        if self.skipped:
+            text += f", {len(self.skipped)} skipped"
+        pushed = [r.pushed for r in self.results if r.pushed is not None]
+        if pushed:
+            drifted = sum(len(r.drift) for r in self.results)
+            text += f", {sum(pushed)} port(s) written, {drifted} drifted"
+        return text
+
+
+def record_breakers(breaker, report):
+    """Feed a tick's results to the circuit breaker, if there is one"""
+    if breaker is None:
+        return
+    for result in report.results:
+        if not result.skipped:
+            breaker.record(result.name, result.ok, result.error)
+
+
+class FleetEngine:
+    """Pushes VLAN changes to every switch in the fleet concurrently"""
+
+    def __init__(self, session_pool=None, max_workers=16, switch_timeout=30, reconciler=None, breaker=None,
+                 limiter=None):
+        self.session_pool = session_pool or get_shared_pool()
+        self.max_workers = max_workers
+        self.switch_timeout = switch_timeout
+        # Reads actual port VLANs so only differing ports are written
+        self.reconciler = reconciler
+        # Skips switches that keep failing until a probe finds them back
+        self.breaker = breaker
+        # Caps sessions per device and paces logins
+        self.limiter = limiter
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vlan-switch")
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+    def switch_one(self, switch):
+        """Rotate each port group of a switch and push all changes at once"""
+        start = time.perf_counter()
+        name = switch["name"]
+        if self.breaker is not None and self.breaker.probing(name):
+            try:
+                probe_ssh(switch["switch_ip"], switch.get("port", 22), self.breaker.probe_timeout)
+            except OSError as e:
+                with self._lock:
+                    self._in_flight.discard(name)
+                return SwitchResult(name, error=f"Probe failed: {e}", duration=time.perf_counter() - start)
+        # Put back if the switch does not get its turn
+        cursors = [group["cursor"] for group in switch["port_groups"]]
+        vlans, assignments = rotate_switch(switch)
+        reconciler = self.reconciler
+        phases = {}
+        counters = {}
+        outcome = {}
+
+        def push(connection):
+            changes = None
+            if reconciler is not None:
+                if reconciler.needs_refresh(name):
+                    show_start = time.perf_counter()
+                    drift = reconciler.refresh(name, connection.send_command(reconciler.show_command))
+                    phases['show'] = time.perf_counter() - show_start
+                    outcome['drift'] = drift
+                changes = reconciler.changes(name, assignments)
+                outcome['pushed'] = len(changes)
+                if not changes:
+                    return ""
+            plan = plan_commands(switch, vlans, changes)
+            logger.debug("[%s] Sending plan %s", name, plan.digest)
+            output = connection.send_config_set(list(plan.commands), error_pattern=CONFIG_ERROR_PATTERN)
+            outcome['written'] = changes if changes is not None else assignments
+            if reconciler is not None:
+                reconciler.applied(name, changes)
+            return output
+
+        limiter = self.limiter
+        login = None if limiter is None else (lambda: limiter.login(switch, phases))
+        try:
+            with limiter.slot(switch, phases) if limiter is not None else contextlib.nullcontext():
+                output = self.session_pool.run(build_device(switch), push, phases, counters, login)
+            logger.debug("[%s] Switch output: %s", name, Truncated(output))
+            result = SwitchResult(name, vlans, True)
+        except RateLimited as e:
+            # Not attempted, so the rotation step is not used up
+            for group, cursor in zip(switch["port_groups"], cursors):
+                group["cursor"] = cursor
+            result = SwitchResult(name, error=str(e), skipped=True)
+        except network_errors() as e:
+            result = SwitchResult(name, vlans, False, error=f"Network error: {e}")
+        except Exception as e:
+            result = SwitchResult(name, vlans, False, error=str(e))
+        finally:
+            with self._lock:
+                self._in_flight.discard(name)
+
+        if not result.ok and reconciler is not None:
+            # The push may have been applied partly; read again next time
+            reconciler.forget(name)
+        # The pool times the whole exchange as config_push
+        if 'show' in phases and 'config_push' in phases:
+            phases['config_push'] -= phases['show']
+        result.duration = time.perf_counter() - start
+        result.phases = phases
+        result.retries = counters.get('retries', 0)
+        result.pushed = outcome.get('pushed')
+        result.written = outcome.get('written', {}) if result.ok else {}
+        result.drift = outcome.get('drift', {})
+        log_drift(name, result.drift)
+        return result
+
+    def run_tick(self, switches):
+        """Switch every device once and collect the results
+
+        Returns after all switches finish or switch_timeout passes,
+        whichever is first. A switch still busy from an earlier tick is
+        skipped rather than queued behind itself.
+        """
+        report = TickReport()
+        start = time.perf_counter()
+        futures = {}
+
+        for switch in switches:
+            if self.breaker is not None and not self.breaker.allow(switch["name"]):
+                report.results.append(SwitchResult(switch["name"], error=self.breaker.reason(switch["name"]),
+                                                   skipped=True))
+                continue
+            with self._lock:
+                if switch["name"] in self._in_flight:
+                    # Counts as a failure: a switch that hangs this long is what the breaker is for
+                    report.results.append(SwitchResult(switch["name"], error="previous tick still running"))
+                    continue
+                self._in_flight.add(switch["name"])
+            futures[self.executor.submit(self.switch_one, switch)] = switch
+
+        done, not_done = wait(futures, timeout=self.switch_timeout)
+        for future in done:
+            report.results.append(future.result())
+        for future in not_done:
+            report.results.append(SwitchResult(futures[future]["name"],
+                                               error=f"no response within {self.switch_timeout}s"))
+
+        report.duration = time.perf_counter() - start
+        record_breakers(self.breaker, report)
+        return report
+
+    def close_switches(self, switches):
+        """Log out of the given switches, leaving every other session open"""
+        for switch in switches:
+            self.session_pool.close(build_device(switch))
+            if self.reconciler is not None:
+                self.reconciler.forget(switch["name"])
+            if self.breaker is not None:
+                self.breaker.forget(switch["name"])
+
+    def shutdown(self):
+        """Stop accepting work; running switches are left to finish"""
+        self.executor.shutdown(wait=False)
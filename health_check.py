@@ -0,0 +1,181 @@
+"""
+Tiered, concurrent health check of every configured switch.
+
+Each switch is checked up to the requested tier, cheapest first:
+    reach   TCP connect and read the SSH banner, with a tight timeout
+    login   log in over SSH with the switch's credentials
+    enable  enter privileged exec mode
+and stops at the first tier that fails. All switches are checked at
+once from one event loop, so an unreachable switch costs its timeout
+and not a place in a queue; logins wait for the rate limiter, if one
+is given, like the service's do. Results are handed to a callback as they
+arrive; the GUI streams them into its status area.
+"""
+
+import asyncio
+import contextlib
+import logging
+import queue
+import threading
+import time
+
+from fleet import build_device
+
+logger = logging.getLogger(__name__)
+
+TIERS = ('reach', 'login', 'enable')
+
+
+class CheckResult:
+    """How far one switch got through the tiers"""
+
+    def __init__(self, name, host, port, tier):
+        self.name = name
+        self.host = host
+        self.port = port
+        # Highest tier that was asked for
+        self.tier = tier
+        # Tiers passed so far, with the seconds each took
+        self.passed = {}
+        self.banner = None
+        self.failed_tier = None
+        self.error = None
+        # Seconds spent waiting for the rate limiter
+        self.queued = 0.0
+
+    @property
+    def ok(self):
+        return self.failed_tier is None and self.tier in self.passed
+
+    @property
+    def duration(self):
+        return sum(self.passed.values())
+
+    def summary(self):
+        where = f"{self.name} ({self.host}:{self.port})"
+        if self.ok:
+            steps = ", ".join(f"{tier} {seconds * 1000:.0f} ms" for tier, seconds in self.passed.items())
+            if self.queued >= 0.001:
+                steps += f" (queued {self.queued * 1000:.0f} ms)"
+            return f"✓ {where}: {steps}" + (f" [{self.banner}]" if self.banner else "")
+        return f"✗ {where}: {self.failed_tier} failed: {self.error}"
+
+    def __repr__(self):
+        status = "ok" if self.ok else f"{self.failed_tier} failed: {self.error}"
+        return f"<CheckResult {self.name} {status}>"
+
+
+async def read_banner(host, port, timeout):
+    """Connect and return the server's SSH identification line"""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        line = await asyncio.wait_for(reader.readline(), timeout)
+    finally:
+        writer.close()
+    banner = line.decode('ascii', 'replace').strip()
+    if not banner.startswith("SSH-"):
+        raise ConnectionError(f"not an SSH server: {banner[:40]!r}" if banner else "no SSH banner")
+    return banner
+
+
+async def check_switch(switch, tier='reach', timeout=2.0, login_timeout=10.0, limiter=None):
+    """Check one switch up to tier and return its CheckResult"""
+    result = CheckResult(switch["name"], switch["switch_ip"], switch.get("port", 22), tier)
+    wanted = TIERS[:TIERS.index(tier) + 1]
+    session = None
+    current = 'reach'
+    waits = {}
+    # Holds the device's session slot, if one is taken, until the session is closed
+    async with contextlib.AsyncExitStack() as stack:
+        try:
+            start = time.perf_counter()
+            result.banner = await read_banner(result.host, result.port, timeout)
+            result.passed['reach'] = time.perf_counter() - start
+            if 'login' in wanted:
+                current = 'login'
+                # Import here so a reachability check does not need asyncssh
+                from async_engine import AsyncIOSSession
+                device = build_device(switch)
+                if limiter is not None:
+                    await stack.enter_async_context(limiter.slot_async(switch, waits))
+                    await limiter.login_async(switch, waits)
+                start = time.perf_counter()
+                session = await AsyncIOSSession.connect(device, login_timeout)
+                result.passed['login'] = time.perf_counter() - start
+            if 'enable' in wanted:
+                current = 'enable'
+                start = time.perf_counter()
+                await asyncio.wait_for(session.enable(device['secret']), login_timeout)
+                result.passed['enable'] = time.perf_counter() - start
+        except asyncio.TimeoutError:
+            result.failed_tier = current
+            result.error = "timed out"
+        except KeyError as e:
+            result.failed_tier = current
+            result.error = f"no {e.args[0]} configured"
+        except Exception as e:
+            result.failed_tier = current
+            result.error = str(e) or type(e).__name__
+        finally:
+            if session is not None:
+                session.close()
+    result.queued = waits.get('queue', 0.0)
+    return result
+
+
+class HealthCheck:
+    """Checks every switch concurrently, reporting each as it finishes
+
+    on_result is called with every CheckResult from the checking
+    thread; results are also put on the results queue, which a UI can
+    drain from its own thread.
+    """
+
+    def __init__(self, switches, tier='reach', timeout=2.0, login_timeout=10.0, concurrency=100,
+                 on_result=None, limiter=None):
+        if tier not in TIERS:
+            raise ValueError(f"Unknown check tier: {tier}")
+        self.switches = switches
+        self.tier = tier
+        self.timeout = timeout
+        self.login_timeout = login_timeout
+        self.concurrency = concurrency
+        self.on_result = on_result
+        self.limiter = limiter
+        self.results = queue.Queue()
+        self.done = threading.Event()
+        self.duration = None
+        self._thread = None
+
+    async def run_async(self):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        collected = []
+
+        async def check(switch):
+            async with semaphore:
+                result = await check_switch(switch, self.tier, self.timeout, self.login_timeout, self.limiter)
+            collected.append(result)
+            self.results.put(result)
+            if self.on_result is not None:
+                try:
+                    self.on_result(result)
+                except Exception as e:
+                    logger.warning(f"Health check callback failed: {e}")
+
+        await asyncio.gather(*(check(switch) for switch in self.switches))
+        return collected
+
+    def run(self):
+        """Check every switch and return the results in finishing order"""
+        start = time.perf_counter()
+        try:
+            return asyncio.run(self.run_async())
+        finally:
+            self.duration = time.perf_counter() - start
+            self.done.set()
+
+    def start(self):
+        """Run the check on a background thread"""
+        self._thread = threading.Thread(target=self.run, name="health-check", daemon=True)
+        self._thread.start()
+        return self
@@ -0,0 +1,286 @@
+"""
+Switch history store for the VLAN switcher.
+
+Every switch attempt of a tick is kept in state/history.sqlite3: one
+row per switch in "attempts" (outcome, error, duration and phase
+timings) and one row per port a successful push moved to another VLAN
+in "port_changes" (from and to VLAN).
+Both tables are indexed by device and time, port_changes by device,
+port and time as well, so "what happened to this switch/port lately"
+costs the same however long the service has been running.
+
+The tick thread only queues the tick. A background HistoryWriter turns
+queued ticks into rows and writes them in one transaction every
+flush_interval seconds (or sooner once batch_size attempts are
+waiting), and deletes rows older than retention_days about once an
+hour. The database is in WAL mode, so the GUI and the report command
+read it while the service writes.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from interfaces import normalize_interface
+from metrics import SWITCH_PHASES
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    device TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    vlans TEXT,
+    error TEXT,
+    duration REAL,
+    {', '.join(f'{phase}_seconds REAL' for phase in SWITCH_PHASES)},
+    retries INTEGER,
+    pushed INTEGER,
+    drifted INTEGER
+);
+CREATE INDEX IF NOT EXISTS attempts_device_time ON attempts (device, time);
+CREATE INDEX IF NOT EXISTS attempts_time ON attempts (time);
+CREATE TABLE IF NOT EXISTS port_changes (
+    attempt INTEGER NOT NULL,
+    time REAL NOT NULL,
+    device TEXT NOT NULL,
+    port TEXT NOT NULL,
+    port_group TEXT,
+    from_vlan TEXT,
+    to_vlan TEXT,
+    ok INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS port_changes_device_port_time ON port_changes (device, port, time);
+CREATE INDEX IF NOT EXISTS port_changes_time ON port_changes (time);
+"""
+
+ATTEMPT_COLUMNS = (('time', 'device', 'outcome', 'vlans', 'error', 'duration') +
+                   tuple(f'{phase}_seconds' for phase in SWITCH_PHASES) + ('retries', 'pushed', 'drifted'))
+
+# Defaults, overridable from config.json
+RETENTION_DAYS = 30
+FLUSH_INTERVAL = 2.0
+BATCH_SIZE = 1000
+
+# Seconds between retention passes
+PRUNE_INTERVAL = 3600
+
+
+def history_file_for(base_dir):
+    """Path of the history database under base_dir"""
+    return Path(base_dir) / "state" / "history.sqlite3"
+
+
+def first_line(text):
+    """First line of an error, which for netmiko errors is the gist of it"""
+    return (text or "").strip().split("\n", 1)[0]
+
+
+def outcome_of(result):
+    return 'success' if result.ok else 'skipped' if result.skipped else 'failure'
+
+
+class HistoryStore:
+    """SQLite database of switch attempts and the port changes they made"""
+
+    def __init__(self, path, readonly=False):
+        self.path = Path(path)
+        if readonly:
+            self.db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(self.path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.executescript(SCHEMA)
+        self.db.row_factory = sqlite3.Row
+
+    def write(self, ticks):
+        """Insert queued ticks, each (time, [(result, groups), ...]), in one transaction
+
+        groups holds (group name, ports, VLAN before the tick) for every
+        port group of the switch. Only ports the push wrote, and not to
+        the VLAN they were on, count as changes.
+        """
+        columns = ', '.join(ATTEMPT_COLUMNS)
+        insert_attempt = f"INSERT INTO attempts ({columns}) VALUES ({', '.join('?' * len(ATTEMPT_COLUMNS))})"
+        ports = []
+        with self.db:
+            for started, results in ticks:
+                for result, groups in results:
+                    phases = result.phases
+                    row = ((started, result.name, outcome_of(result), result.vlan, result.error,
+                            result.duration if not result.skipped else None) +
+                           tuple(phases.get(phase) for phase in SWITCH_PHASES) +
+                           (result.retries, result.pushed, len(result.drift)))
+                    attempt = self.db.execute(insert_attempt, row).lastrowid
+                    written = result.written
+                    for group, group_ports, from_vlan in groups:
+                        for port in group_ports:
+                            to_vlan = written.get(port)
+                            if to_vlan is not None and to_vlan != from_vlan:
+                                ports.append((attempt, started, result.name, port, group, from_vlan, to_vlan, 1))
+            self.db.executemany("INSERT INTO port_changes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", ports)
+        return len(ports)
+
+    def prune(self, before):
+        """Delete everything recorded before the given time"""
+        with self.db:
+            ports = self.db.execute("DELETE FROM port_changes WHERE time < ?", (before,)).rowcount
+            attempts = self.db.execute("DELETE FROM attempts WHERE time < ?", (before,)).rowcount
+        return attempts, ports
+
+    def attempts(self, device=None, since=None, limit=50):
+        """Latest attempts, newest first, optionally of one device and after a time"""
+        clauses, args = [], []
+        if device is not None:
+            clauses.append("device = ?")
+            args.append(device)
+        if since is not None:
+            clauses.append("time >= ?")
+            args.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.db.execute(f"SELECT * FROM attempts {where} ORDER BY time DESC, id DESC LIMIT ?",
+                               args + [limit]).fetchall()
+
+    def port_history(self, device, port, limit=50):
+        """Latest VLAN changes of one port, newest first; "Gi1/0/5" finds GigabitEthernet1/0/5"""
+        try:
+            port = normalize_interface(port)
+        except ValueError:
+            pass
+        return self.db.execute(
+            "SELECT * FROM port_changes WHERE device = ? AND port = ? ORDER BY time DESC LIMIT ?",
+            (device, port, limit)).fetchall()
+
+    def devices(self):
+        """Every device with its last attempt and last success"""
+        # Hops from device to device along the index instead of reading
+        # every attempt, which SELECT DISTINCT would
+        return self.db.execute(
+            "WITH RECURSIVE d(device) AS ("
+            " SELECT MIN(device) FROM attempts"
+            " UNION ALL SELECT (SELECT MIN(device) FROM attempts WHERE device > d.device) FROM d"
+            " WHERE d.device IS NOT NULL) "
+            "SELECT device, "
+            "(SELECT MAX(time) FROM attempts AS a WHERE a.device = d.device) AS last_attempt, "
+            "(SELECT MAX(time) FROM attempts AS a WHERE a.device = d.device AND outcome = 'success') "
+            "AS last_success "
+            "FROM d WHERE device IS NOT NULL").fetchall()
+
+    def summary(self, since):
+        """Attempts per device and outcome since a time, with the mean duration of successes"""
+        rows = self.db.execute(
+            "SELECT device, outcome, COUNT(*) AS count, AVG(duration) AS mean_duration, MAX(time) AS last "
+            "FROM attempts WHERE time >= ? GROUP BY device, outcome ORDER BY device", (since,)).fetchall()
+        summary = {}
+        for row in rows:
+            entry = summary.setdefault(row["device"], {"success": 0, "failure": 0, "skipped": 0,
+                                                       "mean_duration": None, "last": None})
+            entry[row["outcome"]] = row["count"]
+            if row["outcome"] == "success":
+                entry["mean_duration"] = row["mean_duration"]
+            entry["last"] = max(entry["last"] or 0, row["last"])
+        return summary
+
+    def close(self):
+        self.db.close()
+
+
+class HistoryWriter:
+    """Writes queued ticks to a HistoryStore from a background thread"""
+
+    def __init__(self, path, retention_days=RETENTION_DAYS, flush_interval=FLUSH_INTERVAL, batch_size=BATCH_SIZE):
+        self.path = Path(path)
+        self.retention_days = retention_days
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending = []
+        self._queued = 0
+        self._lock = threading.Lock()
+        self._wanted = threading.Event()
+        self._stopping = False
+        self._last_prune = 0.0
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def configure(self, config):
+        """Apply the history settings of config.json"""
+        self.retention_days = config.get("history_retention_days", RETENTION_DAYS)
+
+    def record_tick(self, report, switches):
+        """Queue a tick's attempts; call before the rotation state is recorded
+
+        Takes each port group's VLAN as it was before the tick, so the
+        caller must not have updated group["vlan"] for this tick yet.
+        """
+        by_name = {switch["name"]: switch for switch in switches}
+        results = []
+        for result in report.results:
+            switch = by_name.get(result.name)
+            groups = [(group["name"], group["ports"], group["vlan"]) for group in switch["port_groups"]] \
+                if switch is not None else []
+            results.append((result, groups))
+        with self._lock:
+            self._pending.append((report.started, results))
+            self._queued += len(results)
+            full = self._queued >= self.batch_size
+        if full:
+            self._wanted.set()
+
+    def _run(self):
+        try:
+            store = HistoryStore(self.path)
+        except sqlite3.Error as e:
+            logger.warning(f"Switch history disabled, could not open {self.path}: {e}")
+            return
+        try:
+            while True:
+                self._wanted.wait(self.flush_interval)
+                self._wanted.clear()
+                self.flush(store)
+                if self._stopping:
+                    return
+        finally:
+            store.close()
+
+    def flush(self, store):
+        """Write every queued tick to store and prune it when due"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._queued = 0
+        try:
+            if pending:
+                store.write(pending)
+            if self.retention_days and time.monotonic() - self._last_prune >= PRUNE_INTERVAL:
+                self._last_prune = time.monotonic()
+                attempts, ports = store.prune(time.time() - self.retention_days * 86400)
+                if attempts:
+                    logger.info(f"Pruned {attempts} switch attempt(s) and {ports} port change(s) from history")
+        except sqlite3.Error as e:
+            logger.warning(f"Could not write switch history: {e}")
+
+    def stop(self):
+        """Write what is queued and end the thread"""
+        self._stopping = True
+        self._wanted.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+
+
+def history_writer_from_config(config, base_dir):
+    """Started HistoryWriter for config.json, or None when "history" is false"""
+    if not config.get("history", True):
+        return None
+    writer = HistoryWriter(history_file_for(base_dir),
+                           flush_interval=config.get("history_flush_seconds", FLUSH_INTERVAL))
+    writer.configure(config)
+    return writer.start()
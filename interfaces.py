@@ -0,0 +1,147 @@
+"""
+Interface name handling for the VLAN switcher.
+
+Expands port lists and ranges such as "Gi1/0/1-24" into canonical IOS
+interface names and collapses ports that share a VLAN back into
+"interface range" blocks, so a whole switch can be reconfigured with a
+single send_config_set call.
+"""
+
+import re
+
+# Full IOS interface type names
+INTERFACE_TYPES = (
+    'GigabitEthernet', 'FastEthernet', 'TenGigabitEthernet', 'TwoGigabitEthernet',
+    'FiveGigabitEthernet', 'TwentyFiveGigE', 'FortyGigabitEthernet', 'HundredGigE',
+    'AppGigabitEthernet', 'Ethernet', 'Port-channel',
+)
+
+# Common abbreviations that are ambiguous as plain prefixes
+ABBREVIATIONS = {
+    'gi': 'GigabitEthernet',
+    'fa': 'FastEthernet',
+    'te': 'TenGigabitEthernet',
+    'tw': 'TwoGigabitEthernet',
+    'fi': 'FiveGigabitEthernet',
+    'twe': 'TwentyFiveGigE',
+    'fo': 'FortyGigabitEthernet',
+    'hu': 'HundredGigE',
+    'et': 'Ethernet',
+    'eth': 'Ethernet',
+    'po': 'Port-channel',
+}
+
+# IOS accepts at most five ranges in one "interface range" command
+MAX_RANGES_PER_COMMAND = 5
+
+_PORT_RE = re.compile(r'^([A-Za-z][A-Za-z-]*?)?\s*((?:\d+/)*)(\d+)(?:\s*-\s*(\d+))?$')
+
+
+def interface_type(name):
+    """Resolve an interface type or abbreviation to its full IOS name"""
+    if not name:
+        # Bare "1/0/10" style names are passed through unchanged
+        return ""
+    lowered = name.lower()
+    if lowered in ABBREVIATIONS:
+        return ABBREVIATIONS[lowered]
+    matches = [t for t in INTERFACE_TYPES if t.lower().startswith(lowered)]
+    if len(matches) == 1:
+        return matches[0]
+    exact = [t for t in matches if t.lower() == lowered]
+    if exact:
+        return exact[0]
+    raise ValueError(f"Unknown interface type: {name}")
+
+
+def parse_port_spec(spec):
+    """Split a port or port range into (type, slot prefix, first, last)"""
+    match = _PORT_RE.match(spec.strip())
+    if not match:
+        raise ValueError(f"Invalid interface: {spec}")
+    kind, prefix, first, last = match.groups()
+    first = int(first)
+    last = int(last) if last is not None else first
+    if last < first:
+        raise ValueError(f"Invalid interface range: {spec}")
+    return interface_type(kind), prefix, first, last
+
+
+def normalize_interface(name):
+    """Return the canonical IOS name of a single interface"""
+    kind, prefix, first, last = parse_port_spec(name)
+    if first != last:
+        raise ValueError(f"Expected a single interface, got a range: {name}")
+    return f"{kind}{prefix}{first}"
+
+
+def expand_ports(specs):
+    """Expand a list of ports and ranges into canonical interface names
+
+    Each entry may itself be a comma-separated list, e.g.
+    "Gi1/0/1-24, Gi1/0/48". Order is kept and duplicates are dropped.
+    """
+    if isinstance(specs, str):
+        specs = [specs]
+    ports = []
+    seen = set()
+    for entry in specs:
+        for spec in str(entry).split(','):
+            if not spec.strip():
+                continue
+            kind, prefix, first, last = parse_port_spec(spec)
+            for number in range(first, last + 1):
+                port = f"{kind}{prefix}{number}"
+                if port not in seen:
+                    seen.add(port)
+                    ports.append(port)
+    return ports
+
+
+def compress_ports(ports):
+    """Collapse canonical port names into IOS range strings"""
+    parsed = sorted(parse_port_spec(port)[:3] for port in ports)
+    ranges = []
+    for kind, prefix, number in parsed:
+        if ranges:
+            last_kind, last_prefix, first, last = ranges[-1]
+            if (kind, prefix) == (last_kind, last_prefix) and number == last + 1:
+                ranges[-1] = (kind, prefix, first, number)
+                continue
+        ranges.append((kind, prefix, number, number))
+    return [f"{kind}{prefix}{first}" if first == last else f"{kind}{prefix}{first} - {last}"
+            for kind, prefix, first, last in ranges]
+
+
+def build_headers(ports):
+    """The "interface"/"interface range" lines that select ports"""
+    ranges = compress_ports(ports)
+    headers = []
+    for i in range(0, len(ranges), MAX_RANGES_PER_COMMAND):
+        chunk = ranges[i:i + MAX_RANGES_PER_COMMAND]
+        if len(chunk) == 1 and ' - ' not in chunk[0]:
+            headers.append(f"interface {chunk[0]}")
+        else:
+            headers.append(f"interface range {' , '.join(chunk)}")
+    return headers
+
+
+def build_vlan_commands(assignments):
+    """Build one config set moving every port to its target VLAN
+
+    assignments maps canonical port name -> VLAN. Ports that share a
+    VLAN are grouped into "interface range" blocks.
+    """
+    by_vlan = {}
+    for port, vlan in assignments.items():
+        by_vlan.setdefault(str(vlan), []).append(port)
+
+    commands = []
+    for vlan in sorted(by_vlan, key=lambda v: (not v.isdigit(), int(v) if v.isdigit() else 0, v)):
+        for header in build_headers(by_vlan[vlan]):
+            commands += [
+                header,
+                f"switchport access vlan {vlan}",
+                "exit"
+            ]
+    return commands
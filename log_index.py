@@ -0,0 +1,347 @@
+"""
+Sparse byte-offset index of the switcher log, for the GUI's log viewer.
+
+The dashboard only ever shows the last lines LogTailer keeps. Browsing
+and searching the whole of vlan_switcher.log, which grows to gigabytes
+on a large fleet, must not read it into memory. LogIndex scans the file
+once, counting newlines a block at a time, and keeps a checkpoint at
+the first line start after every SPAN bytes: its byte offset, its line
+number and its timestamp (an earlier checkpoint's for undated lines).
+Any line is then one bisect plus at most one span of reading away, and
+a time is one bisect on the timestamps. Appended lines are indexed
+incrementally; rotation and truncation start the index over.
+
+LogFilter narrows an index to the lines of some levels, one device
+("[name]" in the message) and/or containing some text, keeping only a
+count of matches per checkpoint span, so it is as cheap to scroll as
+the index itself. Both are scanned in bounded steps (refresh/scan with
+a byte budget) so the GUI can index a huge file between redraws.
+"""
+
+import bisect
+import datetime
+import os
+import re
+from array import array
+
+from log_tail import parse_timestamp
+
+# Bytes between checkpoints: a few hundred lines
+SPAN = 64 * 1024
+
+# Bytes read per step
+READ_SIZE = 1024 * 1024
+
+LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+
+def stamp_of(line):
+    """Epoch seconds of a log line's timestamp, or None"""
+    when = parse_timestamp(line.decode('utf-8', errors='replace'))
+    return when.timestamp() if when is not None else None
+
+
+def decode(line):
+    return line.decode('utf-8', errors='replace').rstrip('\r')
+
+
+class LogIndex:
+    """Checkpoints every SPAN bytes of a log file, built and extended in steps"""
+
+    def __init__(self, path, span=SPAN):
+        self.path = path
+        self.span = span
+        # Per checkpoint: byte offset of a line start, its line number, and
+        # its timestamp, carried over from the previous one if undated
+        self.offsets = array('q')
+        self.lines = array('q')
+        self.stamps = array('d')
+        # Bytes and complete lines indexed so far
+        self.size = 0
+        self.count = 0
+        self.file_size = 0
+        # Whether the last refresh reached the end of the file
+        self.done = False
+        # Bumped when the index starts over
+        self.generation = 0
+        self._identity = None
+        self._stamp = 0.0
+
+    @property
+    def progress(self):
+        return self.size / self.file_size if self.file_size else 1.0
+
+    def refresh(self, budget=None):
+        """Index lines appended since the last call, reading at most budget bytes; True if any"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            if self._identity is not None:
+                self._reset()
+            self.done = True
+            return False
+        identity = (stat.st_dev, stat.st_ino)
+        if self._identity is not None and (identity != self._identity or stat.st_size < self.size):
+            self._reset()
+        self._identity = identity
+        self.file_size = stat.st_size
+        self.done = stat.st_size <= self.size
+        if self.done:
+            return False
+        start_count = self.count
+        read = 0
+        with open(self.path, 'rb') as f:
+            f.seek(self.size)
+            while budget is None or read < budget:
+                data = f.read(READ_SIZE)
+                if not data:
+                    self.done = True
+                    break
+                read += len(data)
+                end = data.rfind(b'\n') + 1
+                if not end:
+                    # A line still being written, or one longer than READ_SIZE
+                    if len(data) < READ_SIZE:
+                        self.done = True
+                        break
+                    end = len(data)
+                self._index(data[:end])
+                if end < len(data):
+                    f.seek(self.size)
+        return self.count != start_count
+
+    def _index(self, data):
+        """Add the complete lines in data, which starts at self.size"""
+        base = self.size
+        if not self.offsets:
+            self._checkpoint(0, 0, data)
+        counted, count = 0, self.count
+        while True:
+            target = self.offsets[-1] + self.span - base
+            if target >= len(data):
+                break
+            start = data.find(b'\n', max(target - 1, counted)) + 1
+            if not start or start >= len(data):
+                break
+            count += data.count(b'\n', counted, start)
+            counted = start
+            self._checkpoint(base + start, count, data, start)
+        self.count = count + data.count(b'\n', counted)
+        self.size = base + len(data)
+
+    def _checkpoint(self, offset, line, data, start=0):
+        end = data.find(b'\n', start)
+        stamp = stamp_of(data[start:end if end >= 0 else len(data)])
+        if stamp is not None:
+            self._stamp = stamp
+        self.offsets.append(offset)
+        self.lines.append(line)
+        self.stamps.append(self._stamp)
+
+    def _reset(self):
+        self.offsets = array('q')
+        self.lines = array('q')
+        self.stamps = array('d')
+        self.size = 0
+        self.count = 0
+        self.file_size = 0
+        self.generation += 1
+        self._identity = None
+        self._stamp = 0.0
+
+    def span_of(self, i):
+        """Byte range of checkpoint i's span"""
+        return self.offsets[i], self.offsets[i + 1] if i + 1 < len(self.offsets) else self.size
+
+    def data(self, start, end):
+        """Bytes between two line starts"""
+        if end <= start:
+            return b''
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            return f.read(end - start)
+
+    def read(self, start, end):
+        """Lines (bytes, without newline) between two line starts"""
+        return self.data(start, end).split(b'\n')[:-1]
+
+    def lines_from(self, line):
+        """Yield (line number, bytes) from line to the end of the index"""
+        if line >= self.count or not self.offsets:
+            return
+        i = bisect.bisect_right(self.lines, line) - 1
+        number = self.lines[i]
+        for i in range(i, len(self.offsets)):
+            for text in self.read(*self.span_of(i)):
+                if number >= line:
+                    yield number, text
+                number += 1
+
+    def rows(self, start, count):
+        """Up to count lines from line number start, as text"""
+        rows = []
+        for _, text in self.lines_from(max(0, start)):
+            rows.append(decode(text))
+            if len(rows) >= count:
+                break
+        return rows
+
+    def position(self, line):
+        """Row of line number line; the index shows every line"""
+        return line
+
+    def line_at(self, when):
+        """Number of the first line dated at or after when (epoch seconds)"""
+        if not self.offsets:
+            return 0
+        i = max(0, bisect.bisect_left(self.stamps, when) - 1)
+        # Back to where an undated checkpoint's timestamp came from
+        while i > 0 and self.stamps[i - 1] == self.stamps[i]:
+            i -= 1
+        for number, text in self.lines_from(self.lines[i]):
+            stamp = stamp_of(text[:32])
+            if stamp is not None and stamp >= when:
+                return number
+        return self.count
+
+
+def filter_patterns(levels=None, device=None, text=None):
+    """Byte patterns a line must all match, most selective first"""
+    patterns = []
+    if text:
+        patterns.append(re.compile(re.escape(text.encode()), re.IGNORECASE))
+    if device:
+        patterns.append(re.compile(re.escape(f"[{device}]".encode())))
+    if levels and set(levels) != set(LEVELS):
+        patterns.append(re.compile(b' - (?:' + b'|'.join(level.encode() for level in levels) + b') - '))
+    return patterns
+
+
+class LogFilter:
+    """The lines of a LogIndex that match a filter, counted per checkpoint span"""
+
+    def __init__(self, index, levels=None, device=None, text=None):
+        self.index = index
+        self.patterns = filter_patterns(levels, device, text)
+        # Matches before each checkpoint, and in everything scanned
+        self.counts = array('q')
+        self.count = 0
+        # Bytes scanned, up to a line start
+        self.end = 0
+        self.generation = index.generation
+
+    @property
+    def done(self):
+        return self.end >= self.index.size
+
+    @property
+    def progress(self):
+        return self.end / self.index.size if self.index.size else 1.0
+
+    def matches(self, data):
+        """Matching lines (bytes) of data, which holds whole lines
+
+        Searches for the first pattern across all of data at once, so
+        only lines that contain it are looked at one by one.
+        """
+        if not self.patterns:
+            return data.split(b'\n')[:-1]
+        first, rest = self.patterns[0], self.patterns[1:]
+        lines = []
+        last = -1
+        for hit in first.finditer(data):
+            start = data.rfind(b'\n', 0, hit.start()) + 1
+            if start == last:
+                continue
+            last = start
+            end = data.find(b'\n', hit.end())
+            line = data[start:end if end >= 0 else len(data)]
+            if all(p.search(line) for p in rest):
+                lines.append(line)
+        return lines
+
+    def _count(self, data):
+        return data.count(b'\n') if not self.patterns else len(self.matches(data))
+
+    def scan(self, budget=None):
+        """Count matches in what the index holds beyond self.end, up to budget bytes; True if any"""
+        index = self.index
+        if index.generation != self.generation:
+            self.counts = array('q')
+            self.count = 0
+            self.end = 0
+            self.generation = index.generation
+        start_count = self.count
+        scanned = 0
+        while self.end < index.size and (budget is None or scanned < budget):
+            i = bisect.bisect_right(index.offsets, self.end) - 1
+            if index.offsets[i] == self.end and len(self.counts) == i:
+                self.counts.append(self.count)
+            start, end = index.span_of(i)
+            with open(index.path, 'rb') as f:
+                f.seek(self.end)
+                data = f.read(end - self.end)
+            self.count += self._count(data)
+            scanned += len(data)
+            self.end = end
+        return self.count != start_count
+
+    def rows(self, start, count):
+        """Up to count matching lines from match number start, as text"""
+        index = self.index
+        start = max(0, start)
+        i = bisect.bisect_right(self.counts, start) - 1
+        if i < 0:
+            return []
+        skip = start - self.counts[i]
+        rows = []
+        for i in range(i, len(self.counts)):
+            if (self.counts[i + 1] if i + 1 < len(self.counts) else self.count) == self.counts[i]:
+                # Nothing in this span matches
+                continue
+            span_start, span_end = index.span_of(i)
+            for line in self.matches(index.data(span_start, min(span_end, self.end))):
+                if skip:
+                    skip -= 1
+                    continue
+                rows.append(decode(line))
+                if len(rows) >= count:
+                    return rows
+        return rows
+
+    def position(self, line):
+        """Row of the first match at or after line number line"""
+        index = self.index
+        i = bisect.bisect_right(index.lines, line) - 1
+        if i < 0:
+            return 0
+        if i >= len(self.counts):
+            return self.count
+        span_start, span_end = index.span_of(i)
+        data = index.data(span_start, min(span_end, self.end))
+        # Up to the start of the line
+        end = 0
+        for _ in range(line - index.lines[i]):
+            end = data.find(b'\n', end) + 1
+            if not end:
+                end = len(data)
+                break
+        return self.counts[i] + len(self.matches(data[:end]))
+
+
+def parse_when(text, today=None):
+    """Epoch seconds of "YYYY-MM-DD HH:MM[:SS]" or, for today, "HH:MM[:SS]" """
+    text = text.strip()
+    today = today or datetime.date.today()
+    for layout in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.datetime.strptime(text, layout).timestamp()
+        except ValueError:
+            pass
+    for layout in ("%H:%M:%S", "%H:%M"):
+        try:
+            clock = datetime.datetime.strptime(text, layout).time()
+            return datetime.datetime.combine(today, clock).timestamp()
+        except ValueError:
+            pass
+    raise ValueError(f"Not a time: {text!r} (use YYYY-MM-DD HH:MM or HH:MM)")
@@ -0,0 +1,161 @@
+"""
+Queue-based logging pipeline for the VLAN switcher service.
+
+Code that logs only puts the record on a queue; a background listener
+thread formats it and writes it to the console and to the log file. The
+file is rolled over when it reaches max_bytes and every rotate_hours:
+its contents are gzipped into vlan_switcher.log.<time>.gz
+and the file is truncated in place (renaming an open file fails on
+Windows while the GUI is reading it). Only the newest backup_count
+archives are kept.
+
+Records are handed to the listener unformatted, so arguments passed to
+a logger call must not be changed afterwards. Use %-style arguments
+rather than f-strings on the hot path, and wrap device output in
+Truncated so only a bounded amount of it is ever formatted.
+"""
+
+import datetime
+import gzip
+import logging
+import logging.handlers
+import queue
+import shutil
+import time
+from pathlib import Path
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Defaults, overridable from config.json
+MAX_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 10
+ROTATE_HOURS = 24
+DEVICE_OUTPUT_LIMIT = 2000
+
+
+class Truncated:
+    """Log argument that formats as at most limit characters of text"""
+
+    __slots__ = ('text', 'limit')
+
+    def __init__(self, text, limit=DEVICE_OUTPUT_LIMIT):
+        self.text = text
+        self.limit = limit
+
+    def __str__(self):
+        text = str(self.text)
+        if len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}... [{len(text) - self.limit} more characters]"
+
+
+class CompressingRotatingFileHandler(logging.FileHandler):
+    """File handler that rolls over by size or age into gzip archives"""
+
+    def __init__(self, filename, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT,
+                 rotate_hours=ROTATE_HOURS, encoding='utf-8'):
+        super().__init__(filename, mode='a', encoding=encoding)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_hours = rotate_hours
+        self.rollover_at = time.time() + rotate_hours * 3600
+
+    def emit(self, record):
+        try:
+            if self.should_rollover():
+                self.do_rollover()
+        except Exception:
+            self.handleError(record)
+        super().emit(record)
+
+    def should_rollover(self):
+        if self.stream is None:
+            return False
+        if self.max_bytes and self.stream.tell() >= self.max_bytes:
+            return True
+        return bool(self.rotate_hours) and time.time() >= self.rollover_at
+
+    def do_rollover(self):
+        """Gzip the current file into an archive and start it empty"""
+        self.stream.close()
+        self.stream = None
+        # Sortable and unique even for several size rollovers a second
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        archive = f"{self.baseFilename}.{stamp}.gz"
+        with open(self.baseFilename, 'rb') as source, gzip.open(archive, 'wb') as target:
+            shutil.copyfileobj(source, target)
+        # Truncate instead of renaming, which fails on Windows while
+        # another process has the file open
+        self.stream = open(self.baseFilename, 'w', encoding=self.encoding)
+        self.rollover_at = time.time() + self.rotate_hours * 3600
+        self.delete_old_archives()
+
+    def archives(self):
+        """Existing archives, oldest first"""
+        base = Path(self.baseFilename)
+        return sorted(base.parent.glob(base.name + ".*.gz"))
+
+    def delete_old_archives(self):
+        archives = self.archives()
+        for archive in archives[:max(0, len(archives) - self.backup_count)]:
+            try:
+                archive.unlink()
+            except OSError:
+                pass
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Queues records as they are; the listener formats them"""
+
+    def prepare(self, record):
+        # The queue never leaves the process, so nothing needs pickling
+        return record
+
+
+class LogPipeline:
+    """Routes all logging through a queue to a background writer"""
+
+    def __init__(self, log_file, level=logging.INFO, console=True, **rotation):
+        self.queue = queue.SimpleQueue()
+        self.file_handler = CompressingRotatingFileHandler(log_file, **rotation)
+        handlers = [self.file_handler]
+        if console:
+            handlers.append(logging.StreamHandler())
+        formatter = logging.Formatter(LOG_FORMAT)
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        self.handler = LazyQueueHandler(self.queue)
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.level = level
+        self.running = False
+
+    def start(self):
+        """Send every log record of the process through the pipeline"""
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(self.level)
+        self.listener.start()
+        self.running = True
+        return self
+
+    def configure(self, config):
+        """Apply the logging settings of config.json"""
+        self.file_handler.max_bytes = config.get("log_max_bytes", self.file_handler.max_bytes)
+        self.file_handler.backup_count = config.get("log_backup_count", self.file_handler.backup_count)
+        rotate_hours = config.get("log_rotate_hours")
+        if rotate_hours is not None and rotate_hours != self.file_handler.rotate_hours:
+            # Only a new interval restarts the clock; other reloads keep it
+            self.file_handler.rotate_hours = rotate_hours
+            self.file_handler.rollover_at = time.time() + rotate_hours * 3600
+        if config.get("log_level"):
+            logging.getLogger().setLevel(config["log_level"].upper())
+
+    def stop(self):
+        """Write out everything still queued and detach the pipeline"""
+        logging.getLogger().removeHandler(self.handler)
+        if self.running:
+            self.listener.stop()
+            self.running = False
+        self.file_handler.close()
@@ -0,0 +1,111 @@
+"""
+Incremental log tailer for the VLAN switcher GUI.
+
+The dashboard used to readlines() the whole vlan_switcher.log three
+times every refresh. LogTailer remembers how far it has read, parses
+each new line exactly once and keeps the last lines for the GUI to
+show; the current VLAN and switch times come from status.json. A
+refresh costs one stat() plus whatever was appended since the last one,
+however large the log has grown. Truncation and rotation are detected and handled by
+re-reading the tail of the new file backwards from EOF.
+"""
+
+import datetime
+import os
+from collections import deque
+
+# Bytes read per step when scanning backwards from EOF
+BLOCK_SIZE = 64 * 1024
+
+
+def parse_timestamp(line):
+    """Timestamp of a "2025-06-19 14:30:25,123 - INFO - ..." line, or None"""
+    try:
+        return datetime.datetime.strptime(line.split(' - ')[0].split(',')[0], "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+
+
+class LogTailer:
+    """Follows a log file and keeps what the dashboard needs from it"""
+
+    def __init__(self, path, max_lines=20, seed_bytes=1024 * 1024):
+        self.path = path
+        self.max_lines = max_lines
+        # Never scan further back than this, on start-up or after a burst
+        self.seed_bytes = seed_bytes
+        self.recent_lines = deque(maxlen=max_lines)
+        # Bumped whenever recent_lines changes
+        self.version = 0
+        self._offset = None
+        self._identity = None
+        self._partial = b''
+
+    def poll(self):
+        """Pick up lines appended since the last poll; return True if any"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            if self._offset is not None:
+                self._reset()
+            return False
+
+        identity = (stat.st_dev, stat.st_ino)
+        if self._offset is not None and (identity != self._identity or stat.st_size < self._offset):
+            # Rotated or truncated: start over on the new file
+            self._reset()
+        if stat.st_size == self._offset:
+            return False
+
+        try:
+            with open(self.path, 'rb') as f:
+                if self._offset is None or stat.st_size - self._offset > self.seed_bytes:
+                    data = self._read_tail(f, stat.st_size)
+                else:
+                    f.seek(self._offset)
+                    data = self._partial + f.read(stat.st_size - self._offset)
+        except OSError:
+            return False
+
+        self._identity = identity
+        self._offset = stat.st_size
+        lines = data.split(b'\n')
+        # The last piece is a line still being written
+        self._partial = lines.pop()
+        for line in lines:
+            self._ingest(line.decode('utf-8', errors='replace').rstrip('\r'))
+        self.version += 1
+        return True
+
+    def _read_tail(self, f, size):
+        """Read backwards from EOF until the last lines are covered"""
+        chunks = []
+        newlines = 0
+        end = size
+        while end > 0 and size - end < self.seed_bytes:
+            start = max(0, end - BLOCK_SIZE)
+            f.seek(start)
+            chunk = f.read(end - start)
+            chunks.append(chunk)
+            newlines += chunk.count(b'\n')
+            end = start
+            if newlines > self.max_lines:
+                break
+        data = b''.join(reversed(chunks))
+        if end > 0:
+            # Drop the line the scan started in the middle of
+            data = data[data.find(b'\n') + 1:]
+        return data
+
+    def _ingest(self, line):
+        if not line.strip():
+            return
+        self.recent_lines.append(line)
+
+    def _reset(self):
+        # The old lines are gone with the old file
+        self.recent_lines.clear()
+        self._offset = None
+        self._identity = None
+        self._partial = b''
+        self.version += 1
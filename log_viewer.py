@@ -0,0 +1,222 @@
+"""
+Log viewer window of the VLAN switcher GUI.
+
+Shows vlan_switcher.log through a LogIndex (log_index.py) and renders
+only the rows that fit in the window: scrolling asks the index for
+those rows and nothing more, so a multi-gigabyte log opens at once and
+scrolls like a small one. Level, switch and text filters switch the
+view to a LogFilter, and "Go to" jumps to the first line at a time.
+Indexing and filtering run from Tk's after() loop in steps of about
+STEP_SECONDS, so the window stays responsive while a large file is
+scanned; new lines are picked up the same way, and followed when the
+view is at the end.
+"""
+
+import time
+import tkinter as tk
+import tkinter.font as tkfont
+from tkinter import ttk
+
+from log_index import LEVELS, LogFilter, LogIndex, parse_when
+
+# Bytes indexed or filtered at a time, for about STEP_SECONDS per step,
+# and ms between steps while busy
+CHUNK_BYTES = 1024 * 1024
+STEP_SECONDS = 0.015
+STEP_MS = 10
+
+# ms between looks for new lines once caught up
+REFRESH_MS = 2000
+
+ALL_LEVELS = "All levels"
+ALL_SWITCHES = "All switches"
+
+# Lines scrolled per mouse wheel notch
+WHEEL_LINES = 3
+
+
+def advance(index, source, seconds=STEP_SECONDS):
+    """Index, then filter, a chunk at a time for about seconds; returns (changed, busy)"""
+    deadline = time.perf_counter() + seconds
+    changed = index.refresh(CHUNK_BYTES)
+    while not index.done and time.perf_counter() < deadline:
+        changed = index.refresh(CHUNK_BYTES) or changed
+    if source is not index:
+        while not source.done and time.perf_counter() < deadline:
+            changed = source.scan(CHUNK_BYTES) or changed
+    busy = not index.done or (source is not index and not source.done)
+    return changed, busy
+
+
+class LogViewer:
+    """A window showing one log file, a screenful at a time"""
+
+    def __init__(self, parent, path, devices=()):
+        self.index = LogIndex(path)
+        self.source = self.index
+        # First row shown, and whether to stay at the end as lines arrive
+        self.top = 0
+        self.follow = True
+        self._generation = self.index.generation
+        self._job = None
+        # Shown instead of the line count until the next filter or jump
+        self._error = None
+
+        self.window = tk.Toplevel(parent)
+        self.window.title(f"Log - {path}")
+        self.window.geometry("900x500")
+
+        filters = ttk.Frame(self.window, padding=5)
+        filters.pack(fill=tk.X)
+        ttk.Label(filters, text="Level:").pack(side=tk.LEFT)
+        self.level_var = tk.StringVar(value=ALL_LEVELS)
+        levels = ttk.Combobox(filters, textvariable=self.level_var, state="readonly", width=10,
+                              values=[ALL_LEVELS] + [level for level in LEVELS if level != 'CRITICAL'])
+        levels.pack(side=tk.LEFT, padx=5)
+        ttk.Label(filters, text="Switch:").pack(side=tk.LEFT)
+        self.device_var = tk.StringVar(value=ALL_SWITCHES)
+        switches = ttk.Combobox(filters, textvariable=self.device_var, width=18,
+                                values=[ALL_SWITCHES] + list(devices))
+        switches.pack(side=tk.LEFT, padx=5)
+        ttk.Label(filters, text="Find:").pack(side=tk.LEFT)
+        self.text_var = tk.StringVar()
+        find = ttk.Entry(filters, textvariable=self.text_var, width=18)
+        find.pack(side=tk.LEFT, padx=5)
+        ttk.Label(filters, text="Go to:").pack(side=tk.LEFT, padx=(10, 0))
+        self.when_var = tk.StringVar()
+        when = ttk.Entry(filters, textvariable=self.when_var, width=17)
+        when.pack(side=tk.LEFT, padx=5)
+        ttk.Button(filters, text="Go", command=self.jump, width=4).pack(side=tk.LEFT)
+        self.status_label = ttk.Label(filters, text="", foreground="gray")
+        self.status_label.pack(side=tk.RIGHT)
+
+        body = ttk.Frame(self.window)
+        body.pack(fill=tk.BOTH, expand=True)
+        self.scrollbar = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Holds only the visible rows; the scrollbar tracks rows of the log
+        self.text = tk.Text(body, wrap=tk.NONE, font="TkFixedFont", state=tk.DISABLED)
+        xscroll = ttk.Scrollbar(self.window, orient=tk.HORIZONTAL, command=self.text.xview)
+        self.text.configure(xscrollcommand=xscroll.set)
+        self.text.pack(fill=tk.BOTH, expand=True)
+        xscroll.pack(fill=tk.X)
+        self.text.tag_configure("ERROR", foreground="red")
+        self.text.tag_configure("WARNING", foreground="dark orange")
+        self.linespace = tkfont.Font(font=self.text["font"]).metrics("linespace")
+
+        levels.bind("<<ComboboxSelected>>", self.apply_filter)
+        switches.bind("<<ComboboxSelected>>", self.apply_filter)
+        switches.bind("<Return>", self.apply_filter)
+        find.bind("<Return>", self.apply_filter)
+        when.bind("<Return>", self.jump)
+        self.text.bind("<Configure>", lambda event: self.render())
+        self.text.bind("<MouseWheel>", lambda event: self.scroll_by(-event.delta // 120 * WHEEL_LINES))
+        self.text.bind("<Button-4>", lambda event: self.scroll_by(-WHEEL_LINES))
+        self.text.bind("<Button-5>", lambda event: self.scroll_by(WHEEL_LINES))
+        for key, rows in (("<Up>", -1), ("<Down>", 1)):
+            self.window.bind(key, lambda event, rows=rows: self.scroll_by(rows))
+        self.window.bind("<Prior>", lambda event: self.scroll_by(-self.visible_rows()))
+        self.window.bind("<Next>", lambda event: self.scroll_by(self.visible_rows()))
+        self.window.bind("<Control-Home>", lambda event: self.scroll_to(0))
+        self.window.bind("<Control-End>", lambda event: self.scroll_to(self.source.count))
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.step()
+
+    def visible_rows(self):
+        return max(1, self.text.winfo_height() // self.linespace)
+
+    def render(self):
+        """Show the rows from self.top that fit in the window"""
+        rows = self.visible_rows()
+        total = self.source.count
+        if self.follow:
+            self.top = total - rows
+        self.top = max(0, min(self.top, total - rows))
+        lines = self.source.rows(self.top, rows)
+        self.text.configure(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(lines))
+        for number, line in enumerate(lines, 1):
+            for level in ("ERROR", "WARNING"):
+                if f" - {level} - " in line:
+                    self.text.tag_add(level, f"{number}.0", f"{number}.end")
+        self.text.configure(state=tk.DISABLED)
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll_to(self, top):
+        self.top = max(0, top)
+        self.follow = self.top + self.visible_rows() >= self.source.count
+        self.render()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.top + rows)
+
+    def on_scroll(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", n, "units"/"pages")"""
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.source.count))
+        elif args[0] == "scroll":
+            self.scroll_by(int(args[1]) * (self.visible_rows() if args[2] == "pages" else 1))
+
+    def apply_filter(self, event=None):
+        level = self.level_var.get()
+        levels = None if level == ALL_LEVELS else LEVELS[LEVELS.index(level):]
+        device = self.device_var.get().strip()
+        device = None if device in ("", ALL_SWITCHES) else device
+        text = self.text_var.get().strip() or None
+        if levels or device or text:
+            self.source = LogFilter(self.index, levels, device, text)
+        else:
+            self.source = self.index
+        self._error = None
+        self.follow = True
+        self.render()
+        self.step()
+
+    def jump(self, event=None):
+        """Show the first line at or after the time typed in "Go to" """
+        try:
+            when = parse_when(self.when_var.get())
+        except ValueError as e:
+            self._error = str(e)
+            self.show_status()
+            return
+        self._error = None
+        self.top = self.source.position(self.index.line_at(when))
+        self.follow = False
+        self.render()
+
+    def step(self):
+        """Index and filter one step further, then schedule the next step"""
+        if self._job is not None:
+            self.window.after_cancel(self._job)
+        changed, busy = advance(self.index, self.source)
+        if changed or self.index.generation != self._generation:
+            self._generation = self.index.generation
+            self.render()
+        self.show_status()
+        self._job = self.window.after(STEP_MS if busy else REFRESH_MS, self.step)
+
+    def show_status(self):
+        if self._error is not None:
+            self.status_label.configure(text=self._error, foreground="red")
+            return
+        if self.source is self.index:
+            status = f"{self.index.count:,} lines"
+            progress = None if self.index.done else self.index.progress
+        else:
+            status = f"{self.source.count:,} matching lines"
+            progress = None if self.index.done and self.source.done else \
+                self.source.progress * self.index.progress
+        if progress is not None:
+            status += f" (scanning {progress:.0%})"
+        self.status_label.configure(text=status, foreground="gray")
+
+    def close(self):
+        if self._job is not None:
+            self.window.after_cancel(self._job)
+            self._job = None
+        self.window.destroy()
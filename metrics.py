@@ -0,0 +1,330 @@
+"""
+Latency metrics for the VLAN switcher.
+
+Every tick is recorded into histograms and counters: per switch, the
+seconds spent in each phase of switching it (queue = waiting for the
+rate limiter, dns, connect = TCP/SSH handshake and login, enable,
+show = reading port state, config_push),
+its total time, successes, failures, session retries, ports written
+and ports found drifted; per tick, the fleet-wide phases
+(credentials, switch, persist) and the tick duration.
+
+The tick thread only queues its report. A background TextfileWriter
+folds it into the histograms and rewrites state/metrics.prom in the
+Prometheus text format (for node_exporter's textfile collector or any
+scraper that reads files); MetricsServer can also serve the registry
+on a local HTTP /metrics endpoint. A per-phase p50/p95 summary goes
+into the status file for the GUI.
+
+Overhead budget: folding a tick costs at most 20 us per switch and
+the metrics work on the tick's thread takes under 1% of a tick;
+benchmarks/bench_metrics.py checks both.
+"""
+
+import bisect
+import logging
+import os
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Phases of switching one device, in order
+SWITCH_PHASES = ('dns', 'connect', 'enable', 'show', 'config_push')
+
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    'vlan_switch_phase_seconds': ('histogram', 'Seconds spent in each phase of switching a device'),
+    'vlan_switch_duration_seconds': ('histogram', 'Seconds to switch a device, all phases included'),
+    'vlan_switch_total': ('counter', 'Devices switched, by result (success, failure, skipped)'),
+    'vlan_switch_retries_total': ('counter', 'Reconnects after a pooled session had died'),
+    'vlan_ports_written_total': ('counter', 'Ports whose VLAN was changed'),
+    'vlan_port_drift_total': ('counter', 'Ports found on another VLAN than expected'),
+    'vlan_tick_phase_seconds': ('histogram', 'Seconds spent in each fleet-wide phase of a tick'),
+    'vlan_tick_duration_seconds': ('histogram', 'Seconds per tick'),
+    'vlan_ticks_total': ('counter', 'Ticks run'),
+}
+
+
+def metrics_file_for(base_dir):
+    """Path of the Prometheus text file under base_dir"""
+    return Path(base_dir) / "state" / "metrics.prom"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.sum += other.sum
+        self.count += other.count
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside its bucket"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return BUCKETS[-1]
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, extra=None):
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in items) + "}"
+
+
+class MetricsRegistry:
+    """Histograms and counters keyed by metric name and labels"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        # Fleet-wide histogram per phase, kept alongside for summary()
+        self.phase_totals = {}
+        # Rendered series names, which never change once a key exists
+        self._series = {}
+        # Ticks not yet folded into the histograms
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def _observe(self, name, value, labels):
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def _inc(self, name, amount, labels):
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def _observe_phase(self, phase, value):
+        histogram = self.phase_totals.get(phase)
+        if histogram is None:
+            histogram = self.phase_totals[phase] = Histogram()
+        histogram.observe(value)
+
+    def observe(self, name, value, **labels):
+        with self._lock:
+            self._observe(name, value, tuple(labels.items()))
+
+    def inc(self, name, amount=1, **labels):
+        with self._lock:
+            self._inc(name, amount, tuple(labels.items()))
+
+    def record_tick(self, report, phases):
+        """Queue a tick's results and fleet-wide phase timings for recording
+
+        Only appends to a list under the lock; the histograms are updated by whoever
+        renders or summarizes next (normally the TextfileWriter thread),
+        so report and phases must not be changed afterwards.
+        """
+        with self._lock:
+            self._pending.append((report, phases))
+
+    def _fold(self):
+        """Record every queued tick; called with the lock held"""
+        pending, self._pending = self._pending, []
+        observe, inc, observe_phase = self._observe, self._inc, self._observe_phase
+        for report, phases in pending:
+            for result in report.results:
+                switch = ('switch', result.name)
+                for phase, seconds in result.phases.items():
+                    observe('vlan_switch_phase_seconds', seconds, (switch, ('phase', phase)))
+                    observe_phase(phase, seconds)
+                if result.ok:
+                    observe('vlan_switch_duration_seconds', result.duration, (switch,))
+                outcome = 'success' if result.ok else 'skipped' if result.skipped else 'failure'
+                inc('vlan_switch_total', 1, (switch, ('result', outcome)))
+                if result.retries:
+                    inc('vlan_switch_retries_total', result.retries, (switch,))
+                if result.pushed:
+                    inc('vlan_ports_written_total', result.pushed, (switch,))
+                if result.drift:
+                    inc('vlan_port_drift_total', len(result.drift), (switch,))
+            for phase, seconds in phases.items():
+                observe('vlan_tick_phase_seconds', seconds, (('phase', phase),))
+                observe_phase(phase, seconds)
+            observe('vlan_tick_duration_seconds', report.duration, ())
+            inc('vlan_ticks_total', 1, ())
+
+    def _series_names(self, name, labels, histogram):
+        series = self._series.get((name, labels))
+        if series is None:
+            if histogram:
+                buckets = [f"{name}_bucket{_labels(labels, ('le', bound))} " for bound in BUCKETS]
+                series = (buckets + [f"{name}_bucket{_labels(labels, ('le', '+Inf'))} "],
+                          f"{name}_sum{_labels(labels)} ", f"{name}_count{_labels(labels)} ")
+            else:
+                series = f"{name}{_labels(labels)} "
+            self._series[(name, labels)] = series
+        return series
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            self._fold()
+            histograms = {key: (list(h.counts), h.sum, h.count) for key, h in self.histograms.items()}
+            counters = dict(self.counters)
+
+        lines = []
+        described = set()
+        for (name, labels), (counts, total, count) in sorted(histograms.items()):
+            if name not in described:
+                described.add(name)
+                kind, text = HELP.get(name, ('histogram', name))
+                lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"]
+            buckets, sum_name, count_name = self._series_names(name, labels, True)
+            cumulative = 0
+            for bucket, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(bucket + str(cumulative))
+            lines.append(buckets[-1] + str(count))
+            lines.append(sum_name + repr(total))
+            lines.append(count_name + str(count))
+        for (name, labels), value in sorted(counters.items()):
+            if name not in described:
+                described.add(name)
+                kind, text = HELP.get(name, ('counter', name))
+                lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"]
+            lines.append(self._series_names(name, labels, False) + str(value))
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """p50/p95 per phase across the fleet, in seconds, for the GUI"""
+        with self._lock:
+            self._fold()
+            return {
+                phase: {'count': h.count, 'p50': h.quantile(0.5), 'p95': h.quantile(0.95)}
+                for phase, h in self.phase_totals.items()
+            }
+
+    def write_textfile(self, path):
+        """Atomically replace path with the rendered metrics"""
+        path = Path(path)
+        tmp_file = path.with_name(path.name + ".tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_file, 'w') as f:
+                f.write(self.render())
+            os.replace(tmp_file, path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {path}: {e}")
+            return False
+        return True
+
+
+class TextfileWriter:
+    """Folds queued ticks and rewrites the metrics file from a background thread"""
+
+    def __init__(self, registry, path):
+        self.registry = registry
+        self.path = Path(path)
+        # registry.summary() as of the last rewrite, for the status file
+        self.summary = {}
+        self._wanted = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="metrics-textfile", daemon=True)
+        self._thread.start()
+        return self
+
+    def request(self):
+        """Schedule a rewrite; the tick that asks does not wait for it"""
+        self._wanted.set()
+
+    def _run(self):
+        while True:
+            self._wanted.wait()
+            self._wanted.clear()
+            self.registry.write_textfile(self.path)
+            self.summary = self.registry.summary()
+            if self._stopping:
+                return
+
+    def stop(self):
+        """Write the final metrics and end the thread"""
+        self._stopping = True
+        self._wanted.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+class MetricsServer:
+    """Serves a registry on http://host:port/metrics"""
+
+    def __init__(self, registry, port, host='127.0.0.1'):
+        # Import here so the GUI and services without a port skip http.server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        self.registry = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.split('?')[0] != '/metrics':
+                    handler.send_error(404)
+                    return
+                body = registry.render().encode()
+                handler.send_response(200)
+                handler.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                handler.send_header('Content-Length', str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def start_metrics_server(registry, port):
+    """Serve registry on the local port, or return None if not configured or not possible"""
+    if not port:
+        return None
+    try:
+        server = MetricsServer(registry, int(port)).start()
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not start metrics endpoint on port {port}: {e}")
+        return None
+    logger.info(f"Metrics served on http://127.0.0.1:{server.port}/metrics")
+    return server
@@ -0,0 +1,321 @@
+"""
+Rate limiting of switch logins and sessions.
+
+Access switches have a handful of vty lines and a weak control-plane
+CPU, and TACACS+/RADIUS servers throttle bursts of logins, so opening
+every session of a large fleet at once causes failures rather than
+speed. A RateLimiter sits around connection setup and config pushes:
+
+    max_sessions_per_device  sessions one device (address and port) may
+                             have in use at once; further users queue
+                             first come, first served (default 1)
+    login_rate, login_burst  new logins per second across the fleet,
+                             as a token bucket (default unlimited)
+    aaa_groups               per AAA server group, e.g.
+                             {"tacacs-east": {"login_rate": 2}}; a
+                             switch names its group with "aaa_group"
+
+Logins waiting for tokens are served round-robin across AAA groups, so
+a large group cannot starve a small one, and in order within a group.
+Reused sessions need no login token. A switch that cannot get its turn
+within rate_limit_wait seconds is skipped for the tick (RateLimited)
+instead of failing. Time spent waiting is added to the switch's
+"queue" phase, which the metrics export like any other phase.
+
+Both the thread engine and the asyncio engine use the same limiter:
+waiters register a wake-up callback and are granted their turn under
+one lock, whichever kind of waiter they are.
+"""
+
+import asyncio
+import collections
+import contextlib
+import threading
+import time
+
+# Defaults, overridable from config.json
+MAX_SESSIONS_PER_DEVICE = 1
+MAX_WAIT = 10.0
+
+
+class RateLimited(Exception):
+    """A switch did not get its turn within the allowed wait"""
+
+
+class TokenBucket:
+    """rate tokens per second, holding at most burst"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'stamp')
+
+    def __init__(self, rate, burst=None, now=0.0):
+        if rate <= 0:
+            raise ValueError("Login rate must be positive")
+        self.rate = float(rate)
+        self.burst = float(burst) if burst else max(1.0, self.rate)
+        self.tokens = self.burst
+        self.stamp = now
+
+    def wait_time(self, now):
+        """Seconds until a token is available, 0 if one is"""
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class Ticket:
+    """A waiter's place in a queue; wake() is called once it is granted"""
+
+    __slots__ = ('key', 'wake', 'granted')
+
+    def __init__(self, key, wake):
+        self.key = key
+        self.wake = wake
+        self.granted = False
+
+
+def bucket_from(settings, share, now):
+    """TokenBucket for a login_rate/login_burst pair, or None when unlimited"""
+    rate = settings.get("login_rate")
+    if not rate:
+        return None
+    burst = settings.get("login_burst")
+    return TokenBucket(rate * share, max(1.0, burst * share) if burst else None, now)
+
+
+class RateLimiter:
+    """Per-device session slots and fair, token-bucketed logins"""
+
+    def __init__(self, max_sessions=MAX_SESSIONS_PER_DEVICE, login_rate=None, login_burst=None, aaa_groups=None,
+                 max_wait=MAX_WAIT, share=1.0, clock=time.monotonic):
+        self.max_sessions = max_sessions
+        self.max_wait = max_wait
+        self.clock = clock
+        now = clock()
+        self.bucket = bucket_from({"login_rate": login_rate, "login_burst": login_burst}, share, now)
+        self.group_buckets = {name: bucket_from(settings, share, now)
+                              for name, settings in (aaa_groups or {}).items()}
+        self._lock = threading.Lock()
+        # Device key -> sessions in use, and tickets waiting for one
+        self._busy = {}
+        self._slot_waiting = {}
+        # AAA group -> tickets waiting to log in, in round-robin order
+        self._login_waiting = collections.OrderedDict()
+        self.stats = {'logins': 0, 'login_waits': 0, 'slot_waits': 0, 'timeouts': 0}
+
+    @staticmethod
+    def device_key(switch):
+        return (switch["switch_ip"], switch.get("port", 22))
+
+    # Device slots; called with the lock held
+
+    def _take_slot(self, ticket):
+        key = ticket.key
+        if self.max_sessions and self._busy.get(key, 0) >= self.max_sessions:
+            self._slot_waiting.setdefault(key, collections.deque()).append(ticket)
+            self.stats['slot_waits'] += 1
+            return False
+        self._busy[key] = self._busy.get(key, 0) + 1
+        ticket.granted = True
+        return True
+
+    def _release_slot(self, key):
+        waiting = self._slot_waiting.get(key)
+        if waiting:
+            # The slot passes straight to the next waiter
+            ticket = waiting.popleft()
+            if not waiting:
+                del self._slot_waiting[key]
+            ticket.granted = True
+            ticket.wake()
+        elif self._busy.get(key, 0) > 1:
+            self._busy[key] -= 1
+        else:
+            self._busy.pop(key, None)
+
+    def _cancel_slot(self, ticket):
+        # A ticket granted meanwhile keeps its slot; the caller releases it
+        waiting = self._slot_waiting.get(ticket.key)
+        if waiting and ticket in waiting:
+            waiting.remove(ticket)
+            if not waiting:
+                del self._slot_waiting[ticket.key]
+
+    # Logins; called with the lock held
+
+    def _enqueue_login(self, ticket):
+        self._login_waiting.setdefault(ticket.key, collections.deque()).append(ticket)
+        self._dispatch()
+        if not ticket.granted:
+            self.stats['login_waits'] += 1
+
+    def _dispatch(self):
+        """Grant logins while tokens last; seconds until the next try, None when nobody waits"""
+        now = self.clock()
+        while self._login_waiting:
+            if self.bucket is not None:
+                wait = self.bucket.wait_time(now)
+                if wait:
+                    return wait
+            chosen = None
+            soonest = None
+            for group in self._login_waiting:
+                bucket = self.group_buckets.get(group)
+                wait = bucket.wait_time(now) if bucket is not None else 0.0
+                if not wait:
+                    chosen = group
+                    break
+                soonest = wait if soonest is None else min(soonest, wait)
+            if chosen is None:
+                return soonest
+            waiting = self._login_waiting[chosen]
+            ticket = waiting.popleft()
+            if waiting:
+                # Round-robin: the group goes to the back of the line
+                self._login_waiting.move_to_end(chosen)
+            else:
+                del self._login_waiting[chosen]
+            if self.bucket is not None:
+                self.bucket.take()
+            if self.group_buckets.get(chosen) is not None:
+                self.group_buckets[chosen].take()
+            self.stats['logins'] += 1
+            ticket.granted = True
+            ticket.wake()
+        return None
+
+    def _cancel_login(self, ticket):
+        waiting = self._login_waiting.get(ticket.key)
+        if waiting and ticket in waiting:
+            waiting.remove(ticket)
+            if not waiting:
+                del self._login_waiting[ticket.key]
+
+    @property
+    def limits_logins(self):
+        return self.bucket is not None or any(bucket is not None for bucket in self.group_buckets.values())
+
+    # Waiting, from threads
+
+    def _wait(self, ticket, enqueue, cancel, poll, what, name):
+        """Block until ticket is granted or max_wait passes; returns seconds waited"""
+        start = self.clock()
+        event = threading.Event()
+        ticket.wake = event.set
+        with self._lock:
+            enqueue(ticket)
+        deadline = start + self.max_wait
+        while True:
+            with self._lock:
+                delay = poll() if not ticket.granted else None
+                if ticket.granted:
+                    return self.clock() - start
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    cancel(ticket)
+                    if ticket.granted:
+                        return self.clock() - start
+                    self.stats['timeouts'] += 1
+                    raise RateLimited(f"[{name}] rate limited: no {what} within {self.max_wait:g}s")
+            event.wait(remaining if delay is None else min(delay, remaining))
+
+    @contextlib.contextmanager
+    def slot(self, switch, phases):
+        """Hold one of the switch's device slots for the duration of the block"""
+        ticket = Ticket(self.device_key(switch), None)
+        waited = self._wait(ticket, self._take_slot, self._cancel_slot, lambda: None, "free session slot",
+                            switch["name"])
+        phases['queue'] = phases.get('queue', 0.0) + waited
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._release_slot(ticket.key)
+
+    def login(self, switch, phases):
+        """Wait for the switch's turn to log in"""
+        if not self.limits_logins:
+            return
+        ticket = Ticket(switch.get("aaa_group"), None)
+        waited = self._wait(ticket, self._enqueue_login, self._cancel_login, self._dispatch, "login token",
+                            switch["name"])
+        phases['queue'] = phases.get('queue', 0.0) + waited
+
+    # Waiting, from coroutines
+
+    async def _wait_async(self, ticket, enqueue, cancel, poll, what, name):
+        loop = asyncio.get_running_loop()
+        start = self.clock()
+        event = asyncio.Event()
+        ticket.wake = lambda: loop.call_soon_threadsafe(event.set)
+        with self._lock:
+            enqueue(ticket)
+        deadline = start + self.max_wait
+        try:
+            while True:
+                with self._lock:
+                    delay = poll() if not ticket.granted else None
+                    if ticket.granted:
+                        return self.clock() - start
+                    remaining = deadline - self.clock()
+                    if remaining <= 0:
+                        cancel(ticket)
+                        if ticket.granted:
+                            return self.clock() - start
+                        self.stats['timeouts'] += 1
+                        raise RateLimited(f"[{name}] rate limited: no {what} within {self.max_wait:g}s")
+                try:
+                    await asyncio.wait_for(event.wait(), remaining if delay is None else min(delay, remaining))
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            with self._lock:
+                cancel(ticket)
+            raise
+
+    @contextlib.asynccontextmanager
+    async def slot_async(self, switch, phases):
+        ticket = Ticket(self.device_key(switch), None)
+        try:
+            waited = await self._wait_async(ticket, self._take_slot, self._cancel_slot, lambda: None,
+                                            "free session slot", switch["name"])
+        except asyncio.CancelledError:
+            # Cancelled just after the slot was handed over
+            if ticket.granted:
+                with self._lock:
+                    self._release_slot(ticket.key)
+            raise
+        phases['queue'] = phases.get('queue', 0.0) + waited
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._release_slot(ticket.key)
+
+    async def login_async(self, switch, phases):
+        if not self.limits_logins:
+            return
+        ticket = Ticket(switch.get("aaa_group"), None)
+        waited = await self._wait_async(ticket, self._enqueue_login, self._cancel_login, self._dispatch,
+                                        "login token", switch["name"])
+        phases['queue'] = phases.get('queue', 0.0) + waited
+
+
+def rate_limiter_from_config(config):
+    """RateLimiter for config.json, or None when "rate_limit" is false
+
+    "rate_limit_share" scales the login rates down for one of several
+    processes that share them (the sharded engine's workers).
+    """
+    if not config.get("rate_limit", True):
+        return None
+    return RateLimiter(
+        max_sessions=config.get("max_sessions_per_device", MAX_SESSIONS_PER_DEVICE),
+        login_rate=config.get("login_rate"),
+        login_burst=config.get("login_burst"),
+        aaa_groups=config.get("aaa_groups"),
+        max_wait=config.get("rate_limit_wait", MAX_WAIT),
+        share=config.get("rate_limit_share", 1.0),
+    )
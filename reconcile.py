@@ -0,0 +1,154 @@
+"""
+Desired-state reconciliation of port VLANs.
+
+Before pushing a tick, the engine reads what every port of a switch is
+actually on with one bulk show command ("show interfaces status" by
+default, or "show interfaces switchport"), and only ports whose target
+VLAN differs from that get a config change. If nothing differs, no
+config is written at all.
+
+The last snapshot of each switch is kept and updated with every push
+that succeeded. When the next read disagrees with that cached view,
+the difference is reported as drift: a change that did not take
+effect, or one somebody made on the switch by hand. With max_age the
+snapshot is trusted for that many seconds, skipping the read.
+"""
+
+import logging
+import threading
+import time
+
+from interfaces import normalize_interface
+
+logger = logging.getLogger(__name__)
+
+SHOW_COMMANDS = {
+    'status': 'show interfaces status',
+    'switchport': 'show interfaces switchport',
+}
+
+
+def _canonical(name):
+    try:
+        return normalize_interface(name)
+    except ValueError:
+        return None
+
+
+def parse_interfaces_status(output):
+    """Map canonical port name -> Vlan column of "show interfaces status"
+
+    The column holds the access VLAN, or "trunk"/"routed" for ports
+    that are not access ports. Columns are located from the header
+    because the Name column may contain spaces.
+    """
+    ports = {}
+    vlan_start = vlan_end = None
+    for line in output.splitlines():
+        if vlan_start is None:
+            if line.startswith("Port") and " Vlan " in line:
+                vlan_start = line.index(" Vlan ") + 1
+                vlan_end = line.find(" Duplex", vlan_start)
+            continue
+        fields = line.split()
+        if not fields:
+            continue
+        port = _canonical(fields[0])
+        if port is None:
+            continue
+        vlan = line[vlan_start:vlan_end if vlan_end > 0 else None].split()
+        if vlan:
+            ports[port] = vlan[0]
+    return ports
+
+
+def parse_interfaces_switchport(output):
+    """Map canonical port name -> access VLAN from "show interfaces switchport"
+
+    Ports operating as trunks map to "trunk".
+    """
+    ports = {}
+    port = None
+    for line in output.splitlines():
+        key, _, value = line.strip().partition(":")
+        value = value.strip()
+        if key == "Name":
+            port = _canonical(value)
+        elif port is None:
+            continue
+        elif key == "Operational Mode" and value == "trunk":
+            ports[port] = "trunk"
+        elif key == "Access Mode VLAN" and port not in ports:
+            ports[port] = value.split()[0] if value else None
+    return ports
+
+
+PARSERS = {
+    'status': parse_interfaces_status,
+    'switchport': parse_interfaces_switchport,
+}
+
+
+class Reconciler:
+    """Cached per-switch view of actual port VLANs"""
+
+    def __init__(self, command='status', max_age=0, clock=time.monotonic):
+        if command not in SHOW_COMMANDS:
+            raise ValueError(f"Unknown reconcile command: {command}")
+        self.show_command = SHOW_COMMANDS[command]
+        self.parse = PARSERS[command]
+        self.max_age = max_age
+        self.clock = clock
+        # Switch name -> (monotonic time read, {port: vlan})
+        self.snapshots = {}
+        self._lock = threading.Lock()
+
+    def needs_refresh(self, name):
+        snapshot = self.snapshots.get(name)
+        return snapshot is None or self.clock() - snapshot[0] >= self.max_age
+
+    def refresh(self, name, output):
+        """Store a fresh read of a switch; return drift from the cached view
+
+        Drift maps port -> (VLAN the cache expected, VLAN found).
+        """
+        actual = self.parse(output)
+        with self._lock:
+            old = self.snapshots.get(name)
+            self.snapshots[name] = (self.clock(), actual)
+        if old is None:
+            return {}
+        return {port: (vlan, actual.get(port)) for port, vlan in old[1].items()
+                if port in actual and actual[port] != vlan}
+
+    def changes(self, name, assignments):
+        """The part of assignments (port -> VLAN) not already in place"""
+        snapshot = self.snapshots.get(name)
+        actual = snapshot[1] if snapshot else {}
+        return {port: vlan for port, vlan in assignments.items() if actual.get(port) != vlan}
+
+    def applied(self, name, changes):
+        """Record ports a push has moved"""
+        with self._lock:
+            snapshot = self.snapshots.get(name)
+            if snapshot is not None:
+                snapshot[1].update(changes)
+
+    def forget(self, name):
+        """Drop a switch's snapshot, so it is read before the next push"""
+        with self._lock:
+            self.snapshots.pop(name, None)
+
+
+def reconciler_from_config(config):
+    """Reconciler for config.json, or None when "reconcile" is false"""
+    if not config.get("reconcile", True):
+        return None
+    return Reconciler(config.get("reconcile_command", "status"), config.get("reconcile_max_age", 0))
+
+
+def log_drift(name, drift):
+    """Warn about ports found on another VLAN than the cached view said"""
+    if drift:
+        logger.warning("[%s] Drift on %d port(s): %s", name, len(drift),
+                       ", ".join(f"{port} {expected}->{actual}" for port, (expected, actual) in sorted(drift.items())))
@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import json
+import queue
 import threading
 import subprocess
 import os
@@ -9,6 +10,24 @@ import datetime
 import time
 from pathlib import Path
 
+from credentials import CredentialProvider, epoch_file_for, invalidate_credentials
+from log_tail import LogTailer
+from log_viewer import LogViewer
+from metrics import SWITCH_PHASES
+from status_channel import StatusReader, status_file_for
+from vlan_sequence import VlanSequence
+from service_state import RUNNING, UNKNOWN, ServiceStateWatcher, default_backend
+
+# Test Connection choices -> health_check tiers
+CHECK_TIERS = {"Reachability": "reach", "Login": "login", "Enable": "enable"}
+
+# Switch filter entry of the history window that shows every switch
+ALL_SWITCHES = "All switches"
+
+# Rows the history window shows
+HISTORY_ROWS = 500
+
+
 class VLANSwitcherGUI:
     def __init__(self, root):
         self.root = root
@@ -37,6 +56,17 @@ class VLANSwitcherGUI:
         self.service_running = False
         self.next_switch_time = None
         
+        # One tailer feeds every log-based part of the dashboard
+        self.log_tailer = LogTailer(self.base_dir / "logs" / "vlan_switcher.log")
+        self.displayed_log_version = None
+        
+        # Status record published by the service
+        self.status_reader = StatusReader(status_file_for(self.base_dir))
+        
+        # Service state is watched off the UI thread and pushed to us
+        self.service_watcher = ServiceStateWatcher(default_backend("SecureVLANSwitcherService"))
+        self.service_watcher.start()
+        
         # Start status update timer
         self.update_status_display()
         self.start_status_timer()
@@ -107,11 +137,11 @@ class VLANSwitcherGUI:
         vlan_frame = ttk.LabelFrame(left_frame, text="VLAN Configuration", padding=10)
         vlan_frame.pack(fill=tk.X, pady=(0, 10))
         
-        ttk.Label(vlan_frame, text="VLANs (comma separated):").pack(anchor=tk.W)
+        ttk.Label(vlan_frame, text="VLANs (comma separated, ranges allowed):").pack(anchor=tk.W)
         self.vlan_var = tk.StringVar()
         self.vlan_entry = ttk.Entry(vlan_frame, textvariable=self.vlan_var, width=50)
         self.vlan_entry.pack(fill=tk.X, pady=(5, 0))
-        ttk.Label(vlan_frame, text="(e.g., 10,20,30,40)", font=('Arial', 8)).pack(anchor=tk.W, pady=(2, 0))
+        ttk.Label(vlan_frame, text="(e.g., 10,20,30,40 or 100-199,300)", font=('Arial', 8)).pack(anchor=tk.W, pady=(2, 0))
         
         # Buttons Frame
         button_frame = ttk.Frame(left_frame)
@@ -127,11 +157,26 @@ class VLANSwitcherGUI:
                                   command=self.test_connection)
         self.test_btn.pack(side=tk.LEFT, padx=5)
         
+        # How far Test Connection goes on every switch
+        self.check_tier_var = tk.StringVar(value="Enable")
+        ttk.Combobox(button_frame, textvariable=self.check_tier_var, values=list(CHECK_TIERS),
+                     state="readonly", width=11).pack(side=tk.LEFT, padx=(0, 5))
+        
         # Run Console Button
         self.console_btn = ttk.Button(button_frame, text="Run Console Mode", 
                                      command=self.run_console)
         self.console_btn.pack(side=tk.LEFT, padx=5)
         
+        # Switch History Button
+        self.history_btn = ttk.Button(button_frame, text="History", 
+                                     command=self.show_history)
+        self.history_btn.pack(side=tk.LEFT, padx=5)
+        
+        # Whole-log viewer
+        self.log_btn = ttk.Button(button_frame, text="View Log", 
+                                 command=self.show_log)
+        self.log_btn.pack(side=tk.LEFT, padx=5)
+        
         # Service Buttons Frame
         service_button_frame = ttk.Frame(left_frame)
         service_button_frame.pack(fill=tk.X, pady=(0, 10))
@@ -183,6 +228,11 @@ class VLANSwitcherGUI:
         ttk.Label(status_grid, text="Next Switch In:", font=('Arial', 10, 'bold')).grid(row=3, column=0, sticky=tk.W, pady=2)
         self.timer_label = ttk.Label(status_grid, text="--:--", font=('Arial', 12, 'bold'), foreground="gray")
         self.timer_label.grid(row=3, column=1, sticky=tk.W, padx=(10, 0), pady=2)
+
+        # Median latency of each switching phase
+        ttk.Label(status_grid, text="Timings (p50):", font=('Arial', 10, 'bold')).grid(row=4, column=0, sticky=tk.W, pady=2)
+        self.timings_label = ttk.Label(status_grid, text="N/A", font=('Arial', 9), foreground="gray")
+        self.timings_label.grid(row=4, column=1, sticky=tk.W, padx=(10, 0), pady=2)
           # Activity Log
         log_frame = ttk.LabelFrame(activity_panel, text="Logs", padding=5)
         log_frame.pack(fill=tk.BOTH, expand=True, pady=(10,0))
@@ -232,8 +282,10 @@ class VLANSwitcherGUI:
                 self.interface_var.set(config.get("interface", "1/0/10"))
                 self.schedule_var.set(str(config.get("schedule_minutes", 1)))
                   # Load VLANs
-                vlans = config.get("vlans", [])
-                self.vlan_var.set(",".join(vlans))
+                try:
+                    self.vlan_var.set(str(VlanSequence(config.get("vlans", []))))
+                except ValueError as e:
+                    self.log_status(f"Invalid VLANs in configuration: {e}")
                 
                 self.log_status("Configuration loaded successfully")
         except Exception as e:
@@ -255,8 +307,11 @@ class VLANSwitcherGUI:
                 messagebox.showerror("Error", "Password is required")
                 return
               # Parse VLANs
-            vlan_text = self.vlan_var.get().strip()
-            vlans = [vlan.strip() for vlan in vlan_text.split(',') if vlan.strip()]
+            try:
+                vlans = VlanSequence(self.vlan_var.get())
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return
             
             if not vlans:
                 messagebox.showerror("Error", "At least one VLAN is required")
@@ -270,23 +325,40 @@ class VLANSwitcherGUI:
                 messagebox.showerror("Error", "Schedule minutes must be a positive integer")
                 return
             
-            # Create configuration
-            config = {
+            # Keep settings the form does not edit (e.g. the fleet "switches" list)
+            config_path = self.base_dir / "config.json"
+            config = {}
+            if config_path.exists():
+                with open(config_path, 'r') as f:
+                    config = json.load(f)
+
+            credentials_changed = (config.get("password") != self.password_var.get() or
+                                   config.get("enable_password") != self.enable_password_var.get())
+
+            # Update configuration
+            config.update({
                 "switch_ip": self.switch_ip_var.get().strip(),
                 "username": self.username_var.get().strip(),
                 "password": self.password_var.get(),
                 "enable_password": self.enable_password_var.get(),
                 "interface": self.interface_var.get().strip() or "1/0/10",
                 "schedule_minutes": schedule_minutes,
-                "vlans": vlans
-            }
+                # Stored in range form, e.g. "100-199,300"
+                "vlans": str(vlans)
+            })
             
-            # Save to file
-            config_path = self.base_dir / "config.json"
-            with open(config_path, 'w') as f:
+            # Save to file; replaced in one step because the running
+            # service picks up every change of config.json
+            tmp_path = config_path.with_name(config_path.name + ".tmp")
+            with open(tmp_path, 'w') as f:
                 json.dump(config, f, indent=4)
+            os.replace(tmp_path, config_path)
             
-            self.log_status("Configuration saved successfully")
+            # Make the running service drop its cached secrets
+            if credentials_changed:
+                invalidate_credentials(self.base_dir)
+            
+            self.log_status("Configuration saved successfully; a running service applies it within seconds")
             messagebox.showinfo("Success", "Configuration saved successfully!")
             
         except Exception as e:
@@ -303,6 +375,7 @@ class VLANSwitcherGUI:
                 
                 self.log_status("Installing service to run as Local System")
                 result = self.run_service_command("install")
+                self.service_watcher.refresh()
                 
                 if result.returncode == 0:
                     self.log_status("✓ Service installed successfully")
@@ -330,43 +403,151 @@ class VLANSwitcherGUI:
         
         threading.Thread(target=install_worker, daemon=True).start()
 
+    def form_config(self):
+        """config.json with the form's unsaved values applied"""
+        config_path = self.base_dir / "config.json"
+        config = {}
+        if config_path.exists():
+            with open(config_path, 'r') as f:
+                config = json.load(f)
+        config.update({
+            "switch_ip": self.switch_ip_var.get().strip(),
+            "username": self.username_var.get().strip(),
+            "password": self.password_var.get(),
+            "enable_password": self.enable_password_var.get(),
+            "interface": self.interface_var.get().strip() or "1/0/10",
+            "vlans": self.vlan_var.get(),
+        })
+        return config
+    
     def test_connection(self):
-        """Test connection to the switch"""
-        def test_worker():
-            try:
-                self.log_status("Testing connection to switch...")
-                
-                # Save config first
-                self.save_config()
-                
-                # Import here to avoid blocking GUI startup
-                from netmiko import ConnectHandler
-                
-                device = {
-                    "device_type": "cisco_ios",
-                    "ip": self.switch_ip_var.get().strip(),
-                    "username": self.username_var.get().strip(),
-                    "password": self.password_var.get(),
-                    "secret": self.enable_password_var.get(),
-                }
-                
-                connection = ConnectHandler(**device)
-                connection.enable()
-                
-                # Test a simple command
-                output = connection.send_command("show version")
-                connection.disconnect()
-                
-                self.log_status("✓ Connection test successful!")
-                messagebox.showinfo("Success", "Connection to switch successful!")
-                
-            except Exception as e:
-                error_msg = f"✗ Connection test failed: {e}"
-                self.log_status(error_msg)
-                messagebox.showerror("Connection Failed", str(e))
+        """Check every configured switch at once, streaming the results"""
+        # Import here to avoid slowing down GUI startup
+        from fleet import load_switches
+        from health_check import HealthCheck
+        from rate_limit import rate_limiter_from_config
         
-        # Run test in background thread
-        threading.Thread(target=test_worker, daemon=True).start()
+        try:
+            config = self.form_config()
+            switches = load_switches(config)
+            # Logins are paced like the service's, so a check does not flood the AAA servers
+            limiter = rate_limiter_from_config(config)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Invalid configuration: {e}")
+            return
+        
+        tier = CHECK_TIERS[self.check_tier_var.get()]
+        if tier != "reach":
+            credentials = CredentialProvider(epoch_file=epoch_file_for(self.base_dir))
+            missing = credentials.apply(switches)
+            if missing:
+                self.log_status(f"No password for: {', '.join(missing)}")
+        
+        self.test_btn.config(state=tk.DISABLED)
+        self.log_status(f"Checking {len(switches)} switch(es), up to {self.check_tier_var.get().lower()}...")
+        self.health_check = HealthCheck(switches, tier, limiter=limiter).start()
+        self.health_counts = [0, 0]
+        self.root.after(100, self.poll_health_check)
+    
+    def poll_health_check(self):
+        """Show health check results that arrived since the last poll"""
+        check = self.health_check
+        # Read before draining, so no result is left behind
+        finished = check.done.is_set()
+        while True:
+            try:
+                result = check.results.get_nowait()
+            except queue.Empty:
+                break
+            self.health_counts[0 if result.ok else 1] += 1
+            self.log_status(result.summary())
+        if not finished:
+            self.root.after(100, self.poll_health_check)
+            return
+        ok, failed = self.health_counts
+        self.log_status(f"Connection test finished in {check.duration:.1f}s: {ok} ok, {failed} failed")
+        self.test_btn.config(state=tk.NORMAL)
+    
+    def show_history(self):
+        """Open a window with the switch history recorded by the service"""
+        # Import here so starting the GUI does not load sqlite3
+        import sqlite3
+        from history_store import HistoryStore, first_line, history_file_for
+        try:
+            store = HistoryStore(history_file_for(self.base_dir), readonly=True)
+        except sqlite3.Error:
+            self.log_status("No switch history yet; it is recorded once the service switches")
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title("Switch History")
+        window.geometry("760x420")
+        
+        filters = ttk.Frame(window, padding=5)
+        filters.pack(fill=tk.X)
+        ttk.Label(filters, text="Switch:").pack(side=tk.LEFT)
+        device_var = tk.StringVar(value=ALL_SWITCHES)
+        devices = ttk.Combobox(filters, textvariable=device_var, state="readonly", width=24)
+        devices.pack(side=tk.LEFT, padx=5)
+        ttk.Label(filters, text="Port:").pack(side=tk.LEFT)
+        port_var = tk.StringVar()
+        port_entry = ttk.Entry(filters, textvariable=port_var, width=14)
+        port_entry.pack(side=tk.LEFT, padx=5)
+        
+        columns = {"time": 140, "switch": 130, "result": 70, "vlan": 90, "seconds": 60, "error": 250}
+        tree = ttk.Treeview(window, columns=list(columns), show="headings")
+        for column, width in columns.items():
+            tree.heading(column, text=column.capitalize())
+            tree.column(column, width=width, anchor=tk.W)
+        scrollbar = ttk.Scrollbar(window, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.pack(fill=tk.BOTH, expand=True)
+        
+        def format_time(timestamp):
+            return datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+        
+        def refresh(event=None):
+            tree.delete(*tree.get_children())
+            device = None if device_var.get() == ALL_SWITCHES else device_var.get()
+            port = port_var.get().strip()
+            try:
+                devices["values"] = [ALL_SWITCHES] + [row["device"] for row in store.devices()]
+                if port and device:
+                    # VLAN changes of one port
+                    for row in store.port_history(device, port, HISTORY_ROWS):
+                        tree.insert("", tk.END, values=(
+                            format_time(row["time"]), f"{device} {port}", "ok" if row["ok"] else "failed",
+                            f"{row['from_vlan'] or '?'} → {row['to_vlan']}", "", ""))
+                    return
+                for row in store.attempts(device, limit=HISTORY_ROWS):
+                    duration = f"{row['duration']:.2f}" if row["duration"] is not None else ""
+                    tree.insert("", tk.END, values=(
+                        format_time(row["time"]), row["device"], row["outcome"], row["vlans"] or "",
+                        duration, first_line(row["error"])))
+            except sqlite3.Error as e:
+                self.log_status(f"Could not read switch history: {e}")
+        
+        def close():
+            store.close()
+            window.destroy()
+        
+        ttk.Button(filters, text="Refresh", command=refresh).pack(side=tk.LEFT, padx=5)
+        devices.bind("<<ComboboxSelected>>", refresh)
+        port_entry.bind("<Return>", refresh)
+        window.protocol("WM_DELETE_WINDOW", close)
+        refresh()
+    
+    def show_log(self):
+        """Open a window to browse and search the whole service log"""
+        devices = []
+        try:
+            with open(self.base_dir / "config.json", 'r') as f:
+                config = json.load(f)
+            devices = [entry["name"] for entry in config.get("switches", []) if entry.get("name")]
+        except (OSError, ValueError):
+            pass
+        LogViewer(self.root, self.base_dir / "logs" / "vlan_switcher.log", devices)
     
     def run_console(self):
         """Run the application in console mode"""
@@ -403,6 +584,7 @@ class VLANSwitcherGUI:
                 self.log_status("Starting Windows service...")
                 
                 result = self.run_service_command("start")
+                self.service_watcher.refresh()
                 
                 if result.returncode == 0:
                     self.log_status("✓ Service started successfully")
@@ -430,6 +612,7 @@ class VLANSwitcherGUI:
                 self.log_status("Stopping Windows service...")
                 
                 result = self.run_service_command("stop")
+                self.service_watcher.refresh()
                 
                 if result.returncode == 0:
                     self.log_status("✓ Service stopped successfully")
@@ -453,6 +636,7 @@ class VLANSwitcherGUI:
                 self.log_status("Uninstalling Windows service...")
                 
                 result = self.run_service_command("remove")
+                self.service_watcher.refresh()
                 
                 if result.returncode == 0:
                     self.log_status("✓ Service uninstalled successfully")
@@ -478,103 +662,69 @@ class VLANSwitcherGUI:
     def update_activity_logs(self):
         """Update the activity log display with recent log entries"""
         try:
-            log_file = self.base_dir / "logs" / "vlan_switcher.log"
-            if log_file.exists():
-                with open(log_file, 'r') as f:
-                    lines = f.readlines()
-                    # Get the last 20 lines and format them for display
-                    recent_lines = lines[-20:] if len(lines) > 20 else lines
-                    
-                    # Clear the current text and add recent log entries
-                    self.status_text.delete(1.0, tk.END)
-                    
-                    for line in recent_lines:
-                        # Clean up the log line for display
-                        if ' - INFO - ' in line:
-                            # Extract just the message part after the log level
-                            message = line.split(' - INFO - ', 1)[1].strip()
-                            timestamp = line.split(' - ')[0].split(',')[0]  # Remove milliseconds
-                            display_line = f"{timestamp[-8:]} - {message}\n"  # Show only time part
-                            self.status_text.insert(tk.END, display_line)
-                        elif ' - ERROR - ' in line:
-                            message = line.split(' - ERROR - ', 1)[1].strip()
-                            timestamp = line.split(' - ')[0].split(',')[0]
-                            display_line = f"{timestamp[-8:]} - ERROR: {message}\n"
-                            self.status_text.insert(tk.END, display_line)
-                        elif line.strip():  # Non-empty line without standard format
-                            self.status_text.insert(tk.END, f"{line.strip()}\n")
-                    
-                    # Scroll to the bottom
-                    self.status_text.see(tk.END)
+            # Nothing new since the last refresh
+            if self.log_tailer.version == self.displayed_log_version:
+                return
+            self.displayed_log_version = self.log_tailer.version
+            
+            # Clear the current text and add recent log entries
+            self.status_text.delete(1.0, tk.END)
+            
+            for line in self.log_tailer.recent_lines:
+                # Clean up the log line for display
+                if ' - INFO - ' in line:
+                    # Extract just the message part after the log level
+                    message = line.split(' - INFO - ', 1)[1].strip()
+                    timestamp = line.split(' - ')[0].split(',')[0]  # Remove milliseconds
+                    display_line = f"{timestamp[-8:]} - {message}\n"  # Show only time part
+                    self.status_text.insert(tk.END, display_line)
+                elif ' - ERROR - ' in line:
+                    message = line.split(' - ERROR - ', 1)[1].strip()
+                    timestamp = line.split(' - ')[0].split(',')[0]
+                    display_line = f"{timestamp[-8:]} - ERROR: {message}\n"
+                    self.status_text.insert(tk.END, display_line)
+                elif line.strip():  # Non-empty line without standard format
+                    self.status_text.insert(tk.END, f"{line.strip()}\n")
+            
+            # Scroll to the bottom
+            self.status_text.see(tk.END)
         except Exception as e:
             # If we can't read logs, just keep the existing status messages
             pass
 
     def check_service_status(self):
         """Check if the service is actually running"""
-        try:
-            result = subprocess.run(['sc', 'query', 'SecureVLANSwitcherService'], 
-                                  capture_output=True, text=True)
-            if result.returncode == 0 and 'RUNNING' in result.stdout:
-                return True
-            return False
-        except:            return False
+        # Last state reported by the watcher; no query on the UI thread
+        return self.service_watcher.state == RUNNING
     
-    def read_current_vlan_from_logs(self):
-        """Read the current VLAN from log files"""
-        try:
-            log_file = self.base_dir / "logs" / "vlan_switcher.log"
-            if log_file.exists():
-                with open(log_file, 'r') as f:
-                    lines = f.readlines()
-                    # Look for the most recent VLAN switch in the logs
-                    for line in reversed(lines[-100:]):  # Check last 100 lines
-                        if "Switching to VLAN" in line:
-                            # Extract VLAN number from log line like "Switching to VLAN 10 on interface"
-                            try:
-                                parts = line.split("Switching to VLAN ")[1].split(" ")[0]
-                                if parts.isdigit():
-                                    return parts
-                            except (IndexError, AttributeError):
-                                continue
-                        elif "ERROR" in line.upper() or "Failed" in line:
-                            continue  # Skip error lines, look for successful switches
-                    
-                    # If no VLAN switch found, check if service just started
-                    for line in reversed(lines[-50:]):
-                        if "Starting VLAN switcher service" in line or "Service started" in line:
-                            return "Starting..."
-                            
-            return "Not Connected"
-        except Exception as e:            return "Not Connected"
+    def read_current_vlan(self):
+        """Read the current VLAN from the service status"""
+        status = self.status_reader.status
+        if status.get("state") == "error":
+            return "Error"
+        if status.get("current_vlan"):
+            return status["current_vlan"]
+        # No VLAN switched yet, check if service just started
+        if status.get("state") in ("starting", "idle", "switching"):
+            return "Starting..."
+        return "Not Connected"
     
     def calculate_next_switch_time(self):
-        """Calculate when the next VLAN switch should occur based on schedule"""
-        try:
-            schedule_minutes = int(self.schedule_var.get())
-            log_file = self.base_dir / "logs" / "vlan_switcher.log"
-            if log_file.exists():
-                with open(log_file, 'r') as f:
-                    lines = f.readlines()
-                    # Look for the most recent switch time
-                    for line in reversed(lines[-100:]):
-                        if "Switching to VLAN" in line:
-                            # Try to extract timestamp from log line
-                            try:
-                                # Log format: "2025-06-19 14:30:25,123 - INFO - Switching to VLAN..."
-                                timestamp_str = line.split(' - ')[0]
-                                # Remove milliseconds if present
-                                if ',' in timestamp_str:
-                                    timestamp_str = timestamp_str.split(',')[0]
-                                last_switch = datetime.datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
-                                return last_switch + datetime.timedelta(minutes=schedule_minutes)
-                            except (ValueError, IndexError):
-                                continue
-            
-            # If no log found or can't parse, estimate next switch time
-            return datetime.datetime.now() + datetime.timedelta(minutes=schedule_minutes)
-        except:
-            return None
+        """Next VLAN switch time as scheduled by the service"""
+        next_switch = self.status_reader.status.get("next_switch")
+        if next_switch:
+            return datetime.datetime.fromtimestamp(next_switch)
+        return None
+    
+    def format_timings(self):
+        """Median milliseconds per switching phase from the service metrics"""
+        metrics = self.status_reader.status.get("metrics") or {}
+        parts = []
+        for phase in ("queue",) + SWITCH_PHASES + ("persist",):
+            stats = metrics.get(phase)
+            if stats and stats.get("p50") is not None:
+                parts.append(f"{phase} {stats['p50'] * 1000:.0f}ms")
+        return ", ".join(parts) or "N/A"
     
     def update_status_display(self):
         """Update the current status display"""
@@ -589,11 +739,11 @@ class VLANSwitcherGUI:
             else:
                 self.service_status_label.config(text="Stopped", foreground="red")
 
-            # Get current VLAN from logs if service is running
+            # Get current VLAN from the service if it is running
             if actual_service_running:
-                current_vlan_from_logs = self.read_current_vlan_from_logs()
-                if current_vlan_from_logs != "Not Connected":
-                    self.current_vlan = current_vlan_from_logs
+                current_vlan = self.read_current_vlan()
+                if current_vlan != "Not Connected":
+                    self.current_vlan = current_vlan
                     
             # Update current VLAN display
             self.current_vlan_label.config(text=self.current_vlan)
@@ -605,36 +755,26 @@ class VLANSwitcherGUI:
                 self.current_vlan_label.config(foreground="green")
               
             # Update next VLAN
-            vlans_text = self.vlan_var.get().strip()
-            vlans = [vlan.strip() for vlan in vlans_text.split(',') if vlan.strip()]
-            if self.current_vlan in vlans and len(vlans) > 1:
-                try:
-                    current_index = vlans.index(self.current_vlan)
-                    next_index = (current_index + 1) % len(vlans)
-                    self.next_vlan = vlans[next_index]
-                except (ValueError, IndexError):
-                    self.next_vlan = vlans[0] if vlans else "N/A"
-            elif vlans and actual_service_running:
-                # If service is running but current VLAN not in list, show first VLAN as next
-                self.next_vlan = vlans[0]
+            if actual_service_running and self.status_reader.status.get("next_vlan"):
+                self.next_vlan = self.status_reader.status["next_vlan"]
             else:
                 self.next_vlan = "N/A"
             self.next_vlan_label.config(text=self.next_vlan)
 
             # Update timer display
             if actual_service_running:
-                # Calculate next switch time from logs
-                calculated_next_time = self.calculate_next_switch_time()
-                if calculated_next_time:
-                    self.next_switch_time = calculated_next_time
+                # Next switch time from the service's scheduler
+                self.next_switch_time = self.calculate_next_switch_time()
                     
-                if self.next_switch_time:
+                if self.status_reader.status.get("state") == "switching":
+                    self.timer_label.config(text="Switching...", foreground="orange")
+                elif self.next_switch_time:
                     now = datetime.datetime.now()
                     if self.next_switch_time > now:
-                        time_diff = self.next_switch_time - now
-                        minutes = int(time_diff.total_seconds() // 60)
-                        seconds = int(time_diff.total_seconds() % 60)
-                        timer_text = f"{minutes:02d}:{seconds:02d}"
+                        # Schedules with windows may be hours away
+                        hours, rest = divmod(int((self.next_switch_time - now).total_seconds()), 3600)
+                        minutes, seconds = divmod(rest, 60)
+                        timer_text = f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
                         self.timer_label.config(text=timer_text, foreground="blue")
                     else:
                         self.timer_label.config(text="Switching...", foreground="orange")
@@ -642,6 +782,9 @@ class VLANSwitcherGUI:
                     self.timer_label.config(text="Starting...", foreground="orange")
             else:
                 self.timer_label.config(text="--:--", foreground="gray")
+            
+            timings = self.format_timings() if actual_service_running else "N/A"
+            self.timings_label.config(text=timings, foreground="gray" if timings == "N/A" else "black")
                 
         except Exception as e:
             # Silently handle any display update errors
@@ -655,19 +798,23 @@ class VLANSwitcherGUI:
         else:
             self.current_vlan_label.config(foreground="green")
 
-    def set_next_switch_time(self, minutes_from_now):
-        """Set the next switch time"""
-        if minutes_from_now:
-            self.next_switch_time = datetime.datetime.now() + datetime.timedelta(minutes=minutes_from_now)
-        else:
-            self.next_switch_time = None
-    
     def set_service_status(self, running):
         """Update service running status"""
         self.service_running = running
 
     def start_status_timer(self):
         """Start periodic status updates"""
+        # Service state changes pushed by the watcher
+        while True:
+            try:
+                old_state, new_state = self.service_watcher.changes.get_nowait()
+            except queue.Empty:
+                break
+            if old_state != UNKNOWN:
+                self.log_status(f"Service state changed: {new_state.replace('_', ' ')}")
+        # Read only what changed since the last update
+        self.status_reader.poll()
+        self.log_tailer.poll()
         self.update_status_display()
         # Update activity logs if service is running
         if self.service_running:
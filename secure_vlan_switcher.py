@@ -1,246 +1,30 @@
 import json
 import logging
-import os
 import sys
 import time
-import schedule
 import argparse
-import keyring
 from pathlib import Path
 
-# Windows service imports
-import win32serviceutil
-import win32service
-import win32event
-import servicemanager
-import win32api
+# Network imports; netmiko itself is loaded by the first session
+from session_pool import get_shared_pool
+from fleet import carry_rotation, create_engine, load_switches, record_rotation, restore_rotation
+from state_journal import RotationJournal
+from credentials import CredentialProvider, epoch_file_for
+from status_channel import StatusPublisher, status_file_for
+from metrics import MetricsRegistry, TextfileWriter, metrics_file_for, start_metrics_server
+from deadline_scheduler import DeadlineScheduler, interval_from_config
+from config_watcher import POLL_INTERVAL, ConfigDiff, ConfigWatcher
+from command_plan import render_plans
+from timeline import follow_schedules, render_timeline, uses_schedules
 
-# Network imports
-from netmiko import ConnectHandler
-from netmiko.exceptions import NetmikoTimeoutException, NetmikoAuthenticationException
 
-
-class SecureVLANSwitcherService(win32serviceutil.ServiceFramework):
-    """Secure VLAN Switcher Windows Service with credential management"""
-    
-    _svc_name_ = "SecureVLANSwitcherService"
-    _svc_display_name_ = "Secure VLAN Switcher Service"
-    _svc_description_ = "Automatically switches VLANs on network interface with secure credential management"
-    
-    def __init__(self, args):
-        win32serviceutil.ServiceFramework.__init__(self, args)
-        self.hWaitStop = win32event.CreateEvent(None, 0, 0, None)
-        self.is_alive = True
-        
-        # Service name for keyring
-        self.keyring_service = "VLANSwitcher"
-        
-        # Setup logging
-        self.setup_logging()
-        
-        # Load configuration
-        self.config = self.load_config()
-        
-    def setup_logging(self):
-        """Setup logging to file"""
-        # Get executable directory
-        if hasattr(sys, '_MEIPASS'):
-            base_dir = Path(sys.executable).parent
-        else:
-            base_dir = Path(__file__).parent
-            
-        # Create logs directory
-        log_dir = base_dir / "logs"
-        log_dir.mkdir(exist_ok=True)
-        
-        # Setup logger
-        log_file = log_dir / "vlan_switcher.log"
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler()  # Also log to console in debug mode
-            ]
-        )
-        self.logger = logging.getLogger(__name__)
-        
-    def get_stored_credential(self, key):
-        """Retrieve a stored credential from keyring"""
-        try:
-            return keyring.get_password(self.keyring_service, key)
-        except Exception as e:
-            self.logger.warning(f"Could not retrieve stored credential {key}: {e}")
-        return None
-        
-    def load_config(self):
-        """Load configuration from config.json with secure credential support"""
-        try:
-            if hasattr(sys, '_MEIPASS'):
-                base_dir = Path(sys.executable).parent
-            else:
-                base_dir = Path(__file__).parent
-                
-            config_file = base_dir / "config.json"
-            
-            if not config_file.exists():
-                self.logger.error(f"Configuration file not found: {config_file}")
-                return None
-                
-            with open(config_file, 'r') as f:
-                config = json.load(f)
-            
-            # Load credentials from secure storage if not in config
-            if "password" not in config:
-                stored_password = self.get_stored_credential('switch_password')
-                if stored_password:
-                    config["password"] = stored_password
-                    self.logger.info("Using securely stored switch password")
-                else:
-                    self.logger.error("No switch password found in config or secure storage")
-                    return None
-            
-            if "enable_password" not in config:
-                stored_enable_password = self.get_stored_credential('switch_enable_password')
-                if stored_enable_password:
-                    config["enable_password"] = stored_enable_password
-                    self.logger.info("Using securely stored enable password")
-            
-            self.logger.info("Configuration loaded successfully")
-            return config
-            
-        except Exception as e:
-            self.logger.error(f"Error loading configuration: {e}")
-            return None
-    
-    def switch_vlan(self):
-        """Switch to the next VLAN in the list"""
-        if not self.config:
-            self.logger.error("No configuration available")
-            return
-            
-        if not self.config.get("vlans") or len(self.config["vlans"]) == 0:
-            self.logger.error("No VLANs configured")
-            return
-            
-        try:
-            # Get current VLAN (first in list) and move it to end
-            current_vlan = self.config["vlans"][0]
-            self.config["vlans"] = self.config["vlans"][1:] + [current_vlan]
-            
-            self.logger.info(f"Switching to VLAN {current_vlan} on interface {self.config['interface']}")
-            self.logger.info(f"Remaining VLANs: {self.config['vlans']}")
-            
-            # Connect to switch
-            device = {
-                'device_type': 'cisco_ios',
-                'host': self.config["switch_ip"],
-                'username': self.config["username"],
-                'password': self.config["password"],
-                'secret': self.config.get("enable_password", ""),
-                'timeout': 10,
-            }
-            
-            self.logger.info("Connecting to switch...")
-            
-            with ConnectHandler(**device) as connection:
-                connection.enable()
-                
-                # Configure interface
-                commands = [
-                    f"interface {self.config['interface']}",
-                    f"switchport access vlan {current_vlan}",
-                    "exit"
-                ]
-                
-                output = connection.send_config_set(commands)
-                self.logger.info(f"VLAN switch completed successfully")
-                self.logger.debug(f"Switch output: {output}")
-                
-                # Save the updated VLAN order back to config file
-                self.save_vlan_order()
-                
-        except (NetmikoTimeoutException, NetmikoAuthenticationException) as e:
-            self.logger.error(f"Network error: {e}")
-        except Exception as e:
-            self.logger.error(f"Error switching VLAN: {e}")
-    
-    def save_vlan_order(self):
-        """Save the updated VLAN order back to config file"""
-        try:
-            if hasattr(sys, '_MEIPASS'):
-                base_dir = Path(sys.executable).parent
-            else:
-                base_dir = Path(__file__).parent
-                
-            config_file = base_dir / "config.json"
-            
-            # Read current config
-            with open(config_file, 'r') as f:
-                config = json.load(f)
-            
-            # Update VLAN order
-            config["vlans"] = self.config["vlans"]
-            
-            # Write back (excluding sensitive data that might be in memory)
-            config_to_save = {k: v for k, v in config.items() if k not in ['password', 'enable_password']}
-            if 'password' in config and not self.get_stored_credential('switch_password'):
-                config_to_save['password'] = config['password']
-            if 'enable_password' in config and not self.get_stored_credential('switch_enable_password'):
-                config_to_save['enable_password'] = config['enable_password']
-            
-            with open(config_file, 'w') as f:
-                json.dump(config_to_save, f, indent=4)
-                
-        except Exception as e:
-            self.logger.warning(f"Could not save VLAN order: {e}")
-    
-    def SvcStop(self):
-        """Stop the service"""
-        self.logger.info("Service stop requested")
-        self.ReportServiceStatus(win32service.SERVICE_STOP_PENDING)
-        win32event.SetEvent(self.hWaitStop)
-        self.is_alive = False
-        
-    def SvcDoRun(self):
-        """Main service loop"""
-        self.logger.info("Secure VLAN Switcher Service starting")
-        
-        if not self.config:
-            self.logger.error("Service cannot start without valid configuration")
-            return
-            
-        # Log service to Windows Event Log
-        servicemanager.LogMsg(
-            servicemanager.EVENTLOG_INFORMATION_TYPE,
-            servicemanager.PYS_SERVICE_STARTED,
-            (self._svc_name_, '')
-        )
-        
-        self.logger.info(f"Service configured for switch {self.config['switch_ip']}")
-        self.logger.info(f"Schedule: Every {self.config['schedule_minutes']} minute(s)")
-        self.logger.info(f"Interface: {self.config['interface']}")
-        self.logger.info(f"VLANs: {self.config['vlans']}")
-        self.logger.info(f"VLAN count: {len(self.config['vlans'])}")
-        
-        try:
-            # Schedule the VLAN switching
-            schedule.every(self.config["schedule_minutes"]).minutes.do(self.switch_vlan)
-            
-            # Main service loop
-            while self.is_alive:
-                # Check for stop signal
-                if win32event.WaitForSingleObject(self.hWaitStop, 1000) == win32event.WAIT_OBJECT_0:
-                    break
-                    
-                # Run scheduled tasks
-                schedule.run_pending()
-                
-        except Exception as e:
-            self.logger.error(f"Service error: {e}")
-            servicemanager.LogErrorMsg(f"Service error: {e}")
-            
-        self.logger.info("Secure VLAN Switcher Service stopped")
+def __getattr__(name):
+    # The service class needs pywin32, so it is only imported when asked for
+    # (vlan_switcher_service and pythonservice.exe look it up here)
+    if name == 'SecureVLANSwitcherService':
+        from switcher_service import SecureVLANSwitcherService
+        return SecureVLANSwitcherService
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def run_debug_mode():
@@ -256,6 +40,12 @@ def run_debug_mode():
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
     logger = logging.getLogger(__name__)
+    engine = None
+    journal = None
+    status = None
+    metrics_writer = None
+    metrics_server = None
+    history = None
     
     try:
         # Create a simple test instance without Windows service framework
@@ -281,107 +71,130 @@ def run_debug_mode():
         with open(config_file, 'r') as f:
             config = json.load(f)
         
-        # Load stored credentials if needed
-        keyring_service = "VLANSwitcher"
-        
-        if "password" not in config:
-            try:
-                stored_password = keyring.get_password(keyring_service, 'switch_password')
-                if stored_password:
-                    config["password"] = stored_password
-                    print("Using securely stored switch password")
-                else:
-                    print("ERROR: No switch password found in config or secure storage!")
-                    return
-            except Exception as e:
-                print(f"ERROR: Could not retrieve stored switch password: {e}")
-                return
+        # Validate switches and VLANs
+        try:
+            switches = load_switches(config)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return
         
-        if "enable_password" not in config:
-            try:
-                stored_enable_password = keyring.get_password(keyring_service, 'switch_enable_password')
-                if stored_enable_password:
-                    config["enable_password"] = stored_enable_password
-                    print("Using securely stored enable password")
-            except Exception:
-                pass  # Enable password is optional
+        # Load stored credentials if needed
+        credentials = CredentialProvider(ttl=config.get("credential_ttl", 3600),
+                                         epoch_file=epoch_file_for(base_dir))
+        missing = credentials.apply(switches)
+        if missing:
+            print(f"ERROR: No switch password found in config or secure storage for: {', '.join(missing)}")
+            return
         
         print(f"Configuration loaded:")
-        print(f"  Switch IP: {config['switch_ip']}")
-        print(f"  Interface: {config['interface']}")
-        print(f"  Schedule: Every {config['schedule_minutes']} minute(s)")
-        print(f"  VLANs: {config['vlans']}")
-        print(f"  VLAN count: {len(config['vlans'])}")
+        print(f"  Schedule: Every {interval_from_config(config):g} second(s)")
+        for switch in switches:
+            print(f"  Switch: {switch['name']} ({switch['switch_ip']})")
+            for group in switch['port_groups']:
+                print(f"    Interfaces: {', '.join(group['interfaces'])} ({len(group['ports'])} ports)")
+                print(f"    VLANs: {group['vlans']}")
+                print(f"    VLAN count: {len(group['vlans'])}")
         print()
         
-        # Validate VLANs
-        if not config.get("vlans") or len(config["vlans"]) == 0:
-            print("ERROR: No VLANs configured in config.json!")
-            return
+        # Resume the rotation where the last run left off
+        journal = RotationJournal(base_dir / "state" / "rotation")
+        restore_rotation(switches, journal)
+        
+        # Publish status for the GUI like the service does
+        status = StatusPublisher(status_file_for(base_dir))
+        status.status["interval"] = interval_from_config(config)
+        status.set_switches(switches)
+        metrics = MetricsRegistry()
+        metrics_writer = TextfileWriter(metrics, metrics_file_for(base_dir)).start()
+        metrics_server = start_metrics_server(metrics, config.get("metrics_port"))
+        # Import here so the other modes do not load sqlite3
+        from history_store import history_writer_from_config
+        history = history_writer_from_config(config, base_dir)
+        
+        # Keep switch sessions open between test cycles
+        engine = create_engine(config, get_shared_pool())
         
         def test_switch_vlan():
             """Test VLAN switching function"""
-            if not config.get("vlans") or len(config["vlans"]) == 0:
-                logger.error("No VLANs configured")
+            due = switches if timeline is None else timeline.prepare()
+            if not due:
                 return
-                
             try:
-                # Get current VLAN (first in list) and move it to end
-                current_vlan = config["vlans"][0]
-                config["vlans"] = config["vlans"][1:] + [current_vlan]
-                
-                logger.info(f"Switching to VLAN {current_vlan} on interface {config['interface']}")
-                logger.info(f"Remaining VLANs: {config['vlans']}")
+                status.update(state="switching")
+                # Secrets come from the in-memory cache unless the GUI changed them
+                credentials.check_epoch()
+                credentials.apply(due)
+                logger.info(f"Connecting to {len(due)} switch(es)...")
                 
-                # Connect to switch
-                device = {
-                    'device_type': 'cisco_ios',
-                    'host': config["switch_ip"],
-                    'username': config["username"],
-                    'password': config["password"],
-                    'secret': config.get("enable_password", ""),
-                    'timeout': 10,
-                }
+                report = engine.run_tick(due)
                 
-                logger.info("Connecting to switch...")
+                for result in report.results:
+                    if result.ok:
+                        logger.info(f"[{result.name}] VLAN switch completed successfully")
+                    elif result.skipped:
+                        logger.info(f"[{result.name}] Skipped: {result.error}")
+                    else:
+                        logger.error(f"[{result.name}] Error switching VLAN: {result.error}")
+                logger.info(report.summary())
+                if history:
+                    history.record_tick(report, due)
                 
-                with ConnectHandler(**device) as connection:
-                    connection.enable()
-                    
-                    # Configure interface
-                    commands = [
-                        f"interface {config['interface']}",
-                        f"switchport access vlan {current_vlan}",
-                        "exit"
-                    ]
+                # Record where each rotation is
+                phases = {"switch": report.duration}
+                if report.succeeded:
+                    start = time.perf_counter()
+                    record_rotation(journal, switches, report)
+                    phases["persist"] = time.perf_counter() - start
+                metrics.record_tick(report, phases)
+                metrics_writer.request()
+                status.tick_finished(report, switches, phases, metrics_writer.summary, engine.breaker)
                     
-                    output = connection.send_config_set(commands)
-                    logger.info(f"VLAN switch completed successfully")
-                    logger.debug(f"Switch output: {output}")
-                    
-                    # Save updated config
-                    with open(config_file, 'w') as f:
-                        # Don't save passwords if they're stored securely
-                        config_to_save = dict(config)
-                        try:
-                            if keyring.get_password(keyring_service, 'switch_password'):
-                                config_to_save.pop('password', None)
-                        except:
-                            pass
-                        try:
-                            if keyring.get_password(keyring_service, 'switch_enable_password'):
-                                config_to_save.pop('enable_password', None)
-                        except:
-                            pass
-                        json.dump(config_to_save, f, indent=4)
-                    
-            except (NetmikoTimeoutException, NetmikoAuthenticationException) as e:
-                logger.error(f"Network error: {e}")
             except Exception as e:
                 logger.error(f"Error switching VLAN: {e}")
+                status.error(f"Error switching VLAN: {e}")
         
         # Schedule the function
-        schedule.every(config["schedule_minutes"]).minutes.do(test_switch_vlan)
+        scheduler = DeadlineScheduler()
+        job, timeline = follow_schedules(scheduler, config, switches, test_switch_vlan)
+        if timeline is not None:
+            print("Port group schedules in use; switching when each group is due.")
+            status.set_switches(switches)
+        
+        def reload_config(new_config):
+            """Apply an edited config.json like the service does"""
+            nonlocal config, switches, engine, job, timeline
+            try:
+                new_switches = load_switches(new_config)
+                interval = interval_from_config(new_config)
+            except (ValueError, TypeError) as e:
+                logger.error(f"Ignoring invalid configuration change: {e}")
+                return
+            missing = credentials.apply(new_switches)
+            if missing:
+                logger.error(f"Ignoring configuration change, no switch password for: {', '.join(missing)}")
+                return
+            diff = ConfigDiff(config, new_config, switches, new_switches)
+            if not diff:
+                return
+            logger.info(f"Configuration reloaded: {diff.summary()}")
+            carry_rotation(switches, new_switches)
+            if diff.engine_changed:
+                engine.shutdown()
+                engine = create_engine(new_config, get_shared_pool())
+            if diff.stale_switches:
+                engine.close_switches(diff.stale_switches)
+            if timeline is not None or uses_schedules(new_switches):
+                job, timeline = follow_schedules(scheduler, new_config, new_switches, test_switch_vlan, job)
+            elif diff.interval is not None or "missed_ticks" in diff.settings:
+                job = scheduler.reschedule(job, interval, missed=new_config.get("missed_ticks", "skip"))
+            if history:
+                history.configure(new_config)
+            config, switches = new_config, new_switches
+            for switch in diff.removed:
+                status.status["switches"].pop(switch["name"], None)
+            status.status["interval"] = interval
+            status.set_switches(switches)
+            status.publish()
         
         print("Debug mode running...")
         print("Service will execute according to schedule.")
@@ -392,10 +205,22 @@ def run_debug_mode():
         test_switch_vlan()
         print()
         
-        # Continue with scheduled execution
-        while True:
-            schedule.run_pending()
-            time.sleep(1)
+        # Continue with scheduled execution until Ctrl+C, applying
+        # edits of config.json as they are saved
+        config_watcher = ConfigWatcher(config_file, config.get("config_poll_seconds", POLL_INTERVAL))
+        
+        def sleep(timeout):
+            time.sleep(timeout if timeout is not None else 3600)
+            return False
+        
+        def wait_for_stop(timeout):
+            status.set_next_deadline(timeout)
+            stopped, new_config = config_watcher.wait(sleep, timeout)
+            if new_config is not None:
+                reload_config(new_config)
+            return stopped
+        
+        scheduler.run(wait_for_stop)
             
     except KeyboardInterrupt:
         print("\\nStopping debug mode...")
@@ -403,16 +228,110 @@ def run_debug_mode():
         print(f"Debug mode error: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        if engine:
+            engine.shutdown()
+        if journal:
+            journal.close()
+        if status:
+            status.update(state="stopped", next_switch=None)
+        if metrics_writer:
+            metrics_writer.stop()
+        if metrics_server:
+            metrics_server.stop()
+        if history:
+            history.stop()
+        get_shared_pool().close_all()
+
+
+def run_plan_mode(config_file=None, steps=None):
+    """Print the compiled command plans of the rotation without connecting"""
+    if config_file is None:
+        base_dir = Path(sys.executable).parent if hasattr(sys, '_MEIPASS') else Path(__file__).parent
+        config_file = base_dir / "config.json"
+    try:
+        with open(config_file, 'r') as f:
+            config = json.load(f)
+        switches = load_switches(config)
+        interval = interval_from_config(config)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    for line in render_plans(switches, steps):
+        print(line)
+    # Where port group schedules put each group from now on
+    for line in render_timeline(switches, interval, steps or 10):
+        print(line)
+
+
+def format_time(timestamp):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp)) if timestamp else "-"
+
+
+def run_report_mode(device=None, port=None, hours=24, limit=50):
+    """Print switch history from state/history.sqlite3"""
+    # Import here so the other modes do not load sqlite3
+    import sqlite3
+    from history_store import HistoryStore, first_line, history_file_for
+    base_dir = Path(sys.executable).parent if hasattr(sys, '_MEIPASS') else Path(__file__).parent
+    history_file = history_file_for(base_dir)
+    if port and not device:
+        print("ERROR: --port needs --device")
+        sys.exit(1)
+    try:
+        store = HistoryStore(history_file, readonly=True)
+        if port:
+            rows = store.port_history(device, port, limit)
+            print(f"{'time':<19}  {'from':>6}  {'to':>6}  result")
+            for row in rows:
+                print(f"{format_time(row['time']):<19}  {row['from_vlan'] or '-':>6}  {row['to_vlan']:>6}  "
+                      f"{'ok' if row['ok'] else 'failed'}")
+        elif device:
+            rows = store.attempts(device, limit=limit)
+            print(f"{'time':<19}  {'result':<8} {'vlan':>10} {'seconds':>8}  error")
+            for row in rows:
+                duration = f"{row['duration']:.2f}" if row['duration'] is not None else "-"
+                print(f"{format_time(row['time']):<19}  {row['outcome']:<8} {row['vlans'] or '-':>10} "
+                      f"{duration:>8}  {first_line(row['error'])}")
+        else:
+            since = time.time() - hours * 3600
+            summary = store.summary(since)
+            rows = store.devices()
+            print(f"Last {hours:g} hour(s)")
+            print(f"{'switch':<20} {'ok':>6} {'failed':>7} {'skipped':>8} {'mean s':>7}  {'last success':<19}")
+            for row in rows:
+                entry = summary.get(row['device'], {})
+                mean = entry.get('mean_duration')
+                print(f"{row['device']:<20} {entry.get('success', 0):>6} {entry.get('failure', 0):>7} "
+                      f"{entry.get('skipped', 0):>8} {f'{mean:.2f}' if mean is not None else '-':>7}  "
+                      f"{format_time(row['last_success']):<19}")
+        store.close()
+    except sqlite3.Error as e:
+        print(f"ERROR: No switch history in {history_file}: {e}")
+        sys.exit(1)
+    if not rows:
+        print("No matching switch history")
 
 
 if __name__ == '__main__':
+    # Shard workers of a frozen executable start it again with their own arguments
+    if getattr(sys, 'frozen', False):
+        import multiprocessing
+        multiprocessing.freeze_support()
+    
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Secure VLAN Switcher Service')
     parser.add_argument('action', nargs='?', 
-                       choices=['install', 'start', 'stop', 'remove', 'debug'],
+                       choices=['install', 'start', 'stop', 'remove', 'debug', 'plan', 'report'],
                        help='Service action to perform')
     parser.add_argument('--username', help='Username to run service as')
     parser.add_argument('--password', help='Password for the service user')
+    parser.add_argument('--config', help='Configuration file to render (plan)')
+    parser.add_argument('--steps', type=int, help='Steps to render per port group (plan)')
+    parser.add_argument('--device', help='Switch to report on (report)')
+    parser.add_argument('--port', help='Port of --device to report on (report)')
+    parser.add_argument('--hours', type=float, default=24, help='Hours the summary covers (report)')
+    parser.add_argument('--limit', type=int, default=50, help='Rows to show (report)')
     
     args, unknown = parser.parse_known_args()
     
@@ -420,6 +339,12 @@ if __name__ == '__main__':
         if args.action == 'debug':
             # Debug mode - run without service controller
             run_debug_mode()
+        elif args.action == 'plan':
+            # Offline: render the command plans, no device is touched
+            run_plan_mode(args.config, args.steps)
+        elif args.action == 'report':
+            # Read-only: query the switch history database
+            run_report_mode(args.device, args.port, args.hours, args.limit)
         elif args.action in ['install', 'start', 'stop', 'remove']:
             # Service management
             if args.action == 'install' and args.username and args.password:
@@ -427,9 +352,13 @@ if __name__ == '__main__':
                 sys.argv = [sys.argv[0], 'install', '--username', args.username, '--password', args.password] + unknown
             
             # Handle service commands
+            import win32serviceutil
+            from switcher_service import SecureVLANSwitcherService
             win32serviceutil.HandleCommandLine(SecureVLANSwitcherService)
         elif len(sys.argv) == 1:
             # No arguments - running as service
+            import servicemanager
+            from switcher_service import SecureVLANSwitcherService
             servicemanager.Initialize()
             servicemanager.PrepareToHostSingle(SecureVLANSwitcherService)
             servicemanager.StartServiceCtrlDispatcher()
@@ -443,6 +372,8 @@ if __name__ == '__main__':
             print("  python secure_vlan_switcher.py stop             - Stop the service") 
             print("  python secure_vlan_switcher.py remove           - Remove the service")
             print("  python secure_vlan_switcher.py debug            - Run in debug mode")
+            print("  python secure_vlan_switcher.py plan [--config FILE] [--steps N] - Print command plans")
+            print("  python secure_vlan_switcher.py report [--device NAME [--port PORT]] - Show switch history")
             
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,173 @@
+"""
+Service-state watcher for the VLAN switcher GUI.
+
+The GUI used to start an `sc query` subprocess from the Tk thread on
+every refresh. ServiceStateWatcher asks a backend for the service state
+from a background thread instead, caches the answer and puts every
+change on a queue that the GUI drains. While the state stays the same
+the poll interval backs off; refresh() polls again at once, e.g. after
+the GUI started or stopped the service.
+
+Backends:
+    Win32ServiceBackend  Service Control Manager API (no subprocess)
+    ScQueryBackend       `sc query`, when pywin32 is not available
+    SystemdBackend       `systemctl is-active`, for a systemd unit
+    FakeBackend          state set by hand, for testing
+"""
+
+import logging
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+RUNNING = "running"
+STOPPED = "stopped"
+START_PENDING = "start_pending"
+STOP_PENDING = "stop_pending"
+NOT_INSTALLED = "not_installed"
+UNKNOWN = "unknown"
+
+
+class Win32ServiceBackend:
+    """Queries the Service Control Manager directly"""
+
+    def __init__(self, service_name):
+        # Import here so the module loads on machines without pywin32
+        import win32service
+        self.win32service = win32service
+        self.service_name = service_name
+        self.states = {
+            win32service.SERVICE_RUNNING: RUNNING,
+            win32service.SERVICE_STOPPED: STOPPED,
+            win32service.SERVICE_START_PENDING: START_PENDING,
+            win32service.SERVICE_STOP_PENDING: STOP_PENDING,
+        }
+        self._manager = win32service.OpenSCManager(None, None, win32service.SC_MANAGER_CONNECT)
+
+    def query(self):
+        win32service = self.win32service
+        try:
+            handle = win32service.OpenService(self._manager, self.service_name, win32service.SERVICE_QUERY_STATUS)
+        except win32service.error:
+            return NOT_INSTALLED
+        try:
+            return self.states.get(win32service.QueryServiceStatus(handle)[1], UNKNOWN)
+        finally:
+            win32service.CloseServiceHandle(handle)
+
+
+class ScQueryBackend:
+    """Parses `sc query` output"""
+
+    def __init__(self, service_name):
+        self.service_name = service_name
+
+    def query(self):
+        result = subprocess.run(['sc', 'query', self.service_name], capture_output=True, text=True)
+        if result.returncode != 0:
+            return NOT_INSTALLED
+        for marker, state in (('RUNNING', RUNNING), ('START_PENDING', START_PENDING),
+                              ('STOP_PENDING', STOP_PENDING), ('STOPPED', STOPPED)):
+            if marker in result.stdout:
+                return state
+        return UNKNOWN
+
+
+class SystemdBackend:
+    """Asks systemd about a unit"""
+
+    def __init__(self, unit):
+        self.unit = unit
+
+    def query(self):
+        result = subprocess.run(['systemctl', 'is-active', self.unit], capture_output=True, text=True)
+        return {
+            'active': RUNNING,
+            'reloading': RUNNING,
+            'activating': START_PENDING,
+            'deactivating': STOP_PENDING,
+            'inactive': STOPPED,
+            'failed': STOPPED,
+        }.get(result.stdout.strip(), NOT_INSTALLED)
+
+
+class FakeBackend:
+    """Reports whatever state it was last given"""
+
+    def __init__(self, state=STOPPED):
+        self.state = state
+        self.queries = 0
+
+    def query(self):
+        self.queries += 1
+        return self.state
+
+
+def default_backend(service_name):
+    """Best backend available on this machine"""
+    if sys.platform == 'win32':
+        try:
+            return Win32ServiceBackend(service_name)
+        except Exception as e:
+            logger.warning(f"Service Control Manager not available, using sc query: {e}")
+            return ScQueryBackend(service_name)
+    if shutil.which('systemctl'):
+        return SystemdBackend(service_name)
+    return FakeBackend(NOT_INSTALLED)
+
+
+class ServiceStateWatcher:
+    """Polls a backend off the UI thread and reports state changes"""
+
+    def __init__(self, backend, poll_interval=2.0, max_interval=30.0):
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.max_interval = max_interval
+        self.state = UNKNOWN
+        # (old state, new state) for every change
+        self.changes = queue.Queue()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start watching in a daemon thread"""
+        self._thread = threading.Thread(target=self._run, name="service-state", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def refresh(self):
+        """Poll again now instead of at the next interval"""
+        self._wake.set()
+
+    def poll(self):
+        """Query the backend once; return True if the state changed"""
+        try:
+            state = self.backend.query()
+        except Exception as e:
+            logger.warning(f"Could not query service state: {e}")
+            state = UNKNOWN
+        if state == self.state:
+            return False
+        self.changes.put((self.state, state))
+        self.state = state
+        return True
+
+    def _run(self):
+        interval = self.poll_interval
+        while not self._stop.is_set():
+            if self.poll() or self.state in (START_PENDING, STOP_PENDING):
+                interval = self.poll_interval
+            else:
+                # Nothing happening: ask less and less often
+                interval = min(interval * 2, self.max_interval)
+            if self._wake.wait(interval):
+                self._wake.clear()
+                interval = self.poll_interval
@@ -0,0 +1,235 @@
+"""
+Persistent SSH session pool for the VLAN switcher.
+
+Keeps authenticated, already-enabled netmiko sessions alive between
+scheduled switches so a switch is logged into once instead of on every
+tick. Both the Windows service and debug mode share the same pool.
+
+netmiko and paramiko take a third of a second to import, so they are
+loaded when the first session is opened rather than with this module.
+"""
+
+import logging
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def channel_errors():
+    """Errors that mean the channel behind a pooled session has died"""
+    from netmiko.exceptions import NetmikoTimeoutException
+    from paramiko.ssh_exception import SSHException
+    return (OSError, EOFError, SSHException, NetmikoTimeoutException)
+
+
+def network_errors():
+    """netmiko's errors for switches that time out or refuse the login"""
+    from netmiko.exceptions import NetmikoTimeoutException, NetmikoAuthenticationException
+    return (NetmikoTimeoutException, NetmikoAuthenticationException)
+
+
+def resolve_host(host, port=22):
+    """Resolve host to an address, or return it unchanged if that fails"""
+    try:
+        return socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0][4][0]
+    except (socket.gaierror, UnicodeError):
+        # Let the SSH client report the failure
+        return host
+
+
+class PooledSession:
+    """A netmiko connection plus the bookkeeping the pool needs"""
+
+    def __init__(self, key, connection):
+        self.key = key
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+    def idle_for(self):
+        """Seconds since the session was last handed back to the pool"""
+        return time.monotonic() - self.last_used
+
+
+class SSHSessionPool:
+    """Pool of authenticated, enabled SSH sessions keyed by device"""
+
+    def __init__(self, keepalive=30, max_idle=540, probe=True, connect_factory=None):
+        # Cisco IOS drops vty sessions after 10 minutes without input
+        # (exec-timeout); SSH keepalives do not count as input, so idle
+        # sessions are recycled a little before that by default.
+        self.keepalive = keepalive
+        self.max_idle = max_idle
+        self.probe = probe
+        self.connect_factory = connect_factory
+        self._idle = {}
+        self._lock = threading.Lock()
+        self.stats = {'connects': 0, 'reuses': 0, 'reconnects': 0}
+
+    @staticmethod
+    def session_key(device):
+        """Identify the switch login a device dict refers to"""
+        return (
+            device.get('device_type', 'cisco_ios'),
+            device.get('host') or device.get('ip'),
+            device.get('port', 22),
+            device.get('username'),
+        )
+
+    def _connect(self, device, phases=None):
+        """Open a new session and enter privileged exec mode"""
+        params = dict(device)
+        params.setdefault('keepalive', self.keepalive)
+        start = time.perf_counter()
+        # Resolve separately so name lookups are timed on their own
+        params['host'] = resolve_host(params['host'], params.get('port', 22))
+        resolved = time.perf_counter()
+        connect = self.connect_factory
+        if connect is None:
+            from netmiko import ConnectHandler as connect
+        connection = connect(**params)
+        connected = time.perf_counter()
+        try:
+            connection.enable()
+        except Exception:
+            self._disconnect(connection)
+            raise
+        if phases is not None:
+            phases['dns'] = resolved - start
+            phases['connect'] = connected - resolved
+            phases['enable'] = time.perf_counter() - connected
+        self.stats['connects'] += 1
+        return PooledSession(self.session_key(device), connection)
+
+    @staticmethod
+    def _disconnect(connection):
+        try:
+            connection.disconnect()
+        except Exception:
+            pass
+
+    def _is_usable(self, session):
+        """Check that an idle session can be handed out again"""
+        if self.max_idle and session.idle_for() > self.max_idle:
+            logger.debug("Session to %s idle too long, recycling", session.key[1])
+            return False
+        if not self.probe:
+            return True
+        try:
+            return session.connection.is_alive()
+        except Exception:
+            return False
+
+    def checkout(self, device, phases=None, login=None):
+        """Take a live session for device, returning (session, reused)
+
+        login, if given, is called before a new session is opened and
+        may block until it is the device's turn to log in.
+        """
+        key = self.session_key(device)
+        with self._lock:
+            session = self._idle.pop(key, None)
+
+        if session is not None:
+            if self._is_usable(session):
+                self.stats['reuses'] += 1
+                return session, True
+            self._disconnect(session.connection)
+
+        if login is not None:
+            login()
+        return self._connect(device, phases), False
+
+    def checkin(self, session):
+        """Return a healthy session to the pool"""
+        session.last_used = time.monotonic()
+        with self._lock:
+            existing = self._idle.get(session.key)
+            self._idle[session.key] = session
+        # Two concurrent users of the same switch: keep only one session
+        if existing is not None and existing is not session:
+            self._disconnect(existing.connection)
+
+    def discard(self, session):
+        """Drop a session that is no longer trustworthy"""
+        self._disconnect(session.connection)
+
+    def run(self, device, func, phases=None, counters=None, login=None):
+        """Call func(connection) on a pooled session for device
+
+        If a reused session turns out to have a dead channel, it is
+        replaced with a fresh one and func is retried once. When a
+        phases dict is given, the seconds spent in "dns", "connect",
+        "enable" (only for new sessions) and "config_push" are stored
+        in it; a counters dict gets the number of "retries". login is
+        called before every new session, as with checkout().
+        """
+        session, reused = self.checkout(device, phases, login)
+        start = time.perf_counter()
+        try:
+            result = func(session.connection)
+        except channel_errors() as e:
+            self.discard(session)
+            if not reused:
+                raise
+            logger.warning("Pooled session to %s failed (%s), reconnecting", session.key[1], e)
+            self.stats['reconnects'] += 1
+            if counters is not None:
+                counters['retries'] = counters.get('retries', 0) + 1
+            if login is not None:
+                login()
+            session = self._connect(device, phases)
+            start = time.perf_counter()
+            try:
+                result = func(session.connection)
+            except Exception:
+                self.discard(session)
+                raise
+        except Exception:
+            self.discard(session)
+            raise
+
+        if phases is not None:
+            phases['config_push'] = time.perf_counter() - start
+        self.checkin(session)
+        return result
+
+    def prune_idle(self):
+        """Close sessions that have been idle longer than max_idle"""
+        if not self.max_idle:
+            return
+        with self._lock:
+            stale = [k for k, s in self._idle.items() if s.idle_for() > self.max_idle]
+            sessions = [self._idle.pop(k) for k in stale]
+        for session in sessions:
+            self._disconnect(session.connection)
+
+    def close(self, device):
+        """Disconnect the idle session of one device, if there is one"""
+        with self._lock:
+            session = self._idle.pop(self.session_key(device), None)
+        if session is not None:
+            self._disconnect(session.connection)
+
+    def close_all(self):
+        """Disconnect every idle session"""
+        with self._lock:
+            sessions = list(self._idle.values())
+            self._idle.clear()
+        for session in sessions:
+            self._disconnect(session.connection)
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_shared_pool():
+    """Return the process-wide session pool"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = SSHSessionPool()
+        return _shared_pool
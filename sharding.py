@@ -0,0 +1,327 @@
+"""
+Process-pool sharding for very large fleets.
+
+SSH crypto and netmiko's prompt matching are CPU-bound Python, so one
+process tops out at one core however many threads it runs. With
+"engine": "sharded" the fleet is split across shard_processes worker
+processes (default: one per core). Each runs its own threads or async
+engine ("shard_engine") with its own session pool, reconciler and
+circuit breaker. Switches are placed on a consistent hash ring by name,
+so a switch keeps its worker, and with it its SSH session, when a
+config reload adds or removes other switches.
+
+A worker is sent a switch the first time it is ticked, and again after
+a reload replaced it. A tick only sends the rotation cursor and hold
+flag of every port group and the login secrets of the switches it
+covers (with schedules, only the ones due); the worker switches them
+and answers with its results, the new cursors and its breaker state,
+which ShardedEngine merges into one TickReport.
+"""
+
+import bisect
+import hashlib
+import logging
+import logging.handlers
+import os
+import sys
+import time
+
+from fleet import SwitchResult, TickReport, create_engine
+from session_pool import get_shared_pool
+
+logger = logging.getLogger(__name__)
+
+# Points per worker on the hash ring; more spread the fleet more evenly
+REPLICAS = 64
+
+# Seconds a worker may take beyond switch_timeout to send its results
+RESULT_GRACE = 5.0
+
+# Switch fields refreshed on every tick, since the keyring may change them
+LOGIN_FIELDS = ('username', 'password', 'enable_password')
+
+
+def ring_hash(key):
+    return int.from_bytes(hashlib.sha1(key.encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+    """Consistent hash ring mapping switch names to shards"""
+
+    def __init__(self, shards, replicas=REPLICAS):
+        points = sorted((ring_hash(f"{shard}#{i}"), shard) for shard in shards for i in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_for(self, name):
+        i = bisect.bisect(self._hashes, ring_hash(name))
+        return self._shards[i % len(self._shards)]
+
+
+def cursors_of(switch):
+    return [group["cursor"] for group in switch["port_groups"]]
+
+
+def holds_of(switch):
+    return [group.get("hold", False) for group in switch["port_groups"]]
+
+
+def worker_main(index, config, conn, log_queue, log_level):
+    """Entry point of a worker process: switch the shard the coordinator sends"""
+    # Records go back to the coordinator, which writes the log file
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(log_level)
+
+    engine = create_engine(dict(config, engine=config.get("shard_engine", "threads")), get_shared_pool())
+    switches = {}
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            action = message[0]
+            if action == "assign":
+                switches.update((switch["name"], switch) for switch in message[1])
+            elif action == "tick":
+                _, tick, states = message
+                shard = []
+                for name, cursors, holds, login in states:
+                    switch = switches[name]
+                    for group, cursor, hold in zip(switch["port_groups"], cursors, holds):
+                        group["cursor"] = cursor
+                        group["hold"] = hold
+                    switch.update(login)
+                    shard.append(switch)
+                try:
+                    report = engine.run_tick(shard)
+                except Exception as e:
+                    conn.send(("failed", tick, f"Shard {index} error: {e}"))
+                    continue
+                breaker = engine.breaker
+                conn.send(("done", tick, report.results, {switch["name"]: cursors_of(switch) for switch in shard},
+                           breaker.snapshot() if breaker is not None else None))
+            elif action == "close":
+                engine.close_switches([switches.pop(name) for name in message[1] if name in switches])
+            elif action == "stop":
+                break
+    finally:
+        engine.shutdown()
+        get_shared_pool().close_all()
+
+
+class _Forward(logging.Handler):
+    """Hands a worker's log records to the coordinator's own loggers"""
+
+    def handle(self, record):
+        logging.getLogger(record.name).handle(record)
+        return True
+
+
+class ShardBreakers:
+    """Circuit breaker state the workers reported with their last tick"""
+
+    def __init__(self):
+        self.shards = {}
+
+    def snapshot(self):
+        merged = {}
+        for snapshot in self.shards.values():
+            merged.update(snapshot or {})
+        return merged
+
+
+class ShardWorker:
+    """A worker process and the coordinator's end of its pipe"""
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+
+
+class ShardedEngine:
+    """Spreads each tick over worker processes, one shard of the fleet each
+
+    Exposes the same run_tick()/close_switches()/shutdown() interface as
+    FleetEngine.
+    """
+
+    def __init__(self, config, processes=None, switch_timeout=30):
+        # Import here so single-process engines do not load multiprocessing
+        import multiprocessing
+        from multiprocessing.connection import wait
+        self._wait = wait
+        self.config = config
+        self.processes = processes or os.cpu_count() or 1
+        self.switch_timeout = switch_timeout
+        self.ring = HashRing(range(self.processes))
+        # Workers are started fresh on every platform, never forked from a
+        # process that already runs threads
+        self.context = multiprocessing.get_context("spawn")
+        if os.path.basename(sys.executable).lower() == "pythonservice.exe":
+            # Hosted by pywin32's service host; workers need the interpreter
+            self.context.set_executable(os.path.join(sys.exec_prefix, "python.exe"))
+        self.log_queue = self.context.Queue()
+        self.log_listener = logging.handlers.QueueListener(self.log_queue, _Forward())
+        self.log_listener.start()
+        self._breakers = ShardBreakers() if config.get("circuit_breaker", True) else None
+        # Switches each worker has been sent, by name
+        self.assigned = {index: {} for index in range(self.processes)}
+        self._placement = {}
+        self._tick = 0
+        self._stopping = False
+        self.workers = [self._start_worker(index) for index in range(self.processes)]
+        logger.info(f"Started {self.processes} shard worker process(es)")
+
+    def _start_worker(self, index):
+        conn, child_conn = self.context.Pipe()
+        process = self.context.Process(
+            target=worker_main,
+            # Each worker paces its logins at its share of the fleet's login rates
+            args=(index, dict(self.config, rate_limit_share=1 / self.processes), child_conn, self.log_queue,
+                  logging.getLogger().getEffectiveLevel()),
+            name=f"vlan-shard-{index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker = ShardWorker(process, conn)
+        if self.assigned[index]:
+            worker.conn.send(("assign", list(self.assigned[index].values())))
+        return worker
+
+    def _restart(self, index):
+        if self._stopping:
+            return
+        logger.warning(f"Shard worker {index} exited, starting a new one")
+        old = self.workers[index]
+        old.conn.close()
+        old.process.join(timeout=1)
+        self.workers[index] = self._start_worker(index)
+
+    def _shard_of(self, name):
+        index = self._placement.get(name)
+        if index is None:
+            index = self._placement[name] = self.ring.shard_for(name)
+        return index
+
+    def _split(self, switches):
+        """The tick's switches per shard, sending workers the ones they lack"""
+        shards = {}
+        for switch in switches:
+            shards.setdefault(self._shard_of(switch["name"]), []).append(switch)
+        for index, shard in shards.items():
+            assigned = self.assigned[index]
+            new = [switch for switch in shard if assigned.get(switch["name"]) is not switch]
+            if not new:
+                continue
+            assigned.update((switch["name"], switch) for switch in new)
+            try:
+                self.workers[index].conn.send(("assign", new))
+            except (OSError, ValueError):
+                self._restart(index)
+        return shards
+
+    def _shard_failed(self, report, shard, error):
+        skipped = self._stopping
+        if skipped:
+            error = "cancelled by service stop"
+        for switch in shard:
+            report.results.append(SwitchResult(switch["name"], error=error, skipped=skipped))
+
+    def run_tick(self, switches):
+        """Switch every given device once, each worker its own shard
+
+        Returns after every worker answered or switch_timeout (plus a
+        grace period for the answer) passed. A worker that does not
+        answer in time fails its shard for this tick; a worker that died
+        is replaced.
+        """
+        report = TickReport()
+        start = time.perf_counter()
+        shards = self._split(switches)
+        self._tick += 1
+        tick = self._tick
+
+        pending = {}
+        for index, shard in shards.items():
+            states = [(switch["name"], cursors_of(switch), holds_of(switch),
+                       {k: switch[k] for k in LOGIN_FIELDS if k in switch})
+                      for switch in shard]
+            worker = self.workers[index]
+            try:
+                worker.conn.send(("tick", tick, states))
+            except (OSError, ValueError):
+                self._shard_failed(report, shard, "shard worker not running")
+                self._restart(index)
+                continue
+            pending[worker.conn] = index
+
+        deadline = time.monotonic() + self.switch_timeout + RESULT_GRACE
+        while pending:
+            ready = self._wait(list(pending), timeout=max(0.0, deadline - time.monotonic()))
+            if not ready:
+                break
+            for conn in ready:
+                index = pending[conn]
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    del pending[conn]
+                    self._shard_failed(report, shards[index], "shard worker exited")
+                    self._restart(index)
+                    continue
+                if message[1] != tick:
+                    # Late answer to a tick that already gave up on it
+                    continue
+                del pending[conn]
+                if message[0] == "failed":
+                    self._shard_failed(report, shards[index], message[2])
+                    continue
+                _, _, results, cursors, breakers = message
+                for switch in shards[index]:
+                    for group, cursor in zip(switch["port_groups"], cursors[switch["name"]]):
+                        group["cursor"] = cursor
+                report.results.extend(results)
+                if self._breakers is not None:
+                    self._breakers.shards[index] = breakers
+        for index in pending.values():
+            self._shard_failed(report, shards[index], f"no response within {self.switch_timeout}s")
+
+        report.duration = time.perf_counter() - start
+        return report
+
+    def close_switches(self, switches):
+        """Log out of the given switches, leaving every other session open"""
+        names = {}
+        for switch in switches:
+            index = self._shard_of(switch["name"])
+            self.assigned[index].pop(switch["name"], None)
+            names.setdefault(index, []).append(switch["name"])
+        for index, shard in names.items():
+            try:
+                self.workers[index].conn.send(("close", shard))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not close sessions on shard {index}: {e}")
+
+    @property
+    def breaker(self):
+        return self._breakers
+
+    def shutdown(self):
+        """Stop the workers; one still busy with a tick is terminated"""
+        if self._stopping:
+            return
+        self._stopping = True
+        for worker in self.workers:
+            try:
+                worker.conn.send(("stop",))
+            except (OSError, ValueError):
+                pass
+        for worker in self.workers:
+            worker.process.join(timeout=2)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join(timeout=1)
+        self.log_listener.stop()
@@ -0,0 +1,136 @@
+"""
+Append-only rotation state journal for the VLAN switcher.
+
+The service used to rewrite config.json after every switch. Rotation
+state (cursor, last VLAN, timestamp per port group) now goes to a
+separate journal instead: each change is one appended JSON line, fsyncs
+are batched, and the journal is periodically compacted into a snapshot.
+config.json is only ever read by the service.
+
+Files, for a journal at state/rotation:
+    state/rotation.snapshot.json  compacted state, replaced atomically
+    state/rotation.journal        JSON lines appended since the snapshot
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class RotationJournal:
+    """Crash-safe key -> state store backed by an append-only log"""
+
+    def __init__(self, path, fsync_every=64, fsync_interval=5.0, compact_every=10000):
+        self.path = Path(path)
+        self.snapshot_file = self.path.with_name(self.path.name + ".snapshot.json")
+        self.journal_file = self.path.with_name(self.path.name + ".journal")
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self.state = {}
+        self._lock = threading.Lock()
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._records = 0
+        self.load()
+
+    def load(self):
+        """Rebuild state from the snapshot plus the journal"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.state = {}
+
+        if self.snapshot_file.exists():
+            try:
+                with open(self.snapshot_file, 'r') as f:
+                    self.state = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read rotation snapshot {self.snapshot_file}: {e}")
+
+        good_offset = 0
+        if self.journal_file.exists():
+            with open(self.journal_file, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        key = record.pop("key")
+                    except (ValueError, KeyError, AttributeError):
+                        # Torn write from a crash: everything after it is unusable
+                        logger.warning(f"Discarding damaged rotation journal tail at byte {good_offset}")
+                        break
+                    self.state[key] = record
+                    self._records += 1
+                    good_offset += len(line)
+            if good_offset != self.journal_file.stat().st_size:
+                with open(self.journal_file, 'r+b') as f:
+                    f.truncate(good_offset)
+
+        self._file = open(self.journal_file, 'a')
+
+    def get(self, key):
+        """Return the last recorded state for key, or None"""
+        return self.state.get(key)
+
+    def record(self, key, **state):
+        """Append a new state for key"""
+        state.setdefault("time", time.time())
+        with self._lock:
+            self.state[key] = state
+            self._file.write(json.dumps(dict(state, key=key), separators=(',', ':')) + "\n")
+            self._unsynced += 1
+            self._records += 1
+
+    def commit(self):
+        """Hand buffered records to the OS, fsyncing in batches
+
+        Records survive a service crash once committed; they survive a
+        power loss once the batch is fsynced, which happens every
+        fsync_every records or fsync_interval seconds.
+        """
+        with self._lock:
+            self._file.flush()
+            due = (self._unsynced >= self.fsync_every or
+                   time.monotonic() - self._last_sync >= self.fsync_interval)
+            if self._unsynced and due:
+                self._sync()
+            compact = self._records >= self.compact_every
+        if compact:
+            self.compact()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def compact(self):
+        """Fold the journal into a new snapshot and start an empty journal
+
+        The snapshot is written to a temporary file, fsynced and renamed
+        over the old one before the journal is truncated. A crash in
+        between only replays records the snapshot already contains.
+        """
+        with self._lock:
+            self._file.flush()
+            tmp_file = self.snapshot_file.with_name(self.snapshot_file.name + ".tmp")
+            with open(tmp_file, 'w') as f:
+                json.dump(self.state, f, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.snapshot_file)
+            self._file.close()
+            self._file = open(self.journal_file, 'w')
+            self._sync()
+            self._records = 0
+
+    def close(self):
+        """Flush, fsync and close the journal"""
+        with self._lock:
+            if self._file and not self._file.closed:
+                self._file.flush()
+                self._sync()
+                self._file.close()
@@ -0,0 +1,155 @@
+"""
+Structured status channel from the VLAN switcher service to the GUI.
+
+The service publishes a small JSON record (state, current and next
+VLAN, next deadline, last error, phase timings of the last tick and
+p50/p95 latency per phase since start) to state/status.json. "state" is one of starting, idle, switching,
+stopped or error. Every update is written to a temporary file and
+renamed over the old one, so a reader never sees a partial record.
+The GUI polls the file with a single stat() and only parses it when it
+has changed.
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def status_file_for(base_dir):
+    """Path of the status file under base_dir"""
+    return Path(base_dir) / "state" / "status.json"
+
+
+def next_vlan(group):
+    """VLAN a port group switches to next: its timeline's, else its rotation's"""
+    if "next_change" in group:
+        return group["next_vlan"]
+    return group["vlans"][group["cursor"]]
+
+
+def join_vlans(vlans):
+    """Distinct VLANs of a fleet as one display string, or None"""
+    vlans = {vlan for vlan in vlans if vlan}
+    return ", ".join(sorted(vlans, key=lambda vlan: (len(vlan), vlan))) or None
+
+
+class StatusPublisher:
+    """Keeps the service's status record and writes it out on change"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.tmp_file = self.path.with_name(self.path.name + ".tmp")
+        self.status = {
+            "state": "starting",
+            "pid": os.getpid(),
+            "interval": None,
+            "next_switch": None,
+            "current_vlan": None,
+            "next_vlan": None,
+            "switches": {},
+            "last_tick": None,
+            "last_error": None,
+            "phases": {},
+            "metrics": {},
+        }
+
+    def publish(self):
+        """Atomically replace the status file with the current record"""
+        self.status["updated"] = time.time()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.tmp_file, 'w') as f:
+                json.dump(self.status, f, separators=(',', ':'))
+            os.replace(self.tmp_file, self.path)
+        except OSError as e:
+            logger.warning(f"Could not publish status: {e}")
+
+    def update(self, **fields):
+        """Change some fields and publish"""
+        self.status.update(fields)
+        self.publish()
+
+    def set_switches(self, switches):
+        """Take current and next VLAN of every port group from the fleet"""
+        entries = self.status["switches"]
+        for switch in switches:
+            entry = entries.setdefault(switch["name"], {"ok": None, "error": None})
+            entry["current"] = {group["name"]: group["vlan"] for group in switch["port_groups"]}
+            entry["next"] = {group["name"]: next_vlan(group) for group in switch["port_groups"]}
+        self.status["current_vlan"] = join_vlans(vlan for entry in entries.values() for vlan in entry["current"].values())
+        self.status["next_vlan"] = join_vlans(vlan for entry in entries.values() for vlan in entry["next"].values())
+
+    def set_next_deadline(self, timeout):
+        """Publish when the next tick is due, timeout seconds from now"""
+        self.update(state="idle", next_switch=None if timeout is None else time.time() + timeout)
+
+    def tick_finished(self, report, switches, phases, metrics=None, breaker=None):
+        """Publish the outcome of a tick and, if given, a metrics summary
+        and the circuit breaker state of failing switches"""
+        for result in report.results:
+            self.status["switches"].setdefault(result.name, {}).update(
+                ok=result.ok, error=result.error, duration=round(result.duration, 3),
+                pushed=result.pushed, drift=len(result.drift), skipped=result.skipped)
+        if breaker is not None:
+            breakers = breaker.snapshot()
+            for name, entry in self.status["switches"].items():
+                entry["breaker"] = breakers.get(name)
+        self.set_switches(switches)
+        self.status["last_tick"] = {
+            "started": report.started,
+            "duration": round(report.duration, 3),
+            "succeeded": len(report.succeeded),
+            "failed": len(report.failed),
+            "skipped": len(report.skipped),
+        }
+        if report.failed:
+            failed = report.failed[0]
+            self.status["last_error"] = {"time": time.time(), "message": f"[{failed.name}] {failed.error}"}
+        self.status["phases"] = {name: round(seconds, 4) for name, seconds in phases.items()}
+        if metrics is not None:
+            self.status["metrics"] = {
+                phase: {key: value if value is None or key == "count" else round(value, 4)
+                        for key, value in stats.items()}
+                for phase, stats in metrics.items()
+            }
+        self.publish()
+
+    def error(self, message):
+        """Publish an error that stopped a tick or the service"""
+        self.update(state="error", last_error={"time": time.time(), "message": message})
+
+
+class StatusReader:
+    """Cheap poller for the status file"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.status = {}
+        self._signature = None
+
+    def poll(self):
+        """Reload the record if the file changed; return True if it did"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            if self._signature is None:
+                return False
+            self.status = {}
+            self._signature = None
+            return True
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return False
+        try:
+            with open(self.path, 'r') as f:
+                self.status = json.load(f)
+        except (OSError, ValueError):
+            # Replaced between stat() and open(): try again next poll
+            return False
+        self._signature = signature
+        return True
@@ -0,0 +1,338 @@
+"""
+Windows service for the VLAN switcher.
+
+Kept apart from secure_vlan_switcher.py so its command line only loads
+pywin32 for the commands that manage or host the service.
+"""
+
+import json
+import logging
+import math
+import sys
+import time
+from pathlib import Path
+
+# Windows service imports
+import win32serviceutil
+import win32service
+import win32event
+import servicemanager
+
+# Network imports
+from session_pool import get_shared_pool
+from fleet import carry_rotation, create_engine, load_switches, record_rotation, restore_rotation
+from state_journal import RotationJournal
+from credentials import CredentialProvider, epoch_file_for
+from status_channel import StatusPublisher, status_file_for
+from log_pipeline import LogPipeline
+from metrics import MetricsRegistry, TextfileWriter, metrics_file_for, start_metrics_server
+from deadline_scheduler import DeadlineScheduler, interval_from_config
+from config_watcher import ConfigDiff, ConfigWatcher
+from history_store import history_writer_from_config
+from timeline import follow_schedules, uses_schedules
+
+
+class SecureVLANSwitcherService(win32serviceutil.ServiceFramework):
+    """Secure VLAN Switcher Windows Service with credential management"""
+    
+    _svc_name_ = "SecureVLANSwitcherService"
+    _svc_display_name_ = "Secure VLAN Switcher Service"
+    _svc_description_ = "Automatically switches VLANs on network interface with secure credential management"
+    
+    def __init__(self, args):
+        win32serviceutil.ServiceFramework.__init__(self, args)
+        self.hWaitStop = win32event.CreateEvent(None, 0, 0, None)
+        self.is_alive = True
+        
+        # Get executable directory
+        if hasattr(sys, '_MEIPASS'):
+            base_dir = Path(sys.executable).parent
+        else:
+            base_dir = Path(__file__).parent
+        
+        # Service name for keyring
+        self.keyring_service = "VLANSwitcher"
+        
+        # Setup logging
+        self.setup_logging()
+        
+        # Keyring secrets are resolved once and cached in memory
+        self.credentials = CredentialProvider(self.keyring_service, epoch_file=epoch_file_for(base_dir))
+        
+        # Load configuration; edits are picked up while the service runs
+        self.config_watcher = ConfigWatcher(base_dir / "config.json")
+        self.config = self.load_config()
+        if self.config:
+            self.log_pipeline.configure(self.config)
+        
+        # Authenticated switch sessions reused between ticks
+        self.session_pool = get_shared_pool()
+        
+        # Switches to drive and the engine that fans out to them
+        self.switches = load_switches(self.config) if self.config else []
+        self.credentials.apply(self.switches)
+        self.engine = create_engine(self.config or {}, self.session_pool)
+        
+        # Rotation state lives in its own journal; config.json is read-only here
+        self.journal = RotationJournal(base_dir / "state" / "rotation")
+        restore_rotation(self.switches, self.journal)
+        # Timeline of the port groups' schedules, built when the service runs
+        self.timeline = None
+        
+        # Structured status for the GUI, instead of scraping the log
+        self.status = StatusPublisher(status_file_for(base_dir))
+        self.status.set_switches(self.switches)
+        
+        # Latency histograms, exported to state/metrics.prom and optionally HTTP
+        self.metrics = MetricsRegistry()
+        self.metrics_writer = TextfileWriter(self.metrics, metrics_file_for(base_dir)).start()
+        self.metrics_server = None
+        
+        # Every switch attempt, kept in state/history.sqlite3
+        self.history = history_writer_from_config(self.config or {}, base_dir)
+        
+    def setup_logging(self):
+        """Setup logging to file"""
+        # Get executable directory
+        if hasattr(sys, '_MEIPASS'):
+            base_dir = Path(sys.executable).parent
+        else:
+            base_dir = Path(__file__).parent
+            
+        # Create logs directory
+        log_dir = base_dir / "logs"
+        log_dir.mkdir(exist_ok=True)
+        
+        # Setup logger; a background thread does the writing and rotation
+        log_file = log_dir / "vlan_switcher.log"
+        self.log_pipeline = LogPipeline(log_file).start()
+        self.logger = logging.getLogger(__name__)
+        
+    def get_stored_credential(self, key):
+        """Retrieve a stored credential through the credential cache"""
+        return self.credentials.get(key)
+        
+    def load_config(self):
+        """Load configuration from config.json with secure credential support"""
+        try:
+            if hasattr(sys, '_MEIPASS'):
+                base_dir = Path(sys.executable).parent
+            else:
+                base_dir = Path(__file__).parent
+                
+            config_file = base_dir / "config.json"
+            
+            if not config_file.exists():
+                self.logger.error(f"Configuration file not found: {config_file}")
+                return None
+                
+            with open(config_file, 'r') as f:
+                config = json.load(f)
+            
+            # Validate the switch list and load credentials from secure
+            # storage where they are not in config
+            self.credentials.ttl = config.get("credential_ttl", 3600)
+            missing = self.credentials.apply(load_switches(config))
+            if missing:
+                self.logger.error(f"No switch password found in config or secure storage for: {', '.join(missing)}")
+                return None
+            
+            self.logger.info("Configuration loaded successfully")
+            return config
+            
+        except Exception as e:
+            self.logger.error(f"Error loading configuration: {e}")
+            return None
+    
+    def reload_config(self, config):
+        """Apply an edited config.json, keeping untouched sessions and deadlines"""
+        try:
+            switches = load_switches(config)
+            interval = interval_from_config(config)
+        except (ValueError, TypeError) as e:
+            self.logger.error(f"Ignoring invalid configuration change: {e}")
+            return
+        self.credentials.ttl = config.get("credential_ttl", 3600)
+        missing = self.credentials.apply(switches)
+        if missing:
+            self.logger.error(f"Ignoring configuration change, no switch password for: {', '.join(missing)}")
+            return
+        
+        diff = ConfigDiff(self.config, config, self.switches, switches)
+        if not diff:
+            return
+        self.logger.info(f"Configuration reloaded: {diff.summary()}")
+        
+        carry_rotation(self.switches, switches)
+        if diff.engine_changed:
+            self.engine.shutdown()
+            self.engine = create_engine(config, self.session_pool)
+        if diff.stale_switches:
+            self.engine.close_switches(diff.stale_switches)
+        if self.timeline is not None or uses_schedules(switches):
+            # Rebuilt from each group's last switch, so schedules carry on
+            self.switch_job, self.timeline = follow_schedules(self.scheduler, config, switches, self.switch_vlan,
+                                                              self.switch_job)
+        elif diff.interval is not None or "missed_ticks" in diff.settings:
+            self.switch_job = self.scheduler.reschedule(self.switch_job, interval,
+                                                        missed=config.get("missed_ticks", "skip"))
+        self.log_pipeline.configure(config)
+        if self.history:
+            self.history.configure(config)
+        if "metrics_port" in diff.settings:
+            if self.metrics_server:
+                self.metrics_server.stop()
+            self.metrics_server = start_metrics_server(self.metrics, config.get("metrics_port"))
+        self.config_watcher.poll_interval = config.get("config_poll_seconds", self.config_watcher.poll_interval)
+        
+        self.config = config
+        self.switches = switches
+        for switch in diff.removed:
+            self.status.status["switches"].pop(switch["name"], None)
+        self.status.status["interval"] = interval
+        self.status.set_switches(switches)
+        self.status.publish()
+    
+    def switch_vlan(self):
+        """Switch every configured switch, or those their schedules say are due, to the next VLAN"""
+        if not self.config:
+            self.logger.error("No configuration available")
+            return
+            
+        if not self.switches:
+            self.logger.error("No switches configured")
+            return
+        
+        switches = self.switches if self.timeline is None else self.timeline.prepare()
+        if not switches:
+            return
+            
+        try:
+            self.status.update(state="switching")
+            phases = {}
+            
+            # Secrets come from the in-memory cache unless the GUI changed them
+            start = time.perf_counter()
+            self.credentials.check_epoch()
+            self.credentials.apply(switches)
+            phases["credentials"] = time.perf_counter() - start
+            
+            self.logger.info("Connecting to %d switch(es)...", len(switches))
+            
+            report = self.engine.run_tick(switches)
+            phases["switch"] = report.duration
+            phases["slowest_switch"] = max((result.duration for result in report.results), default=0.0)
+            
+            for result in report.results:
+                if result.ok:
+                    self.logger.info("[%s] VLAN switch completed successfully", result.name)
+                elif result.skipped:
+                    self.logger.info("[%s] Skipped: %s", result.name, result.error)
+                else:
+                    self.logger.error("[%s] Error switching VLAN: %s", result.name, result.error)
+            self.logger.info(report.summary())
+            
+            # History needs the VLANs from before the rotation is recorded
+            if self.history:
+                self.history.record_tick(report, switches)
+            
+            # Record where each rotation is
+            if report.succeeded:
+                start = time.perf_counter()
+                self.save_rotation_state(report)
+                phases["persist"] = time.perf_counter() - start
+            
+            self.metrics.record_tick(report, phases)
+            self.metrics_writer.request()
+            self.status.tick_finished(report, self.switches, phases, self.metrics_writer.summary, self.engine.breaker)
+                
+        except Exception as e:
+            self.logger.error(f"Error switching VLAN: {e}")
+            self.status.error(f"Error switching VLAN: {e}")
+    
+    def save_rotation_state(self, report):
+        """Append the new rotation state to the state journal"""
+        try:
+            record_rotation(self.journal, self.switches, report)
+        except Exception as e:
+            self.logger.warning(f"Could not save rotation state: {e}")
+    
+    def SvcStop(self):
+        """Stop the service"""
+        self.logger.info("Service stop requested")
+        self.ReportServiceStatus(win32service.SERVICE_STOP_PENDING)
+        win32event.SetEvent(self.hWaitStop)
+        self.is_alive = False
+        self.engine.shutdown()
+        self.session_pool.close_all()
+        if self.metrics_server:
+            self.metrics_server.stop()
+        
+    def SvcDoRun(self):
+        """Main service loop"""
+        self.logger.info("Secure VLAN Switcher Service starting")
+        
+        if not self.config:
+            self.logger.error("Service cannot start without valid configuration")
+            self.status.error("Service cannot start without valid configuration")
+            self.log_pipeline.stop()
+            return
+            
+        # Log service to Windows Event Log
+        servicemanager.LogMsg(
+            servicemanager.EVENTLOG_INFORMATION_TYPE,
+            servicemanager.PYS_SERVICE_STARTED,
+            (self._svc_name_, '')
+        )
+        
+        self.logger.info(f"Schedule: Every {interval_from_config(self.config):g} second(s)")
+        for switch in self.switches:
+            self.logger.info(f"Service configured for switch {switch['name']} ({switch['switch_ip']})")
+            for group in switch['port_groups']:
+                self.logger.info(f"  Interfaces: {', '.join(group['interfaces'])} ({len(group['ports'])} ports)")
+                self.logger.info(f"  VLANs: {group['vlans']}")
+                self.logger.info(f"  VLAN count: {len(group['vlans'])}")
+        
+        try:
+            # Schedule the VLAN switching
+            self.scheduler = DeadlineScheduler()
+            self.switch_job, self.timeline = follow_schedules(self.scheduler, self.config, self.switches,
+                                                              self.switch_vlan)
+            if self.timeline is not None:
+                self.logger.info("Port group schedules in use; switching when each group is due")
+                self.status.set_switches(self.switches)
+            
+            self.status.status["interval"] = interval_from_config(self.config)
+            self.metrics_server = start_metrics_server(self.metrics, self.config.get("metrics_port"))
+            self.config_watcher.poll_interval = self.config.get("config_poll_seconds", self.config_watcher.poll_interval)
+            
+            def wait_event(timeout):
+                millis = win32event.INFINITE if timeout is None else math.ceil(timeout * 1000)
+                stopped = win32event.WaitForSingleObject(self.hWaitStop, millis) == win32event.WAIT_OBJECT_0
+                return stopped or not self.is_alive
+            
+            def wait_for_stop(timeout):
+                # Sleep until the next deadline, waking early on a stop
+                # request or to apply an edited config.json
+                self.status.set_next_deadline(timeout)
+                stopped, config = self.config_watcher.wait(wait_event, timeout)
+                if config is not None:
+                    self.reload_config(config)
+                return stopped
+            
+            # Main service loop
+            self.scheduler.run(wait_for_stop)
+                
+        except Exception as e:
+            self.logger.error(f"Service error: {e}")
+            servicemanager.LogErrorMsg(f"Service error: {e}")
+            self.status.error(f"Service error: {e}")
+            
+        self.journal.close()
+        self.metrics_writer.stop()
+        if self.history:
+            self.history.stop()
+        if self.status.status["state"] != "error":
+            self.status.update(state="stopped", next_switch=None)
+        self.logger.info("Secure VLAN Switcher Service stopped")
+        self.log_pipeline.stop()
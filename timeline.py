@@ -0,0 +1,406 @@
+"""
+Per-port-group schedules compiled into a timeline index.
+
+A port group may carry a "schedule" (directly, or inherited from its
+switch or the top level of config.json):
+
+    "schedule": {
+        "dwell_minutes": 30,
+        "vlans": {
+            "300": {"dwell_minutes": 60, "windows": ["mon-fri 09:00-17:00"]},
+            "400-410": {"dwell_seconds": 90}
+        }
+    }
+
+Every VLAN of the group's rotation stays for its dwell time (the
+group's, or the schedule interval when none is given). A VLAN with
+windows is only used while one of them is open (local time; a window
+may span midnight, "sat,sun" alone means all day) and is left when it
+closes; closed VLANs are passed over. If no VLAN is open the ports keep
+their VLAN until a window opens.
+
+GroupTimeline compiles these rules into sorted change times, a stretch
+(horizon, or MAX_SEGMENTS changes) at a time, so "what is active at T"
+and "what changes next" are a bisect. FleetTimeline keeps the next
+change of every group on a heap; the scheduler sleeps until its top,
+and each tick only switches the groups that are due. Groups without a
+schedule rotate every schedule interval as before.
+"""
+
+import bisect
+import datetime
+import heapq
+import itertools
+import time
+from array import array
+
+from deadline_scheduler import interval_from_config
+from vlan_sequence import VlanSequence
+
+DAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+# Seconds compiled ahead at a time, and most changes per compile; a
+# group's last switch older than HORIZON no longer anchors its timeline
+HORIZON = 86400
+MAX_SEGMENTS = 4096
+
+# Seconds before a group whose switch failed is tried again
+RETRY_SECONDS = 60.0
+
+
+def parse_days(text):
+    """Weekday numbers of "mon-fri", "sat,sun" or "daily" """
+    if text in ('daily', '*'):
+        return frozenset(range(7))
+    days = set()
+    for part in text.split(','):
+        first, _, last = part.partition('-')
+        try:
+            start = DAYS.index(first[:3])
+            end = DAYS.index(last[:3]) if last else start
+        except ValueError:
+            raise ValueError(f"Unknown day in schedule window: {part!r}")
+        days.update((start + i) % 7 for i in range((end - start) % 7 + 1))
+    return frozenset(days)
+
+
+def parse_minutes(text):
+    hours, _, minutes = text.partition(':')
+    value = int(hours) * 60 + int(minutes or 0)
+    if not 0 <= value <= 1440:
+        raise ValueError(f"Invalid time of day: {text!r}")
+    return value
+
+
+def local_time(date, minutes):
+    """Timestamp of minutes past local midnight of date"""
+    return (datetime.datetime.combine(date, datetime.time()) + datetime.timedelta(minutes=minutes)).timestamp()
+
+
+class Window:
+    """Weekly window: days it starts on, and start/end in minutes of the day"""
+
+    __slots__ = ('spec', 'days', 'start', 'end')
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.days = frozenset(range(7))
+        self.start, self.end = 0, 1440
+        try:
+            for part in spec.lower().split():
+                if ':' in part:
+                    first, last = part.split('-')
+                    self.start, self.end = parse_minutes(first), parse_minutes(last)
+                else:
+                    self.days = parse_days(part)
+        except ValueError as e:
+            raise ValueError(f"Invalid schedule window {spec!r}: {e}")
+        if self.start == self.end:
+            raise ValueError(f"Empty schedule window: {spec!r}")
+
+    def intervals(self, today):
+        """(open, close) timestamps of the occurrences that can contain or follow a time today"""
+        for offset in range(-1, 8):
+            day = today + datetime.timedelta(days=offset)
+            if day.weekday() not in self.days:
+                continue
+            end_day = day if self.end > self.start else day + datetime.timedelta(days=1)
+            yield local_time(day, self.start), local_time(end_day, self.end)
+
+
+class Windows:
+    """Windows a VLAN may be used in"""
+
+    __slots__ = ('windows', '_day', '_intervals_of_day')
+
+    def __init__(self, specs):
+        self.windows = [Window(spec) for spec in specs]
+        self._day = (0.0, 0.0)
+        self._intervals_of_day = []
+
+    def _intervals(self, t):
+        # Compiling walks forward in time, so the last day's list is usually the one
+        start, end = self._day
+        if not start <= t < end:
+            today = datetime.date.fromtimestamp(t)
+            self._day = (local_time(today, 0), local_time(today, 1440))
+            self._intervals_of_day = sorted(interval for window in self.windows
+                                            for interval in window.intervals(today))
+        return self._intervals_of_day
+
+    def open_at(self, t):
+        return any(start <= t < end for start, end in self._intervals(t))
+
+    def close_after(self, t):
+        """When the windows open at t all close, following back-to-back ones"""
+        close = t
+        for start, end in self._intervals(t):
+            if start <= close < end:
+                close = end
+        return close
+
+    def open_after(self, t):
+        return min((start for start, _ in self._intervals(t) if start > t), default=None)
+
+
+def seconds_of(spec, where):
+    """Dwell of a schedule entry in seconds, or None when it sets none"""
+    if spec.get("dwell_seconds") is not None:
+        seconds = float(spec["dwell_seconds"])
+    elif spec.get("dwell_minutes") is not None:
+        seconds = float(spec["dwell_minutes"]) * 60
+    else:
+        return None
+    if seconds <= 0:
+        raise ValueError(f"{where}: dwell time must be positive")
+    return seconds
+
+
+class Schedule:
+    """Dwell times and windows of one port group's rotation"""
+
+    __slots__ = ('spec', 'vlans', 'dwell', 'rules')
+
+    def __init__(self, vlans, spec=None, where="schedule"):
+        self.spec = spec
+        self.vlans = vlans
+        spec = spec or {}
+        self.dwell = seconds_of(spec, where)
+        # Index in the rotation -> (dwell or None, Windows or None)
+        self.rules = {}
+        for key, rule in (spec.get("vlans") or {}).items():
+            selected = VlanSequence(key)
+            for vlan in selected:
+                if vlan not in vlans:
+                    raise ValueError(f"{where}: VLAN {vlan} has a schedule but is not in the rotation")
+                windows = Windows(rule["windows"]) if rule.get("windows") else None
+                self.rules[vlans.index(vlan)] = (seconds_of(rule, f"{where} VLAN {vlan}"), windows)
+
+    def __eq__(self, other):
+        return isinstance(other, Schedule) and (self.spec, self.vlans) == (other.spec, other.vlans)
+
+    def __hash__(self):
+        return hash(self.vlans)
+
+    def pick(self, index, t, dwell):
+        """First usable VLAN from index on at t, and until when it stays
+
+        Returns -1 and the next window opening when none is usable.
+        """
+        count = len(self.vlans)
+        opens = []
+        for k in range(count):
+            j = (index + k) % count
+            rule = self.rules.get(j)
+            if rule is None:
+                return j, t + dwell
+            seconds, windows = rule
+            if windows is None:
+                return j, t + (seconds or dwell)
+            if windows.open_at(t):
+                return j, min(t + (seconds or dwell), windows.close_after(t))
+            opens.append(windows.open_after(t))
+        return -1, min((o for o in opens if o is not None), default=t + HORIZON)
+
+
+def parse_schedule(spec, vlans, where):
+    """Schedule for a port group's "schedule" setting, or None without one"""
+    if not spec:
+        return None
+    if not isinstance(spec, dict):
+        raise ValueError(f"{where}: schedule must be an object")
+    try:
+        return Schedule(vlans, spec, where)
+    except (TypeError, KeyError, AttributeError) as e:
+        raise ValueError(f"{where}: invalid schedule: {e}")
+
+
+class GroupTimeline:
+    """Change times of one port group's rotation, compiled a stretch at a time
+
+    times holds when each segment starts and indexes the VLAN (position
+    in the rotation, -1 for none) it switches to; consecutive segments
+    never have the same VLAN.
+    """
+
+    __slots__ = ('schedule', 'dwell', 'horizon', 'times', 'indexes', 'end', '_resume')
+
+    def __init__(self, schedule, dwell, start, index, horizon=HORIZON):
+        self.schedule = schedule
+        self.dwell = schedule.dwell or dwell
+        self.horizon = horizon
+        self.times = array('d')
+        self.indexes = array('i')
+        self.end = start
+        self._resume = index
+        self._compile()
+
+    def _compile(self):
+        """Compile from end on, keeping the last segment so far"""
+        if self.times:
+            times, indexes = array('d', self.times[-1:]), array('i', self.indexes[-1:])
+        else:
+            times, indexes = array('d'), array('i')
+        t, index = self.end, self._resume
+        limit = t + self.horizon
+        pick, dwell = self.schedule.pick, self.dwell
+        count = len(self.schedule.vlans)
+        while t < limit and len(times) < MAX_SEGMENTS:
+            j, until = pick(index, t, dwell)
+            if not indexes or indexes[-1] != j:
+                times.append(t)
+                indexes.append(j)
+            t = until
+            if j >= 0:
+                index = (j + 1) % count
+        self.times, self.indexes, self.end, self._resume = times, indexes, t, index
+
+    def active(self, t):
+        """Rotation index active at t, -1 when no VLAN is, None before the timeline"""
+        while t >= self.end:
+            self._compile()
+        k = bisect.bisect_right(self.times, t) - 1
+        return self.indexes[k] if k >= 0 else None
+
+    def next_change(self, t):
+        """(time, index) of the first change after t, or None if it never changes"""
+        while t >= self.end:
+            self._compile()
+        for _ in range(2):
+            k = bisect.bisect_right(self.times, t)
+            if k < len(self.times):
+                return self.times[k], self.indexes[k]
+            self._compile()
+        return None
+
+    def upcoming(self, t, count):
+        """The next count changes after t"""
+        changes = []
+        while len(changes) < count:
+            change = self.next_change(t)
+            if change is None:
+                break
+            changes.append(change)
+            t = change[0]
+        return changes
+
+
+def uses_schedules(switches):
+    return any(group.get("schedule") for switch in switches for group in switch["port_groups"])
+
+
+def anchor(group, now, horizon=HORIZON):
+    """Where a group's timeline starts: its last switch, if recent, else now"""
+    switched_at = group.get("switched_at")
+    if group["vlan"] in group["vlans"] and switched_at and 0 <= now - switched_at < horizon:
+        return switched_at, group["vlans"].index(group["vlan"])
+    return now, group["cursor"]
+
+
+class FleetTimeline:
+    """Timelines of every port group, with a heap of their next changes"""
+
+    def __init__(self, switches, interval, retry=RETRY_SECONDS, now=None):
+        now = time.time() if now is None else now
+        self.switches = switches
+        self.retry = retry
+        self.timelines = {}
+        self._heap = []
+        self._counter = itertools.count()
+        # Groups not yet on their active VLAN, with their switch
+        self._pending = {}
+        self._retry_at = None
+        for switch in switches:
+            for group in switch["port_groups"]:
+                schedule = group.get("schedule") or Schedule(group["vlans"])
+                timeline = GroupTimeline(schedule, interval, *anchor(group, now))
+                key = (switch["name"], group["name"])
+                self.timelines[key] = timeline
+                self._push(switch, group, timeline, now)
+                self._pending[key] = (switch, group)
+        if self._pending:
+            self._retry_at = now
+
+    def _push(self, switch, group, timeline, now):
+        change = timeline.next_change(now)
+        if change is None:
+            group["next_change"], group["next_vlan"] = None, None
+            return
+        change_time, index = change
+        group["next_change"] = change_time
+        group["next_vlan"] = group["vlans"][index] if index >= 0 else None
+        heapq.heappush(self._heap, (change_time, next(self._counter), switch, group, timeline))
+
+    def next_change(self, now=None):
+        """Wall time the next group is due, or None"""
+        first = self._heap[0][0] if self._heap else None
+        if self._retry_at is not None and (first is None or self._retry_at < first):
+            return self._retry_at
+        return first
+
+    def prepare(self, now=None):
+        """Switches with a group due at now, ready for run_tick
+
+        Due groups get the cursor of their active VLAN; the other
+        groups of those switches are held for this tick.
+        """
+        now = time.time() if now is None else now
+        candidates, self._pending = self._pending, {}
+        while self._heap and self._heap[0][0] <= now:
+            _, _, switch, group, timeline = heapq.heappop(self._heap)
+            self._push(switch, group, timeline, now)
+            candidates[(switch["name"], group["name"])] = (switch, group)
+
+        due = {}
+        for key, (switch, group) in candidates.items():
+            index = self.timelines[key].active(now)
+            if index is None or index < 0 or group["vlans"][index] == group["vlan"]:
+                continue
+            group["cursor"] = index
+            due.setdefault(switch["name"], (switch, set()))[1].add(group["name"])
+            self._pending[key] = (switch, group)
+
+        self._retry_at = now + self.retry if self._pending else None
+        switches = []
+        for switch, names in due.values():
+            for group in switch["port_groups"]:
+                group["hold"] = group["name"] not in names
+            switches.append(switch)
+        return switches
+
+    def active_vlan(self, switch, group, t):
+        """VLAN a group's schedule puts it on at t, or None"""
+        index = self.timelines[(switch["name"], group["name"])].active(t)
+        return group["vlans"][index] if index is not None and index >= 0 else None
+
+
+def follow_schedules(scheduler, config, switches, func, job=None):
+    """Schedule func on the switches' timeline, or every interval when no group has a schedule
+
+    Replaces job if given. Returns the new job and the FleetTimeline
+    (None on the interval grid).
+    """
+    if job is not None:
+        scheduler.cancel(job)
+    interval = interval_from_config(config)
+    if not uses_schedules(switches):
+        return scheduler.every(interval, func, missed=config.get("missed_ticks", "skip")), None
+    timeline = FleetTimeline(switches, interval, retry=config.get("schedule_retry_seconds", RETRY_SECONDS))
+    return scheduler.follow(timeline, func), timeline
+
+
+def render_timeline(switches, interval, count=10, now=None):
+    """Text listing of the next changes of every scheduled port group"""
+    now = time.time() if now is None else now
+    lines = []
+    for switch in switches:
+        for group in switch["port_groups"]:
+            if not group.get("schedule"):
+                continue
+            timeline = GroupTimeline(group["schedule"], interval, now, group["cursor"])
+            lines.append(f"switch {switch['name']} group {group['name']}: next {count} change(s)")
+            for change_time, index in timeline.upcoming(now, count):
+                vlan = group["vlans"][index] if index >= 0 else "(hold)"
+                stamp = datetime.datetime.fromtimestamp(change_time).strftime('%a %Y-%m-%d %H:%M:%S')
+                lines.append(f"    {stamp}  vlan {vlan}")
+    return lines
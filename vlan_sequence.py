@@ -0,0 +1,129 @@
+"""
+Compact, immutable VLAN rotation order.
+
+A port group's VLAN list may use range syntax, e.g. "100-199,300,400-410",
+as one string or as list entries. It is validated once (1-4094) and
+kept as runs of consecutive VLANs rather than one string per VLAN, so
+a rotation over thousands of VLANs costs a few tuples. Indexing is a
+binary search over the runs; VLANs are only expanded when iterated.
+The rotation itself is just a cursor into the sequence.
+"""
+
+import bisect
+
+MIN_VLAN = 1
+MAX_VLAN = 4094
+
+
+def _vlan_number(text, spec):
+    text = str(text).strip()
+    if not text.isdigit() or not MIN_VLAN <= int(text) <= MAX_VLAN:
+        raise ValueError(f"Invalid VLAN {text!r} in {spec!r}: must be {MIN_VLAN}-{MAX_VLAN}")
+    return int(text)
+
+
+def parse_runs(spec):
+    """Turn a VLAN spec into a list of (first, last) runs, in order
+
+    spec is a string such as "100-199,300" or a list whose entries are
+    VLAN numbers or such strings. Adjacent VLANs are merged into runs.
+    """
+    entries = [spec] if isinstance(spec, (str, int)) else spec
+    runs = []
+    for entry in entries:
+        for part in str(entry).split(','):
+            part = part.strip()
+            if not part:
+                continue
+            first, dash, last = part.partition('-')
+            first = _vlan_number(first, part)
+            last = _vlan_number(last, part) if dash else first
+            if last < first:
+                raise ValueError(f"Invalid VLAN range {part!r}")
+            if runs and runs[-1][1] + 1 == first:
+                runs[-1] = (runs[-1][0], last)
+            else:
+                runs.append((first, last))
+    return runs
+
+
+class VlanSequence:
+    """Immutable sequence of VLAN IDs (as strings), stored as runs"""
+
+    __slots__ = ('runs', '_offsets', '_length', '_by_first', '_overlapping')
+
+    def __init__(self, spec=()):
+        if isinstance(spec, VlanSequence):
+            runs = spec.runs
+        else:
+            runs = tuple(parse_runs(spec))
+        self.runs = runs
+        # Position of the first VLAN of every run
+        offsets = []
+        length = 0
+        for first, last in runs:
+            offsets.append(length)
+            length += last - first + 1
+        self._offsets = offsets
+        self._length = length
+        # Runs ordered by VLAN for membership and index lookups
+        self._by_first = sorted((first, last, offset) for (first, last), offset in zip(runs, offsets))
+        self._overlapping = any(a[1] >= b[0] for a, b in zip(self._by_first, self._by_first[1:]))
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if not isinstance(index, int):
+            raise TypeError("VLAN sequence indices must be integers")
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("VLAN sequence index out of range")
+        run = bisect.bisect_right(self._offsets, index) - 1
+        return str(self.runs[run][0] + index - self._offsets[run])
+
+    def __iter__(self):
+        for first, last in self.runs:
+            for vlan in range(first, last + 1):
+                yield str(vlan)
+
+    def index(self, vlan):
+        """Position of the first occurrence of vlan"""
+        try:
+            number = int(vlan)
+        except (TypeError, ValueError):
+            raise ValueError(f"{vlan!r} is not in the VLAN sequence")
+        if self._overlapping:
+            # A VLAN listed twice: the earliest run holding it wins
+            for (first, last), offset in zip(self.runs, self._offsets):
+                if first <= number <= last:
+                    return offset + number - first
+        else:
+            i = bisect.bisect_right(self._by_first, (number, MAX_VLAN + 1, 0)) - 1
+            if i >= 0:
+                first, last, offset = self._by_first[i]
+                if number <= last:
+                    return offset + number - first
+        raise ValueError(f"{vlan!r} is not in the VLAN sequence")
+
+    def __contains__(self, vlan):
+        try:
+            self.index(vlan)
+        except ValueError:
+            return False
+        return True
+
+    def __eq__(self, other):
+        if isinstance(other, VlanSequence):
+            return self.runs == other.runs
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.runs)
+
+    def __str__(self):
+        return ",".join(str(first) if first == last else f"{first}-{last}" for first, last in self.runs)
+
+    def __repr__(self):
+        return f"VlanSequence({str(self)!r})"
@@ -31,8 +31,6 @@ else:
 # Add the base directory to the Python path
 sys.path.insert(0, str(BASE_DIR))
 
-from vlan_switcher_service import VLANSwitcher
-
 class VLANSwitcherWindowsService(win32serviceutil.ServiceFramework):
     _svc_name_ = "VLANSwitcherService"
     _svc_display_name_ = "VLAN Switcher Service"
@@ -70,26 +68,28 @@ class VLANSwitcherWindowsService(win32serviceutil.ServiceFramework):
         )
         
         try:
-            # Start the VLAN switcher
+            # Start the VLAN switcher; imported here so service management
+            # commands don't load the switching engine
+            from vlan_switcher_service import VLANSwitcher
             switcher = VLANSwitcher()
             
-            # Import schedule here to avoid issues with service
-            import schedule
-            import time
+            # Import the scheduler here to avoid issues with service
+            import math
+            from deadline_scheduler import DeadlineScheduler, interval_from_config
             
             # Schedule the function
-            schedule.every(switcher.config["schedule_minutes"]).minutes.do(switcher.issue_command_to_switch)
+            scheduler = DeadlineScheduler()
+            scheduler.every(interval_from_config(switcher.config), switcher.issue_command_to_switch)
             
             self.logger.info("Service running")
             
-            while self.is_alive:
-                # Check if service should stop
-                if win32event.WaitForSingleObject(self.hWaitStop, 1000) == win32event.WAIT_OBJECT_0:
-                    break
-                    
-                # Run pending scheduled tasks
-                schedule.run_pending()
-                time.sleep(1)
+            def wait_for_stop(timeout):
+                # Check if service should stop while waiting for the next deadline
+                millis = win32event.INFINITE if timeout is None else math.ceil(timeout * 1000)
+                stopped = win32event.WaitForSingleObject(self.hWaitStop, millis) == win32event.WAIT_OBJECT_0
+                return stopped or not self.is_alive
+            
+            scheduler.run(wait_for_stop)
                 
         except Exception as e:
             self.logger.error(f"Service error: {e}")
@@ -102,22 +102,26 @@ class VLANSwitcherWindowsService(win32serviceutil.ServiceFramework):
         
         try:
             # Start the VLAN switcher
+            from vlan_switcher_service import VLANSwitcher
             switcher = VLANSwitcher()
             
-            # Import schedule here to avoid issues with service
-            import schedule
+            # Import the scheduler here to avoid issues with service
             import time
+            from deadline_scheduler import DeadlineScheduler, interval_from_config
             
             # Schedule the function
-            schedule.every(switcher.config["schedule_minutes"]).minutes.do(switcher.issue_command_to_switch)
+            interval = interval_from_config(switcher.config)
+            scheduler = DeadlineScheduler()
+            scheduler.every(interval, switcher.issue_command_to_switch)
             
-            print(f"Service configured: {switcher.config['switch_ip']} - Every {switcher.config['schedule_minutes']} minute(s)")
+            print(f"Service configured: {switcher.config['switch_ip']} - Every {interval:g} second(s)")
             print("Running...")
             
-            while True:
-                # Run pending scheduled tasks
-                schedule.run_pending()
-                time.sleep(1)
+            def wait_for_stop(timeout):
+                time.sleep(timeout if timeout is not None else 3600)
+                return False
+            
+            scheduler.run(wait_for_stop)
                 
         except KeyboardInterrupt:
             print("\nStopping debug mode...")